@@ -0,0 +1,229 @@
+"""Micro-benchmarks of the canonicalization of tensorial factors.
+
+Synthetic workloads are generated with controllable numbers of factors, of
+indices for each factor, and symmetry for the indexed bases.  The symmetries
+are the n-body and the double-bar symmetries set by
+:py:meth:`drudge.FockDrudge.set_n_body_base` and
+:py:meth:`drudge.FockDrudge.set_dbbar_base`.  The dummies are contracted
+randomly among the slots of the factors.
+
+For each workload, the building of the Eldags in Python is timed separately
+from the native canonicalization by canonpy, both for one Eldag at a time and
+for the batched canonicalization.  The complete canonicalization by
+:py:func:`drudge.canon.canon_factors` is also timed, with the caching of the
+results disabled.  Like::
+
+    python3 benchmarks/canonicalization.py --factors 2 4 --symms dbbar
+
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os.path
+import random
+import time
+
+from sympy import IndexedBase, Symbol
+
+from drudge import FockDrudge, LocalContext, Range, canon_cache_info
+from drudge.canon import _build_eldag, canon_factors, set_canon_cache_size
+from drudge.canonpy import canon_eldag, canon_eldags
+
+SYMMS = ['none', 'n_body', 'dbbar']
+
+
+def gen_workload(rand, n_terms, n_factors, n_body, symm, n_bases=2):
+    """Generate the inputs for canonicalization.
+
+    Each input has the given number of factors, each with ``2 * n_body``
+    indices.  The indexed bases are drawn from a pool of the given size, which
+    are set to have the given kind of symmetry.  The dummies are summed over a
+    single range, and each dummy is put into two random slots, with at most one
+    slot given a free symbol.
+
+    The symmetries and the list of summations and factors are returned.
+    """
+
+    dr = FockDrudge(LocalContext(0))
+    bases = [IndexedBase('b{}'.format(i)) for i in range(n_bases)]
+    for base in bases:
+        if symm == 'n_body':
+            dr.set_n_body_base(base, n_body)
+        elif symm == 'dbbar':
+            dr.set_dbbar_base(base, n_body)
+        elif symm != 'none':
+            raise ValueError('Invalid symmetry', symm, 'expecting', SYMMS)
+        continue
+    symms = dr.symms.value
+
+    r = Range('R')
+    rank = 2 * n_body
+    n_slots = n_factors * rank
+    dumms = [Symbol('d{}'.format(i)) for i in range(n_slots // 2)]
+    free = [Symbol('p')] if n_slots % 2 == 1 else []
+
+    inputs = []
+    for _ in range(n_terms):
+        slots = [j for i in dumms for j in (i, i)] + free
+        rand.shuffle(slots)
+        factors = []
+        for i in range(n_factors):
+            base = rand.choice(bases)
+            factors.append((
+                base[tuple(slots[i * rank:(i + 1) * rank])],
+                (0, base.label.name)
+            ))
+            continue
+        inputs.append(([(i, r) for i in dumms], factors))
+        continue
+
+    return symms, inputs
+
+
+def time_workload(symms, inputs, n_threads, repeats):
+    """Time the canonicalization of the inputs.
+
+    The best times out of the repetitions, in seconds, are returned for the
+    building of the Eldags, the native canonicalization one by one, the
+    batched native canonicalization, and the complete canonicalization.
+    """
+
+    times = {'build': [], 'native': [], 'batch': [], 'full': []}
+    prev_size = canon_cache_info().max_size
+    set_canon_cache_size(None)
+    try:
+        for _ in range(repeats):
+            begin = time.perf_counter()
+            args = []
+            for sums, factors in inputs:
+                eldag, _ = _build_eldag(sums, factors, symms)
+                args.append(
+                    (eldag.edges, eldag.ia, eldag.symms, eldag.int_colour)
+                )
+                continue
+            times['build'].append(time.perf_counter() - begin)
+
+            begin = time.perf_counter()
+            for i in args:
+                canon_eldag(*i)
+                continue
+            times['native'].append(time.perf_counter() - begin)
+
+            begin = time.perf_counter()
+            canon_eldags(args, n_threads=n_threads)
+            times['batch'].append(time.perf_counter() - begin)
+
+            begin = time.perf_counter()
+            for sums, factors in inputs:
+                canon_factors(sums, factors, symms)
+                continue
+            times['full'].append(time.perf_counter() - begin)
+            continue
+    finally:
+        set_canon_cache_size(prev_size)
+
+    return {k: min(v) for k, v in times.items()}
+
+
+def get_parser():
+    """Get the parser for the command line arguments."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--factors', type=int, nargs='+', default=[2, 3, 4],
+        help='The numbers of factors in each term.'
+    )
+    parser.add_argument(
+        '--bodies', type=int, nargs='+', default=[1, 2],
+        help='The numbers of bodies of the factors, half of their indices.'
+    )
+    parser.add_argument(
+        '--symms', nargs='+', default=SYMMS,
+        help='The kinds of symmetry, from {}.'.format(', '.join(SYMMS))
+    )
+    parser.add_argument(
+        '--terms', type=int, default=200,
+        help='The number of terms for each workload.'
+    )
+    parser.add_argument(
+        '--threads', type=int, default=1,
+        help='The number of threads for the batched canonicalization.'
+    )
+    parser.add_argument(
+        '--repeats', type=int, default=3,
+        help='The number of repetitions, the best time is reported.'
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='The seed for the random generation of the workloads.'
+    )
+    parser.add_argument(
+        '--output', default=None,
+        help='The JSON or CSV file to write the results into.'
+    )
+    return parser
+
+
+def main(argv=None):
+    """Run the micro-benchmarks."""
+
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    for i in args.symms:
+        if i not in SYMMS:
+            parser.error('invalid symmetry {}'.format(i))
+        continue
+
+    rand = random.Random(args.seed)
+    header = (
+        'factors', 'bodies', 'symm', 'build', 'native', 'batch', 'full'
+    )
+    print('Times in microseconds per term')
+    print('{:>7} {:>6} {:>6}  {:>9} {:>9} {:>9} {:>9}'.format(*header))
+
+    results = []
+    for n_factors, n_body, symm in itertools.product(
+            args.factors, args.bodies, args.symms
+    ):
+        symms, inputs = gen_workload(
+            rand, args.terms, n_factors, n_body, symm
+        )
+        times = time_workload(symms, inputs, args.threads, args.repeats)
+        res = dict(factors=n_factors, bodies=n_body, symm=symm)
+        res.update(
+            (k, v * 1.0e6 / args.terms) for k, v in times.items()
+        )
+        results.append(res)
+        print('{:>7} {:>6} {:>6}  {:9.1f} {:9.1f} {:9.1f} {:9.1f}'.format(
+            *(res[i] for i in header)
+        ))
+        continue
+
+    if args.output is not None:
+        write_results(args.output, header, results)
+    return results
+
+
+def write_results(filename, header, results):
+    """Write the results into a JSON or CSV file by its extension."""
+
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.json':
+        with open(filename, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    elif ext == '.csv':
+        with open(filename, 'w', newline='') as fp:
+            writer = csv.DictWriter(fp, header)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        raise ValueError(
+            'Invalid extension', ext, 'in', filename,
+            'expecting .json or .csv'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""Benchmarks of drudge on realistic derivations.
+
+The derivations here follow the shipped examples and the tests of the
+problem-specific drudges, with knobs to scale the size of the problems.  By
+default, they are run on a local context (:py:class:`drudge.LocalContext`), so
+that no Spark installation is needed.  The wall time and the number of terms of
+each stage are printed and recorded by the stopwatch, and they can be written
+into a JSON or CSV file for the comparison of different commits, like::
+
+    python3 benchmarks/derivations.py --workers 4 --output records.json
+
+Specific benchmarks can be selected by their names, like::
+
+    python3 benchmarks/derivations.py ccsd subst --chain 10
+
+"""
+
+import argparse
+import collections
+import functools
+import random
+
+from sympy import IndexedBase, Rational, Symbol, factorial, symbols
+
+from drudge import (
+    BogoliubovDrudge, Drudge, LocalContext, NuclearBogoliubovDrudge,
+    PartHoleDrudge, Range, ReducedBCSDrudge, SU2LatticeDrudge, Stopwatch, Vec,
+    prod_, sum_
+)
+from drudge.nuclear import CG
+
+
+#
+# Coupled-cluster theories
+#
+
+def bench_cc(ctx, args, tock, theory):
+    """Derive the equations of a coupled-cluster theory.
+
+    This follows the ``gencc.py`` example, with the number of nested
+    commutators in the similarity transform given by the order knob.
+    """
+
+    dr = PartHoleDrudge(ctx)
+    dr.full_simplify = False
+    p = dr.names
+
+    c_ = p.c_
+    c_dag = p.c_dag
+    v_dumms = p.V_dumms
+    o_dumms = p.O_dumms
+
+    t = IndexedBase('t')
+    orders = [_CC_ORDERS[i] for i in theory[2:]]
+    for order in orders:
+        if order > 1:
+            dr.set_dbbar_base(t, order)
+        continue
+
+    corr = dr.einst(sum_(
+        Rational(1, factorial(i) ** 2) *
+        t[tuple(v_dumms[:i]) + tuple(o_dumms[:i])] *
+        prod_(c_dag[j] for j in v_dumms[:i]) *
+        prod_(c_[j] for j in reversed(o_dumms[:i]))
+        for i in orders
+    ))
+    tock('setup', corr)
+
+    curr = dr.ham
+    h_bar = dr.ham
+    for i in range(args.order):
+        curr = (curr | corr).simplify() / (i + 1)
+        tock('commutator order {}'.format(i + 1), curr)
+        h_bar += curr
+        continue
+
+    h_bar = h_bar.simplify()
+    h_bar.repartition(cache=True)
+    tock('H-bar assembly', h_bar)
+
+    en_eqn = h_bar.eval_fermi_vev().simplify()
+    tock('energy equation', en_eqn)
+
+    for order in orders:
+        proj = prod_(
+            c_dag[j] for j in o_dumms[:order]
+        ) * prod_(
+            c_[j] for j in reversed(v_dumms[:order])
+        )
+        eqn = (proj * h_bar).eval_fermi_vev().simplify()
+        tock('T{} equation'.format(order), eqn)
+        continue
+
+    return
+
+
+_CC_ORDERS = {'s': 1, 'd': 2, 't': 3, 'q': 4}
+
+
+#
+# Other many-body problems
+#
+
+def bench_bogoliubov(ctx, args, tock):
+    """Rewrite the Hamiltonian in terms of quasi-particle operators."""
+
+    dr = BogoliubovDrudge(ctx)
+    tock('setup', dr.ham)
+
+    for i in range(args.repeats):
+        rewritten, _ = dr.write_in_qp(dr.orig_ham, 'M{}{}')
+        tock('write_in_qp {}'.format(i + 1), rewritten)
+        continue
+
+    return
+
+
+def bench_nuclear(ctx, args, tock):
+    """Deep simplification of sums of Clebsch-Gordan coefficients.
+
+    The sum is from the rule in Varshalovich 9.1.1 Eq (8), with the summations
+    shuffled differently for each repetition.
+    """
+
+    dr = NuclearBogoliubovDrudge(ctx)
+    tock('setup')
+
+    j, j12, j2, j1, j_prm, j23, j3 = symbols(
+        'j j12 j2 j1 jprm j23 j3', integer=True
+    )
+    m, m12, m2, m1, m_prm, m23, m3 = symbols(
+        'm m12 m2 m1 mprm m23 m3', integer=True
+    )
+    m_range = Range('m')
+    amp = CG(j12, m12, j3, m3, j, m) * CG(j1, m1, j2, m2, j12, m12) * CG(
+        j1, m1, j23, m23, j_prm, m_prm
+    ) * CG(j2, m2, j3, m3, j23, m23)
+
+    rand = random.Random(args.seed)
+    for i in range(args.repeats):
+        sums = [(m_i, m_range[-j_i, j_i + 1]) for m_i, j_i in [
+            (m1, j1), (m2, j2), (m3, j3), (m12, j12), (m23, j23)
+        ]]
+        rand.shuffle(sums)
+        res = dr.sum(*sums, amp).deep_simplify().merge()
+        tock('deep_simplify {}'.format(i + 1), res)
+        continue
+
+    return
+
+
+def bench_su2(ctx, args, tock):
+    """Nested commutators with the 1D Heisenberg Hamiltonian."""
+
+    dr = SU2LatticeDrudge(ctx)
+    l = Range('L')
+    dr.set_dumms(l, symbols('i j k l m n'))
+    dr.add_default_resolver(l)
+
+    p = dr.names
+    i = p.i
+    ham = dr.sum(
+        (i, l),
+        p.J_[i] * p.J_[i + 1] +
+        p.J_p[i] * p.J_m[i + 1] / 2 + p.J_m[i] * p.J_p[i + 1] / 2
+    ) * Symbol('J')
+    tock('setup', ham)
+
+    curr = dr.sum(p.J_p[0])
+    for order in range(args.order):
+        curr = (ham | curr).simplify()
+        tock('commutator order {}'.format(order + 1), curr)
+        continue
+
+    return
+
+
+def bench_bcs(ctx, args, tock):
+    """Nested commutators with the reduced BCS Hamiltonian."""
+
+    dr = ReducedBCSDrudge(ctx)
+    tock('setup', dr.ham)
+
+    curr = dr.sum(dr.raise_[dr.names.i])
+    for order in range(args.order):
+        curr = (dr.ham | curr).simplify()
+        tock('commutator order {}'.format(order + 1), curr)
+        continue
+
+    return
+
+
+#
+# Tensor substitutions
+#
+
+def bench_subst(ctx, args, tock):
+    """Substitute a chain of definitions, doubling the terms at each link."""
+
+    dr = Drudge(ctx)
+    r = Range('R')
+    dumms = symbols('a b c d e f')
+    dr.set_dumms(r, dumms)
+    dr.add_resolver_for_dumms()
+    a, b = dumms[:2]
+
+    t = IndexedBase('t')
+    u = IndexedBase('u')
+    xs = [IndexedBase('x{}'.format(i)) for i in range(args.chain + 1)]
+    defs = []
+    for i, (x, x_next) in enumerate(zip(xs, xs[1:])):
+        defs.append(dr.define_einst(
+            x[a], t[i, a, b] * x_next[b] + u[i, a] * x_next[a]
+        ))
+        continue
+
+    tensor = dr.einst(xs[0][a] * Vec('v')[a])
+    tock('setup', tensor)
+
+    res = tensor.subst_all(defs, simplify=True)
+    tock('subst_all', res)
+    return
+
+
+#
+# Driver
+#
+
+BENCHMARKS = collections.OrderedDict([
+    ('ccsd', functools.partial(bench_cc, theory='ccsd')),
+    ('ccsdt', functools.partial(bench_cc, theory='ccsdt')),
+    ('bogoliubov', bench_bogoliubov),
+    ('nuclear', bench_nuclear),
+    ('su2', bench_su2),
+    ('bcs', bench_bcs),
+    ('subst', bench_subst)
+])
+
+# CCSDT is only run when explicitly requested, for its cost.
+DEFAULT_BENCHMARKS = [i for i in BENCHMARKS if i != 'ccsdt']
+
+
+def get_parser():
+    """Get the parser for the command line arguments."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        'benchmarks', nargs='*', metavar='BENCHMARK',
+        help='The benchmarks to run, all but ccsdt by default, from {}.'
+        .format(', '.join(BENCHMARKS))
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help='The number of local worker processes, zero for serial runs.'
+    )
+    parser.add_argument(
+        '--spark', action='store_true',
+        help='Run on a Spark context instead of a local context.'
+    )
+    parser.add_argument(
+        '--order', type=int, default=4,
+        help='The number of nested commutators.'
+    )
+    parser.add_argument(
+        '--chain', type=int, default=8,
+        help='The length of the chain of substitutions.'
+    )
+    parser.add_argument(
+        '--repeats', type=int, default=2,
+        help='The number of repetitions of the smaller benchmarks.'
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='The seed for the randomized inputs.'
+    )
+    parser.add_argument(
+        '--output', default=None,
+        help='The JSON or CSV file to write the records into.'
+    )
+    return parser
+
+
+def main(argv=None):
+    """Run the benchmarks."""
+
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    names = args.benchmarks if len(args.benchmarks) > 0 else DEFAULT_BENCHMARKS
+    for i in names:
+        if i not in BENCHMARKS:
+            parser.error('invalid benchmark {}'.format(i))
+        continue
+
+    if args.spark:
+        from pyspark import SparkConf, SparkContext
+        ctx = SparkContext(conf=SparkConf().setAppName('drudge-benchmarks'))
+    else:
+        ctx = LocalContext(args.workers)
+
+    stopwatch = Stopwatch()
+    try:
+        for name in names:
+            stopwatch.tick()
+            tock = functools.partial(_tock, stopwatch, name)
+            BENCHMARKS[name](ctx, args, tock)
+            continue
+    finally:
+        ctx.stop()
+
+    stopwatch.tock_total(args.output)
+    return stopwatch.records
+
+
+def _tock(stopwatch, name, label, tensor=None):
+    """Make a timestamp for a stage of a benchmark."""
+    stopwatch.tock('{}: {}'.format(name, label), tensor)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,10 @@ Drudge, a symbolic system for non-commutative and tensor algebra
 
 from .canonpy import Perm, Group
 from .term import Range, Vec, Term
-from .canon import IDENT, NEG, CONJ
+from .canon import (
+    IDENT, NEG, CONJ, CanonCacheInfo, canon_cache_info, clear_canon_cache,
+    set_canon_cache_size
+)
 from .drudge import Tensor, TensorDef, Drudge
 from .wick import WickDrudge
 from .fock import (
@@ -20,7 +23,13 @@ from .clifford import CliffordDrudge, inner_by_delta
 from .bcs import ReducedBCSDrudge
 from .nuclear import NuclearBogoliubovDrudge
 from .report import Report, ScalarLatexPrinter
-from .utils import sum_, prod_, Stopwatch, CallByIndex, InvariantIndexable
+from .local import LocalContext
+from .opcache import OpCache
+from .serializer import TermSerializer
+from .profiling import Profile, StageRecord, SlowTerm
+from .utils import (
+    sum_, prod_, Stopwatch, StopwatchRecord, CallByIndex, InvariantIndexable
+)
 
 __version__ = '0.10.0dev0'
 
@@ -40,6 +49,10 @@ __all__ = [
     'IDENT',
     'NEG',
     'CONJ',
+    'CanonCacheInfo',
+    'canon_cache_info',
+    'clear_canon_cache',
+    'set_canon_cache_size',
 
     # Drudge.
     'Tensor',
@@ -69,10 +82,19 @@ __all__ = [
     'NuclearBogoliubovDrudge',
     'inner_by_delta',
 
+    # Execution backends.
+    'LocalContext',
+    'OpCache',
+    'TermSerializer',
+
     # Small user utilities.
     'sum_',
     'prod_',
     'Stopwatch',
+    'StopwatchRecord',
+    'Profile',
+    'StageRecord',
+    'SlowTerm',
     'CallByIndex',
     'InvariantIndexable',
     'Report',
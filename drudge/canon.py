@@ -5,13 +5,14 @@ by delegating the actual work to the core canonpy module.
 
 """
 
+import collections
 import itertools
 import typing
 import warnings
 
 from sympy import conjugate, Symbol
 
-from .canonpy import canon_eldag, Group, Perm
+from .canonpy import canon_eldag, canon_eldags, Group, Perm
 from .utils import sympy_key
 
 #
@@ -76,10 +77,200 @@ class Eldag:
     def canon(self):
         """Canonicalize the Eldag.
 
-        The canonicalization result from canonpy is directly returned.
+        The canonicalization result from canonpy is directly returned.  Results
+        are looked up in the canonicalization cache first.
         """
 
-        return canon_eldag(self.edges, self.ia, self.symms, self.int_colour)
+        int_colour = self.int_colour
+        cache = _canon_cache
+        if cache.max_size is None:
+            return canon_eldag(self.edges, self.ia, self.symms, int_colour)
+
+        key = (
+            tuple(self.edges), tuple(self.ia), tuple(self.symms),
+            tuple(int_colour)
+        )
+        res = cache.get(key)
+        if res is None:
+            res = canon_eldag(self.edges, self.ia, self.symms, int_colour)
+            cache.put(key, res)
+        return res
+
+
+def canon_eldag_batch(eldags: typing.Sequence[Eldag], n_threads=1):
+    """Canonicalize multiple Eldags.
+
+    The results are the same as calling the ``canon`` method of each of the
+    Eldags.  But all the Eldags absent from the canonicalization cache are
+    canonicalized in one native call, with the global interpreter lock
+    released and possibly multiple threads.
+    """
+
+    cache = _canon_cache
+    res = [None for _ in eldags]
+    keys = []
+    to_canon = []
+
+    for i, eldag in enumerate(eldags):
+        int_colour = eldag.int_colour
+        key = (
+            tuple(eldag.edges), tuple(eldag.ia), tuple(eldag.symms),
+            tuple(int_colour)
+        )
+        if cache.max_size is not None:
+            res[i] = cache.get(key)
+        if res[i] is None:
+            keys.append((i, key))
+            to_canon.append((eldag.edges, eldag.ia, eldag.symms, int_colour))
+        continue
+
+    canoned = canon_eldags(to_canon, n_threads=n_threads)
+    for (i, key), curr in zip(keys, canoned):
+        res[i] = curr
+        if cache.max_size is not None:
+            cache.put(key, curr)
+        continue
+
+    return res
+
+
+#
+# Canonicalization cache
+# ----------------------
+#
+
+
+class CanonCacheInfo(collections.namedtuple('CanonCacheInfo', [
+    'hits', 'misses', 'size', 'max_size'
+])):
+    """Statistics about the canonicalization cache.
+
+    Attributes
+    ----------
+
+    hits
+        The number of canonicalizations served from the cache.
+
+    misses
+        The number of canonicalizations actually carried out.
+
+    size
+        The current number of cached Eldags.
+
+    max_size
+        The maximum number of cached Eldags, None for disabled cache.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def hit_rate(self):
+        """The fraction of canonicalizations served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+class _CanonCache:
+    """Least-recently-used cache of Eldag canonicalization results.
+
+    The Eldags are keyed by their edges, symmetries, and integral colours.
+    Since the dummies are only represented as nodes in the Eldag, the key is
+    invariant with respect to the renaming of dummies.  The cache lives in each
+    process, so that it is shared across Spark tasks on reused Python workers.
+    """
+
+    __slots__ = [
+        'max_size',
+        '_entries',
+        '_hits',
+        '_misses'
+    ]
+
+    def __init__(self, max_size):
+        """Initialize the cache."""
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        """Get the cached result, None if absent."""
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self._hits += 1
+            return entries[key]
+        else:
+            self._misses += 1
+            return None
+
+    def put(self, key, value):
+        """Put the result into the cache."""
+        entries = self._entries
+        entries[key] = value
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+        return
+
+    def resize(self, max_size):
+        """Change the maximum size of the cache."""
+        self.max_size = max_size
+        entries = self._entries
+        if max_size is None:
+            entries.clear()
+        else:
+            while len(entries) > max_size:
+                entries.popitem(last=False)
+        return
+
+    def clear(self):
+        """Clear the cache with the statistics."""
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def info(self):
+        """The statistics of the cache."""
+        return CanonCacheInfo(
+            self._hits, self._misses, len(self._entries), self.max_size
+        )
+
+
+_canon_cache = _CanonCache(4096)
+
+
+def canon_cache_info() -> CanonCacheInfo:
+    """Get the statistics of the canonicalization cache in this process.
+
+    Note that for Spark executions, each worker process has its own cache.
+    Only the canonicalizations carried out inside the current process are
+    counted.
+    """
+    return _canon_cache.info
+
+
+def clear_canon_cache():
+    """Clear the canonicalization cache in this process, with its statistics.
+    """
+    _canon_cache.clear()
+
+
+def set_canon_cache_size(max_size: typing.Optional[int]):
+    """Set the maximum size of the canonicalization cache in this process.
+
+    None can be given to disable the caching.
+    """
+    if max_size is not None and (
+            not isinstance(max_size, int) or max_size < 0
+    ):
+        raise ValueError(
+            'Invalid canonicalization cache size', max_size,
+            'expecting non-negative integer or None'
+        )
+
+    _canon_cache.resize(max_size)
 
 
 # Node labels.
@@ -115,8 +306,6 @@ def canon_factors(sums, factors, symms):
 
     """
 
-    from .term import Vec
-
     # They need to be looped over multiple times.
     sums = list(sums)
     factors = list(factors)
@@ -126,7 +315,59 @@ def canon_factors(sums, factors, symms):
         return sums, factors, 1
 
     eldag, factor_idxes = _build_eldag(sums, factors, symms)
-    node_order, perms = eldag.canon()
+    return _get_canoned_factors(
+        sums, factors, eldag, factor_idxes, eldag.canon()
+    )
+
+
+def canon_factors_batch(problems, n_threads=1):
+    """Canonicalize the factors for multiple problems.
+
+    Each problem should be a triple of the summations, factors, and symmetries
+    as the arguments to :py:func:`canon_factors`, whose results are given in a
+    list.  The Eldags of all the problems are canonicalized together by
+    :py:func:`canon_eldag_batch`, with a single native call.
+    """
+
+    res = [None for _ in problems]
+    to_canon = []
+    eldags = []
+
+    for i, v in enumerate(problems):
+        sums, factors, symms = v
+        sums = list(sums)
+        factors = list(factors)
+        if len(factors) == 0 and len(sums) == 0:
+            res[i] = (sums, factors, 1)
+            continue
+        eldag, factor_idxes = _build_eldag(sums, factors, symms)
+        to_canon.append((i, sums, factors, factor_idxes))
+        eldags.append(eldag)
+        continue
+
+    canoned = canon_eldag_batch(eldags, n_threads=n_threads)
+    for (i, sums, factors, factor_idxes), eldag, canon_res in zip(
+            to_canon, eldags, canoned
+    ):
+        res[i] = _get_canoned_factors(
+            sums, factors, eldag, factor_idxes, canon_res
+        )
+        continue
+
+    return res
+
+
+def _get_canoned_factors(sums, factors, eldag, factor_idxes, canon_res):
+    """Get the canonicalized summations and factors.
+
+    The result of the canonicalization of the Eldag for the summations and
+    factors is used to rebuild them, in the same format as the result of
+    :py:func:`canon_factors`.
+    """
+
+    from .term import Vec
+
+    node_order, perms = canon_res
 
     # Sums are guaranteed to be in the initial segment of the nodes, but they
     # might not be at the beginning any more after the canonicalization.
@@ -6,8 +6,12 @@
 #include <Python.h>
 
 #include <algorithm>
+#include <atomic>
+#include <cstring>
 #include <memory>
 #include <string>
+#include <thread>
+#include <type_traits>
 #include <vector>
 
 #include <libcanon/eldag.h>
@@ -1008,11 +1012,102 @@ static std::vector<T> read_py_iter(PyObject* iterable, F get_value)
     return res;
 }
 
+/** Appends the points in a contiguous buffer of the given integral type.
+ */
+
+template <typename T>
+static void append_buffer_points(const Py_buffer& view, Point_vec& res)
+{
+    auto n_items = view.len / view.itemsize;
+    const char* data = static_cast<const char*>(view.buf);
+    res.reserve(n_items);
+
+    for (Py_ssize_t i = 0; i < n_items; ++i) {
+        T value;
+        std::memcpy(&value, data + i * sizeof(T), sizeof(T));
+        if (std::is_signed<T>::value && value < 0) {
+            PyErr_SetString(PyExc_ValueError, "Invalid negative point.");
+            throw err;
+        }
+        res.push_back(static_cast<Point>(value));
+    }
+}
+
+/** Reads unsigned integral points from an object with buffer interface.
+ *
+ * One-dimensional contiguous buffers of any native integral type are accepted,
+ * like arrays from the array module, NumPy arrays, and memory views of them.
+ */
+
+static Point_vec read_buffer_points(PyObject* obj)
+{
+    Py_buffer view;
+    if (PyObject_GetBuffer(obj, &view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) {
+        throw err;
+    }
+
+    Point_vec res{};
+
+    try {
+        const char* format = view.format == NULL ? "B" : view.format;
+        if (*format == '@') {
+            ++format;
+        }
+        char code = format[0];
+        bool is_signed = std::strchr("bhilqn", code) != NULL;
+        bool is_unsigned = std::strchr("BHILQN", code) != NULL;
+
+        if (view.ndim > 1 || code == '\0' || format[1] != '\0'
+            || !(is_signed || is_unsigned)) {
+            PyErr_SetString(PyExc_TypeError,
+                "Invalid buffer for points, "
+                "one-dimensional native integers expected.");
+            throw err;
+        }
+
+        switch (view.itemsize) {
+        case 1:
+            is_signed ? append_buffer_points<int8_t>(view, res)
+                      : append_buffer_points<uint8_t>(view, res);
+            break;
+        case 2:
+            is_signed ? append_buffer_points<int16_t>(view, res)
+                      : append_buffer_points<uint16_t>(view, res);
+            break;
+        case 4:
+            is_signed ? append_buffer_points<int32_t>(view, res)
+                      : append_buffer_points<uint32_t>(view, res);
+            break;
+        case 8:
+            is_signed ? append_buffer_points<int64_t>(view, res)
+                      : append_buffer_points<uint64_t>(view, res);
+            break;
+        default:
+            PyErr_SetString(
+                PyExc_TypeError, "Invalid item size of buffer for points.");
+            throw err;
+        }
+    } catch (I_err) {
+        PyBuffer_Release(&view);
+        throw err;
+    }
+
+    PyBuffer_Release(&view);
+    return res;
+}
+
 /** Reads unsigned integral points from a Python iterable.
+ *
+ * Objects supporting the buffer interface are read directly from their
+ * underlying memory.
  */
 
 static Point_vec read_points(PyObject* iterable)
 {
+    if (PyObject_CheckBuffer(iterable)) {
+        return read_buffer_points(iterable);
+    }
+
     return read_py_iter<size_t>(iterable, [](PyObject* item) {
         if (!PyLong_Check(item)) {
             throw err;
@@ -1029,12 +1124,17 @@ static Point_vec read_points(PyObject* iterable)
 }
 
 /** Reads pointer to Sims transversal from Python iterable.
+ *
+ * When a vector for kept objects is given, new references to the groups will
+ * be added to it, so that the transversal systems stay valid after the
+ * iterable is released.
  */
 
-static Node_symms<Simple_perm> read_symms(PyObject* iterable)
+static Node_symms<Simple_perm> read_symms(
+    PyObject* iterable, std::vector<PyObject*>* kept = nullptr)
 {
     using Transv_ptr = const Sims_transv<Simple_perm>*;
-    return read_py_iter<Transv_ptr>(iterable, [](PyObject* item) -> Transv_ptr {
+    return read_py_iter<Transv_ptr>(iterable, [kept](PyObject* item) -> Transv_ptr {
         auto check = PyObject_Not(item);
         if (check == 1) {
             // This is an indication of a false value used by user for show
@@ -1053,6 +1153,10 @@ static Node_symms<Simple_perm> read_symms(PyObject* iterable)
         }
         Group_object* group = (Group_object*)item;
 
+        if (kept) {
+            Py_INCREF(item);
+            kept->push_back(item);
+        }
         return group->transv.get();
     });
 }
@@ -1175,6 +1279,78 @@ perms
 
 )__doc__";
 
+/** Input for the canonicalization of an Eldag.
+ */
+
+struct Eldag_input {
+    Point_vec edges;
+    Point_vec ia;
+    Node_symms<Simple_perm> symms;
+    Point_vec colours;
+};
+
+/** Reads and checks the input for the canonicalization of an Eldag.
+ *
+ * Internal errors will be thrown after the Python exception is set.
+ */
+
+static Eldag_input read_eldag_input(PyObject* edges_arg, PyObject* ia_arg,
+    PyObject* symms_arg, PyObject* colours_arg,
+    std::vector<PyObject*>* kept = nullptr)
+{
+    Eldag_input input{};
+
+    input.edges = read_points(edges_arg);
+    input.ia = read_points(ia_arg);
+    if (input.ia.empty()) {
+        PyErr_SetString(PyExc_ValueError, "Expecting non-empty ia.");
+        throw err;
+    }
+    size_t n_nodes = input.ia.size() - 1;
+
+    input.symms = read_symms(symms_arg, kept);
+    if (input.symms.size() != n_nodes) {
+        std::string err_msg("Expecting ");
+        err_msg += std::to_string(n_nodes);
+        err_msg += " symmetries, ";
+        err_msg += std::to_string(input.symms.size());
+        err_msg += " given.";
+        PyErr_SetString(PyExc_ValueError, err_msg.c_str());
+        throw err;
+    }
+
+    input.colours = read_points(colours_arg);
+    if (input.colours.size() != n_nodes) {
+        std::string err_msg("Expecting ");
+        err_msg += std::to_string(n_nodes);
+        err_msg += " colours, ";
+        err_msg += std::to_string(input.colours.size());
+        err_msg += " given.";
+        PyErr_SetString(PyExc_ValueError, err_msg.c_str());
+        throw err;
+    }
+
+    return input;
+}
+
+/** Canonicalizes the Eldag from the given input.
+ *
+ * The input is consumed.  No Python API is touched, so that this function can
+ * be called without the GIL.
+ */
+
+static Eldag_perm<Simple_perm> canon_eldag_input(Eldag_input& input)
+{
+    Eldag eldag{ std::move(input.edges), std::move(input.ia) };
+    const auto& colours = input.colours;
+
+    auto canon_res = canon_eldag(
+        eldag, input.symms, [&](auto point) { return colours[point]; });
+
+    // Currently, we just neglect the automorphism group.
+    return std::move(canon_res.first);
+}
+
 /** Eldag canonicalization driver function.
  */
 
@@ -1186,8 +1362,6 @@ static PyObject* canon_eldag_func(
     PyObject* symms_arg;
     PyObject* colours_arg;
 
-    constexpr int err_code = 1;
-
     static char* kwlist[] = { "edges", "ia", "symms", "colours", NULL };
 
     auto arg_stat = PyArg_ParseTupleAndKeywords(args, keywds, "OOOO", kwlist,
@@ -1196,45 +1370,178 @@ static PyObject* canon_eldag_func(
         return NULL;
     }
 
-    Point_vec edges{};
-    Point_vec ia{};
-    size_t n_nodes;
-    Node_symms<Simple_perm> symms{};
-    Point_vec colours{};
+    Eldag_input input{};
+    try {
+        input = read_eldag_input(edges_arg, ia_arg, symms_arg, colours_arg);
+    } catch (I_err) {
+        return NULL;
+    }
 
-    edges = read_points(edges_arg);
-    ia = read_points(ia_arg);
-    n_nodes = ia.size() - 1;
+    return build_canon_res(canon_eldag_input(input));
+}
 
-    symms = read_symms(symms_arg);
-    if (symms.size() != n_nodes) {
-        std::string err_msg("Expecting ");
-        err_msg += std::to_string(n_nodes);
-        err_msg += " symmetries, ";
-        err_msg += std::to_string(symms.size());
-        err_msg += " given.";
-        PyErr_SetString(PyExc_ValueError, err_msg.c_str());
+/** Docstring for the batched Eldag canonicalization function.
+ */
+
+static const char* canon_eldags_docstring
+    = R"__doc__(Canonicalizes multiple Eldags.
+
+This function canonicalizes many Eldags in one call.  The input is parsed first,
+then all the Eldags are canonicalized with the global interpreter lock
+released, possibly by multiple threads.
+
+Parameters
+----------
+
+eldags
+
+    An iterable of Eldags, each given as a tuple of the edges, ia, symms, and
+    colours as for :py:func:`canon_eldag`.  For the integral arrays, objects
+    supporting the buffer interface, like arrays from the ``array`` module or
+    one-dimensional NumPy arrays of native integers, are read directly from
+    their memory without going through Python integers.
+
+n_threads
+
+    The number of threads to be used for the canonicalization, one by default.
+    Zero can be given to use the number of hardware threads.
+
+Returns
+-------
+
+results
+
+    A list of the canonicalization results of the Eldags, each of which is a
+    pair of the order of the nodes and the permutations for the nodes, as
+    from :py:func:`canon_eldag`.
+
+)__doc__";
+
+/** Batched Eldag canonicalization driver function.
+ */
+
+static PyObject* canon_eldags_func(
+    PyObject* self, PyObject* args, PyObject* keywds)
+{
+    PyObject* eldags_arg;
+    Py_ssize_t n_threads_arg = 1;
+
+    static char* kwlist[] = { "eldags", "n_threads", NULL };
+
+    auto arg_stat = PyArg_ParseTupleAndKeywords(
+        args, keywds, "O|n", kwlist, &eldags_arg, &n_threads_arg);
+    if (!arg_stat) {
         return NULL;
     }
 
-    colours = read_points(colours_arg);
-    if (colours.size() != n_nodes) {
-        std::string err_msg("Expecting ");
-        err_msg += std::to_string(n_nodes);
-        err_msg += " colours, ";
-        err_msg += std::to_string(colours.size());
-        err_msg += " given.";
-        PyErr_SetString(PyExc_ValueError, err_msg.c_str());
+    if (n_threads_arg < 0) {
+        PyErr_SetString(
+            PyExc_ValueError, "Invalid number of threads, non-negative expected.");
+        return NULL;
+    }
+
+    // New references to the symmetry groups, to keep them alive while the
+    // interpreter lock is released.
+    std::vector<PyObject*> kept{};
+    auto release_kept = [&]() {
+        for (auto i : kept) {
+            Py_DECREF(i);
+        }
+        kept.clear();
+    };
+
+    std::vector<Eldag_input> inputs{};
+    try {
+        inputs = read_py_iter<Eldag_input>(eldags_arg, [&](PyObject* item) {
+            PyObject* fields
+                = PySequence_Fast(item, "Invalid Eldag, tuple expected.");
+            if (!fields) {
+                throw err;
+            }
+            if (PySequence_Fast_GET_SIZE(fields) != 4) {
+                Py_DECREF(fields);
+                PyErr_SetString(PyExc_ValueError,
+                    "Invalid Eldag, expecting edges, ia, symms, and colours.");
+                throw err;
+            }
+
+            PyObject** items = PySequence_Fast_ITEMS(fields);
+            try {
+                auto input = read_eldag_input(
+                    items[0], items[1], items[2], items[3], &kept);
+                Py_DECREF(fields);
+                return input;
+            } catch (I_err) {
+                Py_DECREF(fields);
+                throw err;
+            }
+        });
+    } catch (I_err) {
+        release_kept();
         return NULL;
     }
 
-    Eldag eldag{ std::move(edges), std::move(ia) };
+    size_t n_eldags = inputs.size();
+    size_t n_threads = n_threads_arg == 0 ? std::thread::hardware_concurrency()
+                                          : n_threads_arg;
+    n_threads = std::max<size_t>(std::min(n_threads, n_eldags), 1);
 
-    auto canon_res
-        = canon_eldag(eldag, symms, [&](auto point) { return colours[point]; });
+    using Canon_res_ptr = std::unique_ptr<Eldag_perm<Simple_perm>>;
+    std::vector<Canon_res_ptr> results(n_eldags);
 
-    // Currently, we just neglect the automorphism group.
-    return build_canon_res(canon_res.first);
+    std::atomic<size_t> next{ 0 };
+    std::atomic<bool> failed{ false };
+
+    auto work = [&]() {
+        size_t idx;
+        while (!failed && (idx = next++) < n_eldags) {
+            try {
+                results[idx] = std::make_unique<Eldag_perm<Simple_perm>>(
+                    canon_eldag_input(inputs[idx]));
+            } catch (...) {
+                failed = true;
+            }
+        }
+    };
+
+    Py_BEGIN_ALLOW_THREADS
+
+    std::vector<std::thread> threads{};
+    try {
+        for (size_t i = 1; i < n_threads; ++i) {
+            threads.emplace_back(work);
+        }
+    } catch (...) {
+        // Just go on with the threads successfully started.
+    }
+    work();
+    for (auto& i : threads) {
+        i.join();
+    }
+
+    Py_END_ALLOW_THREADS
+
+    release_kept();
+
+    if (failed) {
+        PyErr_SetString(PyExc_RuntimeError, "Eldag canonicalization failed.");
+        return NULL;
+    }
+
+    PyObject* res = PyList_New(n_eldags);
+    if (!res) {
+        return NULL;
+    }
+    for (size_t i = 0; i < n_eldags; ++i) {
+        PyObject* curr = build_canon_res(*results[i]);
+        if (!curr) {
+            Py_DECREF(res);
+            return NULL;
+        }
+        PyList_SET_ITEM(res, i, curr);
+    }
+
+    return res;
 }
 
 //
@@ -1252,7 +1559,7 @@ This wrapper of libcanon is directly targeted towards usage using drudge.
 Here, we have a class `Perm`, which wraps over the `Simple_perm` class in
 libcanon, another class `SimsTransv`, which wraps over the `Sims_trasv` class
 for `Simple_perm`.  And we also have the function `canon_eldag` to canonicalize
-an Eldag.
+an Eldag, with `canon_eldags` for canonicalizing many Eldags in one call.
 
 )__doc__";
 
@@ -1262,6 +1569,8 @@ an Eldag.
 static PyMethodDef canonpy_methods[]
     = { { "canon_eldag", (PyCFunction)canon_eldag_func,
             METH_VARARGS | METH_KEYWORDS, canon_eldag_docstring },
+          { "canon_eldags", (PyCFunction)canon_eldags_func,
+              METH_VARARGS | METH_KEYWORDS, canon_eldags_docstring },
           { NULL, NULL, 0, NULL } };
 
 /** Executes the initialization of the canonpy module.
@@ -4,7 +4,11 @@ import collections
 import contextlib
 import functools
 import inspect
+import itertools
+import logging
 import operator
+import os
+import os.path
 import pickle
 import sys
 import types
@@ -21,17 +25,23 @@ from sympy.concrete.summations import eval_sum_symbolic
 
 from .canonpy import Perm, Group
 from .drs import compile_drs, DrsEnv, DrsSymbol
+from .local import LocalContext
+from .opcache import OpCache, add_digests, get_term_digest
+from .profiling import Profile
 from .report import Report, ScalarLatexPrinter
 from .term import (
     Range, sum_term, Term, Vec, subst_factor_term, subst_vec_term, parse_terms,
     einst_term, diff_term, try_resolve_range, rewrite_term, Sum_expander,
-    expand_sums_term, ATerms, simplify_amp_sums_term
+    expand_sums_term, ATerms, simplify_amp_sums_term, canon_terms
 )
 from .utils import (
     ensure_symb, BCastVar, nest_bind, sympy_key, SymbResolver
 )
 
 
+_LOGGER = logging.getLogger(__name__)
+
+
 class Tensor:
     """The main tensor class.
 
@@ -47,9 +57,11 @@ class Tensor:
         '_drudge',
         '_terms',
         '_local_terms',
+        '_n_terms',
         '_free_vars',
         '_expanded',
-        '_repartitioned'
+        '_repartitioned',
+        '_digest'
     ]
 
     #
@@ -74,11 +86,14 @@ class Tensor:
         self._terms = terms
 
         self._local_terms = None  # type: typing.List[Term]
+        self._n_terms = None
 
         self._free_vars = free_vars
         self._expanded = expanded
         self._repartitioned = repartitioned
 
+        self._digest = None
+
     # To be used by the apply method.
     _INIT_ARGS = {
         'free_vars': '_free_vars',
@@ -132,9 +147,10 @@ class Tensor:
         """
         if self._local_terms is not None:
             return len(self._local_terms)
-        else:
+        elif self._n_terms is None:
             self.cache()  # We never get a tensor just to count its terms.
-            return self._terms.count()
+            self._n_terms = self._terms.count()
+        return self._n_terms
 
     def cache(self):
         """Cache the terms in the tensor.
@@ -184,6 +200,97 @@ class Tensor:
             self.cache()
         return self
 
+    #
+    # Execution policy
+    #
+
+    def _get_small_terms(self) -> typing.Optional[typing.List[Term]]:
+        """Get the terms as a local list if the tensor is small.
+
+        None will be returned when the tensor is too large for in-driver
+        evaluation according to the policy in the drudge, when the policy is
+        disabled, or when the size of the tensor is not known yet.
+        """
+
+        drudge = self._drudge
+        threshold = drudge.local_threshold
+        if threshold is None or drudge.local_ctx is drudge.ctx:
+            return None
+
+        terms = self._get_terms_within(threshold)
+        if terms is None:
+            return None
+
+        max_vecs = drudge.local_max_vecs
+        if max_vecs is not None and any(len(i.vecs) > max_vecs for i in terms):
+            return None
+
+        return terms
+
+    def _is_size_known(self):
+        """Test if the number of terms in the tensor is already known."""
+        return self._local_terms is not None or self._n_terms is not None
+
+    def _get_terms_within(self, limit) -> typing.Optional[typing.List[Term]]:
+        """Get the terms as a local list if there are not too many of them.
+
+        None will be returned when the tensor has more terms than the limit.
+        Only the terms already gathered or counted are considered, so that no
+        Spark job is run just to probe the size of the tensor.  For unknown
+        tensors, None is also returned.
+        """
+
+        if self._local_terms is not None:
+            terms = self._local_terms
+        elif self._n_terms is not None and self._n_terms <= limit:
+            terms = self.local_terms
+        else:
+            return None
+
+        return terms if len(terms) <= limit else None
+
+    def _eval(self, comput, **kwargs) -> 'Tensor':
+        """Evaluate the given computation on the terms of the tensor.
+
+        The computation is going to be called with an RDD of the terms of this
+        tensor, and it should return an RDD of the resulted terms, which is
+        going to be made into a new tensor with the given keyword arguments.
+        For small tensors, the computation is carried out serially inside the
+        driver, with the gathered result set as the local terms of the new
+        tensor.  Otherwise, the computation is just applied on the terms of the
+        tensor lazily.
+        """
+
+        drudge = self._drudge
+        terms = self._get_small_terms()
+        if terms is None:
+            return Tensor(drudge, comput(self._terms), **kwargs)
+
+        res_terms = comput(drudge.local_ctx.parallelize(terms, 1)).collect()
+        res = Tensor(drudge, drudge.ctx.parallelize(res_terms), **kwargs)
+        res._local_terms = res_terms
+        return res
+
+    def _get_digest(self) -> int:
+        """Get the digest of the terms in the tensor.
+
+        The digest is independent of the order and the partitioning of the
+        terms.  It is computed only once for each tensor.
+        """
+
+        if self._digest is not None:
+            pass
+        elif self._local_terms is not None:
+            self._digest = functools.reduce(
+                add_digests, map(get_term_digest, self._local_terms), 0
+            )
+        else:
+            self._digest = self._terms.map(get_term_digest).aggregate(
+                0, add_digests, add_digests
+            )
+
+        return self._digest
+
     @property
     def is_scalar(self):
         """If the tensor is a scalar.
@@ -349,6 +456,47 @@ class Tensor:
         Tensor.__init__(self, drudge, drudge.ctx.parallelize(state))
         return
 
+    def save(self, path):
+        """Save the tensor into the given directory.
+
+        Different from pickling, the terms are never gathered into the driver.
+        Each partition of the terms is written into a separate file in the
+        directory by the workers, and only a small manifest with the free
+        variables and the list of files is written by the driver, after all the
+        partitions are written.  So the directory needs to be on a file system
+        shared by the driver and the workers.  The saved tensor can be read by
+        :py:meth:`Drudge.load`.
+
+        Parameters
+        ----------
+
+        path
+            The directory to save the tensor into, which is going to be created
+            when absent.  Any tensor previously saved there is overwritten.
+
+        """
+
+        os.makedirs(path, exist_ok=True)
+
+        # Invalidate any existing tensor before touching its partitions.
+        manifest = os.path.join(path, _TENSOR_MANIFEST)
+        if os.path.exists(manifest):
+            os.remove(manifest)
+
+        free_vars = self.free_vars
+        parts = self._terms.mapPartitionsWithIndex(functools.partial(
+            _save_terms_part, path
+        )).collect()
+
+        _write_atomically(manifest, {
+            'version': _TENSOR_FORMAT,
+            'parts': [i for i, _ in parts],
+            'n_terms': sum(i for _, i in parts),
+            'free_vars': free_vars,
+            'expanded': self._expanded
+        })
+        return
+
     #
     # Small manipulations
     #
@@ -544,11 +692,13 @@ class Tensor:
         terms = terms.map(lambda x: x.simplify_trivial_sums())
 
         if simplifiers:
-            terms = terms.map(functools.partial(
-                simplify_amp_sums_term,
-                simplifiers=simplifiers, excl_bases=excl_bases,
-                resolvers=self._drudge.resolvers
-            ))
+            terms = self._drudge._map_traced(
+                terms, 'simplify_amp_sums', functools.partial(
+                    simplify_amp_sums_term,
+                    simplifiers=simplifiers, excl_bases=excl_bases,
+                    resolvers=self._drudge.resolvers
+                )
+            )
 
         return terms
 
@@ -625,21 +775,25 @@ class Tensor:
         """
 
         # All the traits could be invalidated by merging.
-        return Tensor(
-            self._drudge, self._merge(self._terms, consts, gens)
+        comput = functools.partial(self._merge, consts=consts, gens=gens)
+        return self._drudge.cache_op(
+            'merge', self, (consts, gens), lambda: self._eval(comput)
         )
 
     def _merge(self, terms, consts, gens):
         """Get the term when they are attempted to be merged."""
-        if not self._drudge.simple_merge and consts is None and gens is None:
-            specials = None
-        else:
-            specials = _DecomposeSpecials(consts, gens)
-
+        specials = self._get_merge_specials(consts, gens)
         return terms.map(
             functools.partial(_decompose_term, specials=specials)
         ).reduceByKey(operator.add).map(_recover_term)
 
+    def _get_merge_specials(self, consts, gens):
+        """Get the special symbols for the decomposition in merging."""
+        if not self._drudge.simple_merge and consts is None and gens is None:
+            return None
+        else:
+            return _DecomposeSpecials(consts, gens)
+
     #
     # Canonicalization
     #
@@ -659,19 +813,11 @@ class Tensor:
     def _canon(self, terms, expanded):
         """Compute the canonicalized terms."""
 
-        symms = self._drudge.symms
-
-        vec_colour = self._drudge.vec_colour
-        # Normally a static function, not broadcast variable.
-
         if not expanded:
             expanded_terms = self._expand(terms)
         else:
             expanded_terms = terms
-        canoned = expanded_terms.map(
-            lambda term: term.canon(symms=symms.value, vec_colour=vec_colour)
-        )
-        return canoned
+        return self._drudge._canon_terms(expanded_terms)
 
     def normal_order(self):
         """Normal order the terms in the tensor.
@@ -682,8 +828,9 @@ class Tensor:
         """
 
         # Free variables, expanded, and repartitioned can all be invalidated.
-        return Tensor(
-            self._drudge, self._drudge.normal_order(self.terms)
+        return self._drudge.cache_op(
+            'normal_order', self, (),
+            lambda: self._eval(self._drudge.normal_order)
         )
 
     #
@@ -700,8 +847,9 @@ class Tensor:
 
         """
 
-        result = Tensor(
-            self._drudge, self._simplify(self._terms), expanded=True
+        result = self._drudge.cache_op(
+            'simplify', self, (),
+            lambda: self._eval(self._simplify, expanded=True)
         )
 
         if self._drudge.inside_drs:
@@ -711,47 +859,96 @@ class Tensor:
         return result
 
     def _simplify(self, terms):
-        """Get the terms in the simplified form."""
+        """Get the terms in the simplified form.
+
+        All the per-term steps between the normal ordering and the merging are
+        fused into a single pass over the terms, so are the steps after the
+        merging.  In this way, the terms only need to be serialized at the
+        places where the data has to be gathered or shuffled.  When profiling
+        is turned on for the drudge, the per-term steps are run as separate
+        stages, so that each of them can be profiled.
+        """
 
-        num_partitions = self._drudge.num_partitions
+        drudge = self._drudge
+        num_partitions = drudge.num_partitions
 
         repartitioned = self._repartitioned
         if not self._expanded:
-            terms = self._expand(terms)
+            terms = drudge._run_stage('expand', terms, self._expand)
             repartitioned = False
 
         if not repartitioned and num_partitions is not None:
-            terms = terms.repartition(num_partitions)
+            terms = drudge._run_stage(
+                'repartition', terms,
+                lambda x: x.repartition(num_partitions), shuffle=True
+            )
 
         # First we make the vector part normal-ordered.
-        terms = self._drudge.normal_order(terms)
+        terms = drudge._run_stage('normal_order', terms, drudge.normal_order)
         if num_partitions is not None:
-            terms = terms.repartition(num_partitions)
-
-        # Simplify the amplitude part.
-        terms = self._simplify_amps(terms)
-        terms = self._simplify_sums(terms)
-        terms = self._simplify_amps(terms)
-        terms = self._simplify_deltas(terms, False)
+            terms = drudge._run_stage(
+                'repartition', terms,
+                lambda x: x.repartition(num_partitions), shuffle=True
+            )
 
-        # Canonicalize the terms and see if they can be merged.
-        terms = self._canon(terms, True)
+        # Simplify the amplitude part, and canonicalize the terms to see if
+        # they can be merged.
+        pre_stages = self._get_simplify_stages()
+        terms = drudge._canon_terms(drudge._run_term_stages(terms, pre_stages))
         # In rare cases, normal order could make the result unexpanded.
         #
         # TODO: Find a design to skip repartition in most cases.
 
         free_vars = self._get_free_vars(terms)
-        terms = self._reset_dumms(terms, excl=free_vars)
-        terms = self._merge(terms, None, None)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _log_fused_stages(terms.count(), len(pre_stages) + 1)
+
+        dumms = drudge.dumms
+        specials = self._get_merge_specials(None, None)
+        terms = drudge._run_stage('merge', terms, lambda x: x.map(
+            functools.partial(
+                _reset_decompose_term, dumms=dumms, excl=free_vars,
+                specials=specials
+            )
+        ).reduceByKey(operator.add), shuffle=True)
 
-        # Finally simplify the merged amplitude again.
-        if self._drudge.full_simplify:
-            terms = self._simplify_amps(terms)
+        # Finally simplify the merged amplitude again and make the final
+        # expansion.
+        post_stages = [_stage_recover_term]
+        if drudge.full_simplify:
+            post_stages.append(_stage_simplify_amps)
+        post_stages.append(_stage_expand)
 
-        # Make the final expansion.
-        terms = self._expand(terms)
+        return drudge._run_term_stages(terms, post_stages)
 
-        return terms
+    def _get_simplify_stages(self):
+        """Get the fused per-term stages for simplification before merging.
+
+        The stages are in the same order as the separate simplification
+        facilities, for normal-ordered terms.  The canonicalization coming
+        last is not included, since it is carried out for whole partitions.
+        """
+
+        drudge = self._drudge
+        simplifiers = drudge.sum_simplifiers.bcast
+
+        stages = [
+            _stage_simplify_amps,
+            _stage_simplify_trivial_sums
+        ]
+        if simplifiers:
+            stages.append(functools.partial(
+                _stage_simplify_amp_sums, simplifiers=simplifiers,
+                resolvers=drudge.resolvers
+            ))
+        stages.extend([
+            _stage_simplify_amps,
+            _stage_expand,
+            functools.partial(
+                _stage_simplify_deltas, resolvers=drudge.resolvers
+            )
+        ])
+        return stages
 
     #
     # Comparison operations
@@ -769,7 +966,8 @@ class Tensor:
         tensors and can be very expensive.  So direct comparison of two tensors
         is mostly suitable for testing and debugging on small problems only.
         For large scale problems, it is advised to compare the simplified
-        difference with zero.
+        difference with zero, or compare the fingerprints by
+        :py:meth:`fingerprint_equals`.
         """
 
         n_terms = self.n_terms
@@ -780,6 +978,115 @@ class Tensor:
         else:
             return self._drudge.sum(other)
 
+    def fingerprint(self) -> str:
+        """Get the fingerprint of the terms in the tensor.
+
+        The fingerprint is a hash of the multiset of the terms, computed from
+        a stable encoding of each term on the workers and combined by a single
+        reduction, without gathering any term into the driver.  It does not
+        depend on the order or the partitioning of the terms, or the process
+        computing it.  So it can be saved and compared across runs, for
+        instance, for regression checks of large derived equations.
+
+        Similar to the equality comparison, the fingerprint is syntactic.
+        Normally the tensor should be simplified before the fingerprint is
+        taken.
+
+        Returns
+        -------
+
+        The fingerprint as a string of hexadecimal digits.
+        """
+        return '{:032x}'.format(self._get_digest())
+
+    def fingerprint_equals(self, other) -> bool:
+        """Compare the terms with another tensor or fingerprint.
+
+        Different from the equality operator, the terms are compared as
+        multisets by their fingerprints from :py:meth:`fingerprint`, without
+        gathering any term into the driver.  So it is suitable for large
+        tensors.  Other than tensors, fingerprints from earlier computations
+        can also be given.
+        """
+        if isinstance(other, Tensor):
+            other = other.fingerprint()
+        elif not isinstance(other, str):
+            raise TypeError(
+                'Invalid object to compare fingerprint with', other,
+                'expecting tensor or fingerprint'
+            )
+        return self.fingerprint() == other
+
+    def numeric_probe(
+            self, other, sizes, seed=0, rtol=1e-8, atol=1e-10
+    ) -> bool:
+        """Probe the mathematical equality with another tensor numerically.
+
+        Proving the equality of two large tensors symbolically by simplifying
+        their difference to zero can be as expensive as their derivation.  This
+        method gives a fast probabilistic check.  Each range is given a small
+        concrete size, and each indexed base is given a random array,
+        symmetrized by the symmetries set in the drudge.  Free symbols are
+        given random values, or random indices for symbols that can be resolved
+        to a range with a size.  Then the terms of both tensors are evaluated
+        numerically on the workers, vectorized over the summation dummies by
+        NumPy, which is required for this method and can be installed by the
+        ``probe`` extra of the package.  For tensors with vectors, the
+        coefficients of each basis vector are compared.
+
+        Parameters
+        ----------
+
+        other
+            The tensor to compare with.  Non-tensor input is going to be made
+            into a tensor by :py:meth:`Drudge.sum`.
+
+        sizes
+            The mapping from the ranges to their concrete sizes.  All ranges
+            of summations in the tensors need to be given.  Since the random
+            arrays span all the ranges, the sizes should be kept small.
+
+        seed
+            The seed for the random values.
+
+        rtol
+            The relative tolerance for the comparison, relative to the largest
+            magnitude of the values.
+
+        atol
+            The absolute tolerance for the comparison.
+
+        Returns
+        -------
+
+        If the two tensors are numerically equal.
+
+        """
+
+        from .probe import ProbeEnv
+
+        drudge = self._drudge
+        if not isinstance(other, Tensor):
+            other = drudge.sum(other)
+
+        env = ProbeEnv(
+            sizes, self.free_vars | other.free_vars,
+            drudge.resolvers.value, drudge.symms.value, seed
+        )
+        vals = self._terms.flatMap(env.eval_term).union(
+            other.terms.flatMap(env.eval_term).map(lambda x: (x[0], -x[1]))
+        )
+        vals.cache()
+
+        # The scale is given by the largest contribution from any term.
+        scale = vals.map(lambda x: abs(x[1])).aggregate(0.0, max, max)
+        max_diff = vals.reduceByKey(operator.add).map(
+            lambda x: abs(x[1])
+        ).aggregate(0.0, max, max)
+        vals.unpersist()
+
+        return bool(max_diff <= atol + rtol * scale)
+
     #
     # Mathematical operations
     #
@@ -899,11 +1206,7 @@ class Tensor:
 
         if isinstance(other, Tensor):
 
-            if right:
-                prod = other.terms.cartesian(self._terms)
-            else:
-                prod = self._terms.cartesian(other.terms)
-
+            prod = self._join_terms(other, right)
             free_vars = self.free_vars | other.free_vars
             expanded = self._expanded and other._expanded
 
@@ -932,6 +1235,33 @@ class Tensor:
 
         return prod, free_vars, expanded
 
+    def _join_terms(self, other: 'Tensor', right):
+        """Join the terms with the terms in another tensor.
+
+        When either of the tensors has no more terms than the broadcast join
+        threshold of the drudge, its terms are broadcast and paired with the
+        terms of the other tensor by a flat map, with the other tensor tried
+        first.  When the sizes of neither of the tensors are known, the other
+        tensor, normally the smaller operand like the cluster operator in
+        commutators, is cached and counted.  Only when both tensors are large,
+        the partitioned Cartesian product is used.
+        """
+
+        threshold = self._drudge.bcast_join_threshold
+        self_terms = other_terms = None
+        if threshold is not None:
+            if not (self._is_size_known() or other._is_size_known()):
+                other.n_terms
+            other_terms = other._get_terms_within(threshold)
+            if other_terms is None:
+                self_terms = self._get_terms_within(threshold)
+
+        join = self._drudge._join_rdds
+        if right:
+            return join(other.terms, self._terms, other_terms, self_terms)
+        else:
+            return join(self._terms, other.terms, self_terms, other_terms)
+
     def __truediv__(self, other):
         """Divide tensor by a scalar quantity."""
 
@@ -1057,6 +1387,16 @@ class Tensor:
 
         """
 
+        return self._drudge.cache_op(
+            'subst', self, (lhs, rhs, wilds, excl, simult),
+            lambda: self._subst_tensor(
+                lhs, rhs, wilds, full_balance, excl, simult
+            )
+        )
+
+    def _subst_tensor(self, lhs, rhs, wilds, full_balance, excl, simult):
+        """Substitute the appearance of the defined tensor in the tensor."""
+
         # Special case of the unity LHS.
         if lhs == 1:
             scalar_part = self.filter(lambda x: len(x.vecs) == 0)
@@ -1239,30 +1579,34 @@ class Tensor:
         dumms = self._drudge.dumms
         full_simplify = self._drudge.full_simplify
 
-        # We keep the dummbegs dictionary for each term and substitute all
-        # appearances of the lhs one-by-one.
+        rhs_terms = self._drudge.ctx.broadcast(rhs_terms)
 
-        subs_states = self._terms.map(lambda x: x.reset_dumms(
-            dumms=dumms.value, excl=free_vars.value
-        ))
+        def subst_terms(terms):
+            """Substitute inside the given terms."""
 
-        rhs_terms = self._drudge.ctx.broadcast(rhs_terms)
+            # We keep the dummbegs dictionary for each term and substitute all
+            # appearances of the lhs one-by-one.
 
-        if isinstance(lhs, (Indexed, Symbol)):
-            res = nest_bind(subs_states, lambda x: subst_factor_term(
-                x[0], lhs, rhs_terms.value,
-                dumms=dumms.value, dummbegs=x[1], excl=free_vars.value,
-                full_simplify=full_simplify
-            ), full_balance=full_balance)
-        else:
-            res = nest_bind(subs_states, lambda x: subst_vec_term(
-                x[0], lhs, rhs_terms.value,
-                dumms=dumms.value, dummbegs=x[1], excl=free_vars.value
-            ), full_balance=full_balance)
+            subs_states = terms.map(lambda x: x.reset_dumms(
+                dumms=dumms.value, excl=free_vars.value
+            ))
 
-        res_terms = res.map(operator.itemgetter(0))
-        return Tensor(
-            self._drudge, res_terms, free_vars=free_vars_local, expanded=True
+            if isinstance(lhs, (Indexed, Symbol)):
+                res = nest_bind(subs_states, lambda x: subst_factor_term(
+                    x[0], lhs, rhs_terms.value,
+                    dumms=dumms.value, dummbegs=x[1], excl=free_vars.value,
+                    full_simplify=full_simplify
+                ), full_balance=full_balance)
+            else:
+                res = nest_bind(subs_states, lambda x: subst_vec_term(
+                    x[0], lhs, rhs_terms.value,
+                    dumms=dumms.value, dummbegs=x[1], excl=free_vars.value
+                ), full_balance=full_balance)
+
+            return res.map(operator.itemgetter(0))
+
+        return self._eval(
+            subst_terms, free_vars=free_vars_local, expanded=True
         )
 
     def subst_all(
@@ -1950,7 +2294,9 @@ class Drudge:
         ----------
 
         ctx
-            The Spark context to be used.
+            The Spark context to be used.  A :py:class:`LocalContext` can also
+            be given for parallel computation on the local machine without
+            Spark.
 
         num_partitions
             The preferred number of partitions.  By default, it is the default
@@ -1972,6 +2318,14 @@ class Drudge:
         self._full_simplify = True
         self._simple_merge = False
 
+        self._local_threshold = None
+        self._local_max_vecs = 8
+        self._local_ctx = None
+        self._bcast_join_threshold = 512
+        self._canon_threads = 1
+        self._op_cache = None
+        self._profile = None
+
         self._default_einst = False
 
         self._dumms = BCastVar(self._ctx, {})
@@ -2022,6 +2376,119 @@ class Drudge:
                 'expecting integer or None'
             )
 
+    @property
+    def local_threshold(self):
+        """The maximum number of terms for in-driver evaluation.
+
+        For tensors with no more than this number of terms, simplification,
+        normal ordering, substitution, and merging are carried out serially
+        inside the driver, without the scheduling overhead of Spark jobs.  The
+        result is still distributed as usual.  Only tensors with their size
+        already known are considered, like the tensors created from terms in
+        the driver, the results of in-driver evaluation, or the tensors whose
+        number of terms has been queried.  None, the default, disables the
+        in-driver evaluation.
+        """
+        return self._local_threshold
+
+    @local_threshold.setter
+    def local_threshold(self, value):
+        """Set the maximum number of terms for in-driver evaluation.
+        """
+        if isinstance(value, int) or value is None:
+            self._local_threshold = value
+        else:
+            raise TypeError(
+                'Invalid threshold for in-driver evaluation', value,
+                'expecting integer or None'
+            )
+
+    @property
+    def local_max_vecs(self):
+        """The maximum number of vectors in terms for in-driver evaluation.
+
+        Since the cost of normal ordering grows rapidly with the number of
+        vectors, tensors having any term with more vectors than this are always
+        evaluated by Spark.  None removes this limit.
+        """
+        return self._local_max_vecs
+
+    @local_max_vecs.setter
+    def local_max_vecs(self, value):
+        """Set the maximum number of vectors for in-driver evaluation.
+        """
+        if isinstance(value, int) or value is None:
+            self._local_max_vecs = value
+        else:
+            raise TypeError(
+                'Invalid vector limit for in-driver evaluation', value,
+                'expecting integer or None'
+            )
+
+    @property
+    def bcast_join_threshold(self):
+        """The maximum number of terms for a tensor to be broadcast in joins.
+
+        For products and commutators of two tensors, when either of them has no
+        more than this number of terms, its terms are broadcast to pair with
+        the terms of the other tensor, rather than computing the partitioned
+        Cartesian product of the terms.  Similar to :py:attr:`local_threshold`,
+        the tensors with their size already known are considered, except that
+        one of the operands, normally the second one, is counted when the
+        sizes of neither of them are known.  None always uses the Cartesian
+        product.
+        """
+        return self._bcast_join_threshold
+
+    @bcast_join_threshold.setter
+    def bcast_join_threshold(self, value):
+        """Set the maximum number of terms for broadcasting in joins.
+        """
+        if isinstance(value, int) or value is None:
+            self._bcast_join_threshold = value
+        else:
+            raise TypeError(
+                'Invalid threshold for broadcast join', value,
+                'expecting integer or None'
+            )
+
+    @property
+    def canon_threads(self):
+        """The number of threads for the canonicalization in each partition.
+
+        The terms in each partition are canonicalized in chunks by native calls
+        with the global interpreter lock released, where the terms in a chunk
+        can be canonicalized by multiple threads.  It is only useful when the
+        workers have spare cores.
+        """
+        return self._canon_threads
+
+    @canon_threads.setter
+    def canon_threads(self, value):
+        """Set the number of threads for the canonicalization."""
+        if isinstance(value, int) and value > 0:
+            self._canon_threads = value
+        else:
+            raise ValueError(
+                'Invalid number of threads for canonicalization', value,
+                'expecting positive integer'
+            )
+
+    @property
+    def local_ctx(self):
+        """The local context for in-driver evaluation.
+
+        When the drudge is already on a serial local context, it is returned
+        directly.
+        """
+        if self._local_ctx is None:
+            ctx = self._ctx
+            if isinstance(ctx, LocalContext) and ctx.n_workers == 0:
+                self._local_ctx = ctx
+            else:
+                self._local_ctx = LocalContext(0)
+        return self._local_ctx
+
     @property
     def full_simplify(self):
         """If full simplification is to be performed on amplitudes.
@@ -2688,9 +3155,13 @@ class Drudge:
         """Create a tensor with the terms given in the argument.
 
         The terms should be given as an iterable of Term objects.  This function
-        should not be necessary in user code.
+        should not be necessary in user code.  Since the terms are already in
+        the driver, they are also kept as the local terms of the tensor.
         """
-        return Tensor(self, self._ctx.parallelize(terms))
+        terms = list(terms)
+        res = Tensor(self, self._ctx.parallelize(terms))
+        res._local_terms = terms
+        return res
 
     #
     # Tensor definition creation.
@@ -3110,7 +3581,66 @@ class Drudge:
         yield None
         current_drudge = prev_drudge
 
-    def memoize(self, comput, filename, log=None, log_header='Memoize:'):
+    def load(self, path):
+        """Load a tensor saved by :py:meth:`Tensor.save`.
+
+        The partitions of the terms are read lazily by the workers, only the
+        manifest is read by the driver.  In the same way as unpickling, the
+        tensor is loaded with the current drudge as its drudge.
+
+        Parameters
+        ----------
+
+        path
+            The directory that the tensor is saved in.
+
+        Raises
+        ------
+
+        OSError
+            When the tensor or any of its partitions cannot be found.
+
+        ValueError
+            When the directory does not contain a valid saved tensor.
+
+        """
+
+        with open(os.path.join(path, _TENSOR_MANIFEST), 'rb') as fp:
+            try:
+                manifest = pickle.load(fp)
+            except (pickle.PickleError, EOFError) as exc:
+                raise ValueError(
+                    'Invalid saved tensor', path, exc
+                )
+
+        if not isinstance(manifest, dict) or manifest.get(
+                'version'
+        ) != _TENSOR_FORMAT:
+            raise ValueError(
+                'Invalid saved tensor', path,
+                'expecting format version {}'.format(_TENSOR_FORMAT)
+            )
+
+        parts = [os.path.join(path, i) for i in manifest['parts']]
+        for i in parts:
+            if not os.path.isfile(i):
+                raise FileNotFoundError(
+                    'Missing partition of saved tensor', i
+                )
+            continue
+
+        terms = self._ctx.parallelize(parts, max(len(parts), 1)).flatMap(
+            _load_terms_part
+        )
+        return Tensor(
+            self, terms, free_vars=manifest['free_vars'],
+            expanded=manifest['expanded']
+        )
+
+    def memoize(
+            self, comput, filename, log=None, log_header='Memoize:',
+            parallel=False
+    ):
         """Preserve/lookup result of computation into/from pickle file.
 
         When the file with the given name exists, it will be opened and
@@ -3142,6 +3672,13 @@ class Drudge:
 
             The header to be prepended to lines of the log texts.
 
+        parallel
+
+            If the result is a tensor to be saved by :py:meth:`Tensor.save` into
+            a directory with the given name, and loaded by :py:meth:`load`,
+            rather than pickled.  This way, the terms are written and read in
+            parallel by the workers, without being gathered into the driver.
+
         Returns
         -------
 
@@ -3177,23 +3714,265 @@ class Drudge:
 
         try:
 
-            with self.pickle_env(), open(filename, 'rb') as fp:
-                res = pickle.load(fp)
+            if parallel:
+                res = self.load(filename)
+            else:
+                with self.pickle_env(), open(filename, 'rb') as fp:
+                    res = pickle.load(fp)
 
             print(log_header, 'read data from {}'.format(filename), **log_args)
 
-        except (OSError, pickle.PickleError) as exc:
+        except (OSError, ValueError, pickle.PickleError) as exc:
 
             print(log_header, 'computing, failed to read from {}: {!s}'.format(
                 filename, exc
             ), **log_args)
 
             res = comput()
-            with open(filename, 'wb') as fp:
-                pickle.dump(res, fp)
+            if parallel:
+                if not isinstance(res, Tensor):
+                    raise TypeError(
+                        'Invalid result for parallel memoization', res,
+                        'expecting a tensor'
+                    )
+                res.save(filename)
+            else:
+                with open(filename, 'wb') as fp:
+                    pickle.dump(res, fp)
+
+        return res
+
+    #
+    # Operation cache
+    #
+
+    @property
+    def op_cache(self) -> typing.Optional[OpCache]:
+        """The cache for results of tensor operations, None when disabled.
+        """
+        return self._op_cache
+
+    def set_op_cache(self, path, max_size=1 << 30):
+        """Set the cache for results of tensor operations.
+
+        Different from :py:meth:`memoize`, no file name needs to be picked for
+        the results.  When enabled, the results of simplification, normal
+        ordering, merging, substitution, and evaluation of vacuum expectation
+        values are stored in the given directory, keyed by the digest of the
+        terms of the input tensor, the arguments of the operation, and the
+        configuration of the drudge, like the dummies, symmetries, resolvers,
+        and simplification options.  So a result is only reused when all the
+        inputs are the same, and re-running a modified script only computes the
+        operations whose inputs changed.
+
+        Note that the digest of the input tensor takes a pass over its terms.
+        Functions, like resolvers and contractors, are keyed by their code,
+        default arguments, and closure contents.  When any argument or part of
+        the configuration has no stable form, like objects of unknown types,
+        the result is neither stored nor read.  Note that global variables
+        referenced by the functions are not part of the key.
+
+        Parameters
+        ----------
+
+        path
+            The directory to hold the results, None to disable the cache.
+
+        max_size
+            The maximum total size of the stored results in bytes.  The least
+            recently used results are evicted beyond this size.
+
+        """
+
+        if path is None:
+            self._op_cache = None
+        else:
+            self._op_cache = OpCache(path, max_size)
+        return
+
+    @contextlib.contextmanager
+    def profiling(self, n_slowest_terms=0):
+        """Profile the stages of the tensor operations.
+
+        This function should be used within a ``with`` statement.  Inside the
+        context, each stage of the simplification and the normal ordering of
+        tensors is carried out eagerly, and recorded into the yielded
+        :py:class:`Profile`, with the timing, the number of terms, and the
+        estimated data shuffled.  Since the stages are no longer fused, and
+        their results are all cached, profiling should only be turned on for
+        diagnostics.
+
+        Parameters
+        ----------
+
+        n_slowest_terms
+            The number of slowest terms to be kept for the per-term work, like
+            the canonicalization, the preparation of the Wick expansion, and
+            the simplification of amplitudes and summations.  When it is
+            positive, the CPU time of each term in the work is traced, and the
+            slowest terms are gathered into the
+            :py:attr:`Profile.slowest_terms` attribute of the profile.
+
+        Examples
+        --------
+
+        .. doctest::
+            :options: +SKIP
+
+            >>> with dr.profiling(n_slowest_terms=5) as prof:
+            ...     res = tensor.simplify()
+            >>> print(prof)
+            >>> prof.slowest_terms
+
+        """
+
+        prev = self._profile
+        profile = Profile(self._ctx, n_slowest_terms)
+        self._profile = profile
+        try:
+            yield profile
+        finally:
+            self._profile = prev
+
+    def _join_rdds(self, first, second, first_local=None, second_local=None):
+        """Join two RDDs into the pairs of their items.
+
+        The items of either of the RDDs can be given as a local list, normally
+        for the small ones within the broadcast join threshold.  Then they are
+        broadcast and paired with the items of the other RDD by a flat map,
+        with the second one tried first.  Otherwise, the partitioned Cartesian
+        product is used.
+        """
+
+        if second_local is not None:
+            small, big, bcast_first = second_local, first, False
+        elif first_local is not None:
+            small, big, bcast_first = first_local, second, True
+        else:
+            _LOGGER.debug('Joining terms by Cartesian product')
+            return first.cartesian(second)
+
+        _LOGGER.debug('Joining terms by broadcasting %d of them', len(small))
+        bcast = self._ctx.broadcast(small)
+        return big.flatMap(functools.partial(
+            _pair_bcast_terms, bcast, bcast_first
+        ))
+
+    def _run_stage(self, name, terms, comput, shuffle=False):
+        """Run a stage of computation on the terms.
+
+        When profiling is turned on, the stage is profiled under the given
+        name.  Or the computation is simply applied to the terms.
+        """
+        if self._profile is None:
+            return comput(terms)
+        return self._profile.run_stage(name, terms, comput, shuffle=shuffle)
+
+    def _map_traced(self, terms, label, func, get_term=None, flat=False):
+        """Map a per-term function over the terms, with slowest terms traced.
+
+        The function is simply mapped unless profiling is turned on, where the
+        slowest terms are traced partition by partition for the current
+        profile.  The arguments are the same as in
+        :py:meth:`Profile.trace_terms`.
+        """
+        if self._profile is None:
+            return terms.flatMap(func) if flat else terms.map(func)
+        return terms.mapPartitions(self._profile.trace_terms(
+            label, func, get_term=get_term, flat=flat
+        ))
+
+    def _run_term_stages(self, terms, stages):
+        """Run the given per-term stages on the terms.
+
+        The stages are fused into a single pass over the terms, unless
+        profiling is turned on, where they are run and profiled separately.
+        """
+        if self._profile is None:
+            return terms.flatMap(functools.partial(_run_stages, stages))
+        for stage in stages:
+            name = _get_stage_name(stage)
+            terms = self._run_stage(
+                name, terms, functools.partial(
+                    self._map_traced, label=name, func=stage, flat=True
+                )
+            )
+            continue
+        return terms
+
+    def _canon_terms(self, terms):
+        """Canonicalize the terms.
 
+        The terms in each partition are canonicalized in chunks, each by a
+        single native call with the global interpreter lock released, using
+        :py:attr:`canon_threads` threads.  When profiling is turned on, the
+        terms are canonicalized one by one in a separate stage, so that the
+        slowest terms can be traced.
+        """
+
+        symms = self.symms
+        vec_colour = self.vec_colour
+        # Normally a static function, not broadcast variable.
+
+        if self._profile is None:
+            return terms.mapPartitions(functools.partial(
+                _canon_partition, symms=symms, vec_colour=vec_colour,
+                n_threads=self._canon_threads
+            ))
+        return self._run_stage('canon', terms, functools.partial(
+            self._map_traced, label='canon', func=functools.partial(
+                _stage_canon, symms=symms, vec_colour=vec_colour
+            ), flat=True
+        ))
+
+    def cache_op(self, op, tensor: Tensor, args, comput) -> Tensor:
+        """Get the result of an operation on a tensor by the operation cache.
+
+        When the result for the operation with the given name and arguments on
+        the tensor is found in the cache set by :py:meth:`set_op_cache`, it is
+        read, cached, and returned.  Entries that cannot be read are treated
+        as absent.  Otherwise, the given computation is called without
+        arguments to give the result tensor, which is stored in the cache.
+        Tensors among the arguments are keyed by their terms.  When the cache
+        is disabled, or any argument or configuration has no stable form, like
+        objects of unknown types or functions closing over such objects, the
+        computation is just called.
+        """
+
+        cache = self._op_cache
+        if cache is None:
+            return comput()
+
+        tensors = [tensor] + [i for i in args if isinstance(i, Tensor)]
+        args = tuple(
+            ('tensor',) if isinstance(i, Tensor) else i for i in args
+        )
+        key = cache.get_key(op, args, self._get_op_cache_config())
+        if key is None:
+            _LOGGER.debug('Result of %s not cached, unstable inputs', op)
+            return comput()
+        key = cache.get_key(key, [i._get_digest() for i in tensors])
+
+        res = cache.load(self, key)
+        if res is not None:
+            _LOGGER.debug('Result of %s read from the cache', op)
+            return res
+
+        res = comput()
+        res.cache()
+        cache.store(key, res)
         return res
 
+    def _get_op_cache_config(self) -> list:
+        """Get the configuration of the drudge affecting operation results.
+
+        Subclasses with additional configuration can extend the list.
+        """
+        return [
+            type(self), self._dumms, self._symms, self._resolvers,
+            self.sum_simplifiers, self._full_simplify, self._simple_merge
+        ]
+
     #
     # Drudge scripts support
     #
@@ -3567,6 +4346,123 @@ def _recover_term(state):
     return Term(sums, coeff * key[2], key[1])
 
 
+def _reset_decompose_term(term, dumms, excl, specials):
+    """Reset the dummies of a term and decompose it for merging."""
+    return _decompose_term(
+        term.reset_dumms(dumms=dumms.value, excl=excl)[0], specials
+    )
+
+
+#
+# Fused per-term stages for simplification.
+#
+# Each stage takes a term and gives an iterable of the resulted terms.  They are
+# chained by _run_stages to be used in a single flat map over the terms.
+#
+
+
+def _run_stages(stages, term):
+    """Run the given per-term stages on a term."""
+    terms = [term]
+    for stage in stages:
+        terms = [j for i in terms for j in stage(i)]
+        if len(terms) == 0:
+            break
+        continue
+    return terms
+
+
+def _stage_simplify_amps(term):
+    """Simplify the amplitude of a term by SymPy, dropping zero terms."""
+    term = term.map(lambda x: x.simplify(), skip_vecs=True)
+    return [term] if _is_nonzero(term) else []
+
+
+def _stage_simplify_trivial_sums(term):
+    """Simplify the trivial summations in a term."""
+    return [term.simplify_trivial_sums()]
+
+
+def _stage_simplify_amp_sums(term, simplifiers, resolvers):
+    """Simplify the summations inside the amplitude of a term."""
+    return [simplify_amp_sums_term(
+        term, simplifiers=simplifiers, excl_bases=True, resolvers=resolvers
+    )]
+
+
+def _stage_expand(term):
+    """Expand a term."""
+    return term.expand()
+
+
+def _stage_simplify_deltas(term, resolvers):
+    """Simplify the deltas in a term, dropping zero terms."""
+    term = term.simplify_deltas(resolvers.value)
+    return [term] if _is_nonzero(term) else []
+
+
+def _stage_canon(term, symms, vec_colour):
+    """Canonicalize a term."""
+    return [term.canon(symms=symms.value, vec_colour=vec_colour)]
+
+
+# Number of terms canonicalized together by a single native call.
+_CANON_CHUNK_SIZE = 256
+
+
+def _canon_partition(terms, symms, vec_colour, n_threads):
+    """Canonicalize the terms in a partition by batched native calls.
+
+    The terms are canonicalized in chunks of fixed size, so that only the
+    Eldags for a chunk are held in memory at a time.
+    """
+    terms = iter(terms)
+    while True:
+        chunk = list(itertools.islice(terms, _CANON_CHUNK_SIZE))
+        if len(chunk) == 0:
+            break
+        yield from canon_terms(
+            chunk, symms=symms.value, vec_colour=vec_colour,
+            n_threads=n_threads
+        )
+        continue
+
+
+def _stage_recover_term(state):
+    """Recover a term from a merging state."""
+    return [_recover_term(state)]
+
+
+def _get_stage_name(stage):
+    """Get the name of a per-term stage for profiling."""
+    if isinstance(stage, functools.partial):
+        stage = stage.func
+    name = stage.__name__
+    prefix = '_stage_'
+    return name[len(prefix):] if name.startswith(prefix) else name
+
+
+def _log_fused_stages(n_terms, n_stages):
+    """Log the serialization saved by the fused simplification stages.
+
+    When each stage is a separate step, every term resulted from the fused
+    stages would have been serialized once more for each additional stage.
+    """
+    _LOGGER.debug(
+        'Simplification fused %d per-term stages over %d terms, '
+        'saving up to %d term serializations',
+        n_stages, n_terms, n_terms * (n_stages - 1)
+    )
+
+
+def _pair_bcast_terms(bcast, bcast_first, term):
+    """Pair a term with each of the broadcast terms."""
+    return [
+        (i, term) if bcast_first else (term, i)
+        for i in bcast.value
+    ]
+
+
 def _is_nonzero(term):
     """Test if a term is trivially non-zero."""
     return term.amp != 0
@@ -3599,3 +4495,34 @@ def _simplify_symbolic_sum(expr, **_):
     return eval_sum_symbolic(
         expr.args[0].simplify(), expr.args[1]
     )
+
+
+#
+# Saving and loading of tensors.
+#
+
+_TENSOR_FORMAT = 1
+_TENSOR_MANIFEST = 'manifest.pickle'
+
+
+def _save_terms_part(path, idx, terms):
+    """Save a partition of terms, giving the file name and number of terms."""
+    terms = list(terms)
+    name = 'part-{:05d}.pickle'.format(idx)
+    _write_atomically(os.path.join(path, name), terms)
+    return [(name, len(terms))]
+
+
+def _load_terms_part(filename):
+    """Load a partition of terms saved in the given file."""
+    with open(filename, 'rb') as fp:
+        return pickle.load(fp)
+
+
+def _write_atomically(filename, obj):
+    """Pickle the object into the file, which is replaced atomically."""
+    tmp = '{}.tmp{}'.format(filename, os.getpid())
+    with open(tmp, 'wb') as fp:
+        pickle.dump(obj, fp)
+    os.replace(tmp, filename)
+    return
@@ -63,9 +63,15 @@ class FockDrudge(WickDrudge):
 
     To customize the details of the commutation rules, properties
     :py:attr:`op_parser` and :py:attr:`ancr_contractor` can be overridden.
+    Since the contractions depend only on the operators and the ranges of
+    their indices, the Wick expansion is cached by the shape of operator
+    strings, which needs to be turned off by :py:attr:`wick_cacheable` for
+    subclasses whose contractor or comparator inspects the rest of the term.
 
     """
 
+    wick_cacheable = True
+
     def __init__(self, *args, exch=FERMI, **kwargs):
         """Initialize the drudge.
 
@@ -87,6 +93,7 @@ class FockDrudge(WickDrudge):
 
         self.set_tensor_method('eval_vev', self.eval_vev)
         self.set_tensor_method('eval_phys_vev', self.eval_phys_vev)
+        self.set_tensor_method('eval_vev_of_product', self.eval_vev_of_product)
         self.set_tensor_method('dagger', self.dagger)
 
     @property
@@ -110,6 +117,10 @@ class FockDrudge(WickDrudge):
         """Get the phase for the commutation rules."""
         return self._exch
 
+    def _get_op_cache_config(self):
+        """Get the configuration affecting results, with the exchange."""
+        return super()._get_op_cache_config() + [self._exch]
+
     @property
     def comparator(self):
         """Get the comparator for the normal ordering operation."""
@@ -118,6 +129,24 @@ class FockDrudge(WickDrudge):
 
         return functools.partial(_compare_field_ops, op_parser=op_parser)
 
+    @property
+    def contr_mask(self):
+        """Get the evaluator of the masks of possible contractions.
+
+        Pairs of operators with the same character, or with the creation
+        operator in front, are always masked out.  When annihilation and
+        creation operators are contracted by the default delta, pairs with
+        indices of different resolved ranges are also masked out, since their
+        deltas are zero for disjoint ranges.
+        """
+
+        op_parser = self.op_parser
+        by_delta = self.ancr_contractor is _contr_ancr_by_delta
+
+        return functools.partial(
+            _get_field_ops_contr_mask, op_parser=op_parser, by_delta=by_delta
+        )
+
     @property
     def vec_colour(self):
         """Get the vector colour evaluator."""
@@ -163,37 +192,96 @@ class FockDrudge(WickDrudge):
 
         return _contr_ancr_by_delta
 
-    def eval_vev(self, tensor: Tensor, contractor):
+    def eval_vev(self, tensor: Tensor, contractor, connected=None):
         """Evaluate vacuum expectation value.
 
         The contractor needs to be given as a callable accepting two operators.
         And this function is also set as a tensor method by the same name.
+
+        When some indexed bases are given as ``connected``, only the
+        contractions connecting all factors with these bases in each term are
+        included, like the linked diagrams between the Hamiltonian and the
+        cluster operators.  The disconnected contraction schemes are pruned
+        during their enumeration, rather than cancelled in the simplification
+        afterward.
         """
 
-        return Tensor(self, self.normal_order(
-            tensor.terms, comparator=None, contractor=contractor
-        ))
+        connected = None if connected is None else tuple(connected)
+        return self.cache_op(
+            'eval_vev', tensor, (contractor, connected), lambda: Tensor(
+                self, self.normal_order(
+                    tensor.terms, comparator=None, contractor=contractor,
+                    connected=connected
+                )
+            )
+        )
 
-    def eval_phys_vev(self, tensor: Tensor):
+    def eval_phys_vev(self, tensor: Tensor, connected=None):
         """Evaluate expectation value with respect to the physical vacuum.
 
         Here the contractor from normal-ordering will be used.  And this
+        function is also set as a tensor method by the same name.  The
+        connected bases are the same as in :py:meth:`eval_vev`.
+        """
+
+        connected = None if connected is None else tuple(connected)
+        return self.cache_op(
+            'eval_phys_vev', tensor, (connected,), lambda: Tensor(
+                self, self.normal_order(
+                    tensor.terms, comparator=None, connected=connected
+                )
+            )
+        )
+
+    def eval_vev_of_product(self, *operands: Tensor, contractor=None,
+                            connected=None):
+        """Evaluate expectation value of product of normal-ordered tensors.
+
+        Each of the operands, like simplified tensors, needs to be already
+        normal-ordered with respect to the vacuum, so that the contractions
+        inside them vanish.  Then for the product of the operands in the given
+        order, only the contractions between operators from different operands
+        are enumerated.  For instance, ``dr.eval_vev_of_product(proj, h_bar)``
+        gives the same result as ``(proj * h_bar).eval_vev(...)`` with much
+        fewer contraction schemes for the simplified ``h_bar``.  And this
         function is also set as a tensor method by the same name.
+
+        The contractor, when given, is the same as in :py:meth:`eval_vev`,
+        with the contractor from normal-ordering used by default.  The
+        connected bases are also the same as in :py:meth:`eval_vev`.
         """
 
-        return Tensor(
-            self, self.normal_order(tensor.terms, comparator=None)
+        if len(operands) == 0:
+            raise ValueError(
+                'Invalid operands', operands, 'expecting at least one tensor'
+            )
+        operands = [
+            i if isinstance(i, Tensor) else self.sum(i) for i in operands
+        ]
+
+        connected = None if connected is None else tuple(connected)
+        return self.cache_op(
+            'eval_vev_of_product', operands[0],
+            tuple(operands[1:]) + (contractor, connected), lambda: Tensor(
+                self, self._contr_all_of_prod(
+                    operands, contractor=contractor, connected=connected
+                )
+            )
         )
 
     def normal_order(self, terms: RDD, **kwargs):
         """Normal order the field operators.
 
         Here the normal-ordering operation of general Wick drudge will be
-        invoked twice to ensure full simplification.
+        invoked again to ensure full simplification, but only for the terms not
+        proven to be normal-ordered by the first pass.
         """
 
+        if self._exch == FERMI:
+            # Nilpotent terms are dropped before the costly Wick expansion.
+            terms = terms.filter(_is_not_zero_by_nilp)
         step1 = super().normal_order(terms, **kwargs)
-        res = super().normal_order(step1, **kwargs)
+        res = self._normal_order_again(step1, **kwargs)
         if self._exch == FERMI:
             res = res.filter(_is_not_zero_by_nilp)
         return res
@@ -390,6 +478,46 @@ def _contr_field_ops(op1: Vec, op2: Vec, term: Term,
     return ancr_contractor(label1, indices1, label2, indices2)
 
 
+def _get_field_ops_contr_mask(term: Term, resolvers,
+                              op_parser: FockDrudge.OP_PARSER, by_delta):
+    """Get the mask of possible contractions of the field operators in a term.
+
+    The operators are parsed only once here for all pairs of them.
+    """
+
+    sums_dict = term.dumms
+    ops = []
+    for vec in term.vecs:
+        label, char, indices = op_parser(vec, term)
+        ranges = tuple(
+            try_resolve_range(i, sums_dict, resolvers)
+            if isinstance(i, Symbol) else None
+            for i in indices
+        ) if by_delta else None
+        ops.append((label, char, ranges))
+        continue
+
+    return [[_can_contr_field_ops(i, j) for j in ops] for i in ops]
+
+
+def _can_contr_field_ops(op1, op2):
+    """Test if the contraction of two parsed operators can be non-zero."""
+
+    label1, char1, ranges1 = op1
+    label2, char2, ranges2 = op2
+
+    if char1 == char2 or char1 == CR:
+        return False
+
+    # Invalid pairs are left for the contractor to report.
+    if ranges1 is None or label1 != label2 or len(ranges1) != len(ranges2):
+        return True
+
+    return all(
+        i is None or j is None or i == j for i, j in zip(ranges1, ranges2)
+    )
+
+
 def _contr_ancr_by_delta(label1, indices1, label2, indices2):
     """Contract an annihilation and a creation operator by delta."""
 
@@ -457,6 +585,43 @@ def _get_dagger(term: Term, real: bool):
     )
 
 
+def _count_cran(term: Term, op_parser: FockDrudge.OP_PARSER):
+    """Count the creation and annihilation operators in a term."""
+
+    n_cr = 0
+    n_an = 0
+    for vec in term.vecs:
+        _, char, _ = op_parser(vec, term)
+        if char == CR:
+            n_cr += 1
+        else:
+            n_an += 1
+        continue
+
+    return n_cr, n_an
+
+
+def _can_reach_ranks(counts, max_n_cr, max_n_contred):
+    """Test if commutators with excitations can take a term to projections.
+
+    The numbers of creation and annihilation operators in the term are given,
+    along with the maximum number of creation operators in the projections,
+    and the maximum number of annihilation operators that can still be
+    contracted by the commutators.  Terms without annihilation operators
+    commute with excitation operators.
+    """
+    n_cr, n_an = counts
+    return n_cr <= max_n_cr and 0 < n_an <= max_n_contred
+
+
+def _unpersist_tensors(tensors):
+    """Release the cached terms of the given intermediate tensors."""
+    for i in tensors:
+        i.terms.unpersist()
+        continue
+    return
+
+
 def _is_not_zero_by_nilp(term: Term):
     """Test if a term is not zero by nilpotency of the operators.
     """
@@ -877,14 +1042,96 @@ class PartHoleDrudge(GenMBDrudge):
 
         return parse_parthole_ops
 
-    def eval_fermi_vev(self, tensor: Tensor):
+    def eval_fermi_vev(self, tensor: Tensor, connected=None):
         """Evaluate expectation value with respect to Fermi vacuum.
 
         This is just an alias to the actual :py:meth:`FockDrudge.eval_phys_vev`
         method to avoid confusion about the terminology in particle-hole
-        problems.  And it is set as a tensor method by the same name.
+        problems.  And it is set as a tensor method by the same name.  For
+        instance, for the coupled-cluster equations, giving the bases of the
+        Hamiltonian and the cluster amplitudes as the connected bases keeps
+        only the linked contributions.
         """
-        return self.eval_phys_vev(tensor)
+        return self.eval_phys_vev(tensor, connected=connected)
+
+    def eval_bch(self, ham: Tensor, cluster: Tensor, ranks, order=4):
+        """Get the similarity-transformed Hamiltonian for given projections.
+
+        The Baker-Campbell-Hausdorff series of the similarity transform of the
+        Hamiltonian by the cluster excitation operator is computed up to the
+        given order of nested commutators.  But only the terms contributing to
+        the projections onto the determinants of the given excitation ranks are
+        kept, with zero for the energy.  So the result can be used for the
+        energy and amplitude equations by :py:meth:`eval_fermi_vev` in the
+        same way as the full transformed Hamiltonian.
+
+        Both the Hamiltonian and the cluster operator need to be normal-ordered
+        with respect to the Fermi vacuum, with the cluster operator being a
+        pure excitation operator.  Since the commutators with the cluster
+        operator never remove creation operators, and each of them can remove
+        at most as many annihilation operators as in the largest cluster term,
+        the terms that can no longer reach the projections are discarded before
+        each commutator, rather than carried through all the orders.
+
+        """
+
+        ranks = sorted(set(ranks))
+        if len(ranks) == 0 or any(
+                not isinstance(i, int) or i < 0 for i in ranks
+        ):
+            raise ValueError(
+                'Invalid excitation ranks', ranks,
+                'expecting non-negative integers'
+            )
+        if not isinstance(order, int) or order < 0:
+            raise ValueError(
+                'Invalid order of commutators', order,
+                'expecting non-negative integer'
+            )
+
+        op_parser = self.op_parser
+        counts = cluster.terms.map(
+            lambda x: _count_cran(x, op_parser)
+        ).collect()
+        for n_cr, n_an in counts:
+            if n_an != 0:
+                raise ValueError(
+                    'Invalid cluster operator', cluster,
+                    'expecting pure excitation operator'
+                )
+            continue
+        max_n_cr = max((i for i, _ in counts), default=0)
+
+        targets = frozenset(2 * i for i in ranks)
+        max_target = max(targets)
+
+        def is_projected(term):
+            """Test if a term contributes to the projections."""
+            n_cr, n_an = _count_cran(term, op_parser)
+            return n_an == 0 and n_cr in targets
+
+        # The commutators and the partial sums of each order are materialized,
+        # so that the ones from the previous order can be released.
+        curr = ham
+        h_bar = ham.filter(is_projected)
+        cached = []
+        for i in range(order):
+            n_comms = order - i
+            curr = curr.filter(lambda x: _can_reach_ranks(
+                _count_cran(x, op_parser), max_target, n_comms * max_n_cr
+            ))
+            curr = (curr | cluster).simplify() * Rational(1, i + 1)
+            curr.cache()
+            h_bar = (h_bar + curr.filter(is_projected)).cache()
+            h_bar.terms.count()
+            _unpersist_tensors(cached)
+            cached = [curr, h_bar]
+            continue
+
+        res = h_bar.simplify().cache()
+        res.terms.count()
+        _unpersist_tensors(cached)
+        return res
 
     def parse_tce(self, tce_out: str,
                   cc_bases: typing.Mapping[int, IndexedBase]):
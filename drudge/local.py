@@ -0,0 +1,724 @@
+"""Local execution backend emulating the Spark API on a process pool.
+
+Everything in drudge is written against the Spark RDD interface.  For problems
+that fit in a single workstation, starting a JVM and shipping every term
+through py4j is a significant overhead.  Here, a small subset of the Spark
+context and RDD interface that is actually used by drudge is implemented on top
+of a pool of persistent local worker processes.  An instance of
+:py:class:`LocalContext` can be given to the drudge initializer wherever a
+Spark context is expected.
+
+Similar to Spark, transformations are lazy.  Consecutive narrow
+transformations, like ``map``, ``flatMap``, and ``filter``, are fused into a
+single function applied to each partition, so that the data is only shipped to
+the workers and back once for each materialization.
+
+"""
+
+import collections
+import copy
+import functools
+import itertools
+import operator
+import os
+import pickle
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import cloudpickle
+except ImportError:
+    from pyspark import cloudpickle
+
+
+class LocalContext:
+    """Local drop-in replacement for the Spark context.
+
+    The parallel evaluation of the partitions of RDDs created from this
+    context is carried out on a process pool.  The worker processes are
+    created on the first parallel job and kept alive until :py:meth:`stop`
+    is called, so that the cost for starting the Python interpreter and
+    importing the modules is only paid once.
+
+    Parameters
+    ----------
+
+    n_workers
+        The number of worker processes.  By default, the number of CPUs on the
+        machine is used.  When it is set to zero, all computations will be
+        carried out serially inside the current process without any
+        serialization, which can be helpful for small problems and debugging.
+
+    mp_context
+        The multiprocessing context to be used for the creation of the worker
+        processes, as for the ``concurrent.futures`` process pool.
+
+    """
+
+    def __init__(self, n_workers=None, mp_context=None):
+        """Initialize the local context."""
+
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        elif not isinstance(n_workers, int) or n_workers < 0:
+            raise ValueError(
+                'Invalid number of workers', n_workers,
+                'expecting non-negative integer'
+            )
+
+        self._n_workers = n_workers
+        self._mp_context = mp_context
+        self._pool = None
+        self._accumulators = weakref.WeakValueDictionary()
+        self._acc_ids = itertools.count()
+
+    @property
+    def n_workers(self):
+        """The number of worker processes, zero for serial execution."""
+        return self._n_workers
+
+    @property
+    def defaultParallelism(self):
+        """The default number of partitions, as in Spark."""
+        return max(self._n_workers, 1)
+
+    def parallelize(self, c, numSlices=None):
+        """Distribute a local iterable to form an RDD."""
+
+        data = list(c)
+        n_parts = self.defaultParallelism if numSlices is None else numSlices
+        return LocalRDD(self, _Source(_split(data, n_parts)))
+
+    def union(self, rdds):
+        """Build the union of a list of RDDs."""
+
+        rdds = list(rdds)
+        for i in rdds:
+            if i.context is not self:
+                raise ValueError(
+                    'Invalid RDD for union', i, 'from another context'
+                )
+
+        return LocalRDD(self, _Source(functools.partial(
+            _union_parts, rdds
+        ), lazy=True, n_parts=sum(i.getNumPartitions() for i in rdds)))
+
+    def broadcast(self, value):
+        """Broadcast a read-only variable to the workers.
+
+        The value is simply shipped along with the functions using it.
+        """
+        return LocalBroadcast(value)
+
+    def accumulator(self, value, accum_param=None):
+        """Create an accumulator with the given initial value.
+
+        As in Spark, values can be added to the accumulator inside the
+        distributed functions, and the accumulated value can be read in the
+        driver after the jobs.  The values are added by the ``+`` operator,
+        unless an accumulator parameter is given, which has the ``zero`` and
+        ``addInPlace`` methods as the Spark ``AccumulatorParam``.
+        """
+        res = LocalAccumulator(
+            (id(self), next(self._acc_ids)), value, accum_param
+        )
+        self._accumulators[res.acc_id] = res
+        return res
+
+    def stop(self):
+        """Shut down the worker processes.
+
+        The context can still be used afterwards, with new workers started
+        when needed.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        return
+
+    def _run(self, func, parts):
+        """Run the given function on each of the partitions.
+
+        The function will be called with the index of the partition and an
+        iterator over its entries.  A list for the results for each of the
+        partitions is returned.
+        """
+
+        if self._n_workers == 0 or len(parts) < 2:
+            return [_apply_part(func, i, v) for i, v in enumerate(parts)]
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._n_workers, mp_context=self._mp_context
+            )
+
+        # The closure is serialized only once for all the tasks of the job.
+        payload = cloudpickle.dumps(func)
+        futures = [
+            self._pool.submit(_run_task, payload, i, v)
+            for i, v in enumerate(parts)
+        ]
+
+        res = []
+        for i in futures:
+            part, updates = i.result()
+            for acc_id, value in updates:
+                acc = self._accumulators.get(acc_id)
+                if acc is not None:
+                    acc.add(value)
+                continue
+            res.append(part)
+            continue
+        return res
+
+    def __getstate__(self):
+        """Disallow serialization of the context."""
+        raise pickle.PicklingError(
+            'Local context cannot be used inside distributed functions'
+        )
+
+
+class LocalBroadcast:
+    """Broadcast variable for local contexts.
+
+    Just like the Spark broadcast variables, the actual value can be accessed
+    by the ``value`` attribute.
+    """
+
+    __slots__ = ['value']
+
+    def __init__(self, value):
+        """Initialize the broadcast variable."""
+        self.value = value
+
+    def unpersist(self, blocking=False):
+        """Release the broadcast variable, a no-op for local contexts."""
+        return
+
+    def __getstate__(self):
+        """Get the state for pickling."""
+        return self.value
+
+    def __setstate__(self, state):
+        """Set the state from pickling."""
+        self.value = state
+
+
+class LocalAccumulator:
+    """Accumulator for local contexts.
+
+    Just like the Spark accumulators, values can be added by the ``add``
+    method or the ``+=`` operator inside distributed functions, and the
+    accumulated value can be read by the ``value`` attribute in the driver.
+    """
+
+    __slots__ = [
+        'acc_id',
+        '_value',
+        '_param',
+        '_zero',
+        '__weakref__'
+    ]
+
+    def __init__(self, acc_id, value, param=None):
+        """Initialize the accumulator."""
+        self.acc_id = acc_id
+        self._value = value
+        self._param = param
+        self._zero = None if param is None else param.zero(value)
+
+    @property
+    def value(self):
+        """The accumulated value."""
+        return self._value
+
+    def add(self, term):
+        """Add a value to the accumulator."""
+        if self._param is None:
+            if self._value is None:
+                self._value = term
+            else:
+                self._value = self._value + term
+        else:
+            if self._value is None:
+                self._value = self._zero
+            self._value = self._param.addInPlace(self._value, term)
+        return
+
+    def __iadd__(self, term):
+        """Add a value to the accumulator in place."""
+        self.add(term)
+        return self
+
+    def __getstate__(self):
+        """Get the state for pickling to the workers."""
+        return self.acc_id, self._param, self._zero
+
+    def __setstate__(self, state):
+        """Set the state in the workers.
+
+        The updates inside the workers start from nothing, and are shipped
+        back to the driver with the results of the task.
+        """
+        self.acc_id, self._param, self._zero = state
+        self._value = None
+        _WORKER_ACCUMULATORS.append(self)
+
+
+class LocalRDD:
+    """Resilient distributed dataset on a local context.
+
+    Only the subset of the Spark RDD interface used by drudge is implemented.
+    Narrow transformations are pipelined and evaluated lazily.  Wide
+    transformations like ``reduceByKey`` and ``repartition`` shuffle the data
+    through the driver process.
+
+    """
+
+    __slots__ = [
+        '_ctx',
+        '_source',
+        '_func',
+        '_cached',
+        '_parts'
+    ]
+
+    def __init__(self, ctx: LocalContext, source, func=None):
+        """Initialize the RDD.
+
+        This initializer should not be called directly.  RDDs should be created
+        from local contexts or transformations of other RDDs.
+        """
+
+        self._ctx = ctx
+        self._source = source
+        self._func = func
+        self._cached = False
+        self._parts = None
+
+    @property
+    def context(self):
+        """The context of the RDD."""
+        return self._ctx
+
+    #
+    # Narrow transformations
+    #
+
+    def mapPartitionsWithIndex(self, f, preservesPartitioning=False):
+        """Map the given function to the partitions with their index.
+
+        When the current RDD is not cached, the given function is fused with
+        the pending function of the current RDD.
+        """
+
+        if self._cached:
+            return LocalRDD(self._ctx, _Source(self), f)
+        elif self._func is None:
+            return LocalRDD(self._ctx, self._source, f)
+        else:
+            return LocalRDD(self._ctx, self._source, functools.partial(
+                _compose_part_funcs, self._func, f
+            ))
+
+    def mapPartitions(self, f, preservesPartitioning=False):
+        """Map the given function to each of the partitions."""
+        return self.mapPartitionsWithIndex(functools.partial(_drop_idx, f))
+
+    def map(self, f, preservesPartitioning=False):
+        """Map the given function to each of the entries."""
+        return self.mapPartitionsWithIndex(functools.partial(_map_part, f))
+
+    def flatMap(self, f, preservesPartitioning=False):
+        """Map the given function to the entries and flatten the result."""
+        return self.mapPartitionsWithIndex(functools.partial(_flat_map_part, f))
+
+    def filter(self, f):
+        """Keep only the entries satisfying the given predicate."""
+        return self.mapPartitionsWithIndex(functools.partial(_filter_part, f))
+
+    def keys(self):
+        """Get the keys of an RDD of pairs."""
+        return self.map(operator.itemgetter(0))
+
+    def values(self):
+        """Get the values of an RDD of pairs."""
+        return self.map(operator.itemgetter(1))
+
+    def glom(self):
+        """Coalesce the entries in each partition into a list."""
+        return self.mapPartitions(_glom_part)
+
+    #
+    # Wide transformations
+    #
+
+    def union(self, other):
+        """Form the union of the current RDD with another."""
+        return self._ctx.union([self, other])
+
+    def cartesian(self, other):
+        """Form the Cartesian product with another RDD.
+
+        Each pair of partitions from the two RDDs gives a partition in the
+        result.
+        """
+        return LocalRDD(self._ctx, _Source(functools.partial(
+            _cartesian_parts, self, other
+        ), lazy=True, n_parts=(
+            self.getNumPartitions() * other.getNumPartitions()
+        )))
+
+    def repartition(self, numPartitions):
+        """Evenly redistribute the entries into the given number of partitions.
+        """
+        return LocalRDD(self._ctx, _Source(functools.partial(
+            _repartition_parts, self, numPartitions
+        ), lazy=True, n_parts=max(numPartitions, 1)))
+
+    def coalesce(self, numPartitions, shuffle=False):
+        """Reduce the number of partitions."""
+        return self.repartition(numPartitions)
+
+    def reduceByKey(self, func, numPartitions=None):
+        """Merge the values for each key by the given associative function.
+
+        The values are first combined inside each partition by the workers.
+        Then they are shuffled by the hash of the keys through the driver to be
+        combined across partitions by the workers.
+        """
+
+        combine = functools.partial(_combine_by_key, func)
+        combined = self.mapPartitions(combine)
+        n_parts = (
+            self.getNumPartitions() if numPartitions is None
+            else numPartitions
+        )
+        return LocalRDD(self._ctx, _Source(functools.partial(
+            _hash_parts, combined, n_parts
+        ), lazy=True, n_parts=max(n_parts, 1)), functools.partial(
+            _drop_idx, combine
+        ))
+
+    def sortBy(self, keyfunc, ascending=True, numPartitions=None):
+        """Sort the entries by the given key function."""
+        n_parts = (
+            self.getNumPartitions() if numPartitions is None
+            else numPartitions
+        )
+        return LocalRDD(self._ctx, _Source(functools.partial(
+            _sort_parts, self, keyfunc, ascending, n_parts
+        ), lazy=True, n_parts=max(n_parts, 1)))
+
+    def distinct(self, numPartitions=None):
+        """Remove duplicate entries."""
+        return self.map(lambda x: (x, None)).reduceByKey(
+            lambda x, _: x, numPartitions
+        ).keys()
+
+    #
+    # Persistence
+    #
+
+    def cache(self):
+        """Cache the entries once they are evaluated."""
+        self._cached = True
+        return self
+
+    def persist(self, storageLevel=None):
+        """Cache the entries, the storage level is ignored."""
+        return self.cache()
+
+    def unpersist(self, blocking=False):
+        """Drop the cached entries."""
+        self._cached = False
+        self._parts = None
+        return self
+
+    @property
+    def is_cached(self):
+        """If the RDD is set to be cached."""
+        return self._cached
+
+    #
+    # Actions
+    #
+
+    def getNumPartitions(self):
+        """Get the number of partitions.
+
+        The number is carried by the source of the partitions, without
+        evaluating anything.
+        """
+        return self._source.n_parts
+
+    def collect(self):
+        """Gather all entries into a list."""
+        return [j for i in self._get_parts() for j in i]
+
+    def count(self):
+        """Count the number of entries.
+
+        Only the counts are transferred back from the workers when the RDD is
+        not cached.
+        """
+        if self._cached or self._parts is not None:
+            return sum(len(i) for i in self._get_parts())
+        return sum(
+            i[0] for i in self.mapPartitions(_count_part)._get_parts()
+        )
+
+    def isEmpty(self):
+        """Test if the RDD has no entries."""
+        return self.count() == 0
+
+    def take(self, num):
+        """Take the first given number of entries."""
+        return list(itertools.islice(
+            (j for i in self._get_parts() for j in i), num
+        ))
+
+    def first(self):
+        """Get the first entry."""
+        res = self.take(1)
+        if len(res) == 0:
+            raise ValueError('RDD is empty')
+        return res[0]
+
+    def reduce(self, f):
+        """Reduce the entries by the given commutative associative function."""
+        partials = [
+            i[0] for i in self.mapPartitions(
+                functools.partial(_reduce_part, f)
+            )._get_parts() if len(i) > 0
+        ]
+        if len(partials) == 0:
+            raise ValueError('Can not reduce() empty RDD')
+        return functools.reduce(f, partials)
+
+    def aggregate(self, zeroValue, seqOp, combOp):
+        """Aggregate the entries, following the semantics of Spark."""
+        partials = self.mapPartitions(functools.partial(
+            _aggregate_part, zeroValue, seqOp
+        ))._get_parts()
+        return functools.reduce(
+            combOp, (i[0] for i in partials), copy.deepcopy(zeroValue)
+        )
+
+    def countByKey(self):
+        """Count the number of entries for each key of an RDD of pairs."""
+        counts = collections.defaultdict(int)
+        for i in self.keys().collect():
+            counts[i] += 1
+        return counts
+
+    def foreach(self, f):
+        """Apply the function to each entry for its side effect."""
+        self.mapPartitions(functools.partial(_foreach_part, f))._get_parts()
+        return
+
+    #
+    # Internals
+    #
+
+    def _get_parts(self):
+        """Get the list of evaluated partitions."""
+
+        if self._parts is not None:
+            return self._parts
+
+        parts = self._source.get()
+        if self._func is not None:
+            parts = self._ctx._run(self._func, parts)
+        if self._cached:
+            self._parts = parts
+        return parts
+
+    def __getstate__(self):
+        """Disallow serialization of the RDD."""
+        raise pickle.PicklingError(
+            'RDDs cannot be used inside distributed functions'
+        )
+
+
+#
+# Internal utilities
+# ------------------
+#
+
+class _Source:
+    """Source of partitions for local RDDs.
+
+    It can be a list of partitions, another RDD whose evaluated partitions are
+    to be used, or a callable giving the list of partitions.  Callables are
+    not evaluated until the partitions are needed, so the number of partitions
+    they give needs to be given.
+    """
+
+    __slots__ = [
+        '_src',
+        '_lazy',
+        'n_parts'
+    ]
+
+    def __init__(self, src, lazy=False, n_parts=None):
+        """Initialize the source."""
+        self._src = src
+        self._lazy = lazy
+        if isinstance(src, LocalRDD):
+            n_parts = src.getNumPartitions()
+        elif not lazy:
+            n_parts = len(src)
+        self.n_parts = n_parts
+
+    def get(self):
+        """Get the partitions."""
+        src = self._src
+        if isinstance(src, LocalRDD):
+            return src._get_parts()
+        elif self._lazy:
+            return src()
+        else:
+            return src
+
+
+def _split(data, n_parts):
+    """Split the given list evenly into the given number of partitions."""
+    n_parts = max(n_parts, 1)
+    size, rem = divmod(len(data), n_parts)
+    res = []
+    beg = 0
+    for i in range(n_parts):
+        end = beg + size + (1 if i < rem else 0)
+        res.append(data[beg:end])
+        beg = end
+    return res
+
+
+# Accumulators unpickled for the current task inside the worker.
+_WORKER_ACCUMULATORS = []
+
+
+def _run_task(payload, idx, part):
+    """Run the serialized function on a partition inside the worker.
+
+    The updates to the accumulators are returned along with the result.
+    """
+    _WORKER_ACCUMULATORS.clear()
+    res = _apply_part(pickle.loads(payload), idx, part)
+    updates = [
+        (i.acc_id, i.value) for i in _WORKER_ACCUMULATORS
+        if i.value is not None
+    ]
+    _WORKER_ACCUMULATORS.clear()
+    return res, updates
+
+
+def _apply_part(func, idx, part):
+    """Apply the function to a partition and gather the result."""
+    return list(func(idx, iter(part)))
+
+
+def _compose_part_funcs(first, second, idx, iterator):
+    """Compose two partition functions."""
+    return second(idx, first(idx, iterator))
+
+
+def _drop_idx(f, _, iterator):
+    """Call the partition function without the partition index."""
+    return f(iterator)
+
+
+def _map_part(f, _, iterator):
+    """Map the function to the entries of a partition."""
+    return map(f, iterator)
+
+
+def _flat_map_part(f, _, iterator):
+    """Flat map the function to the entries of a partition."""
+    return itertools.chain.from_iterable(map(f, iterator))
+
+
+def _filter_part(f, _, iterator):
+    """Filter the entries of a partition."""
+    return filter(f, iterator)
+
+
+def _glom_part(iterator):
+    """Gather the entries of a partition."""
+    return [list(iterator)]
+
+
+def _count_part(iterator):
+    """Count the entries of a partition."""
+    return [sum(1 for _ in iterator)]
+
+
+def _reduce_part(f, iterator):
+    """Reduce the entries of a partition, empty for empty partitions."""
+    try:
+        init = next(iterator)
+    except StopIteration:
+        return []
+    return [functools.reduce(f, iterator, init)]
+
+
+def _aggregate_part(zero, seq_op, iterator):
+    """Aggregate the entries of a partition."""
+    return [functools.reduce(seq_op, iterator, copy.deepcopy(zero))]
+
+
+def _foreach_part(f, iterator):
+    """Apply the function to the entries of a partition."""
+    for i in iterator:
+        f(i)
+    return []
+
+
+def _combine_by_key(func, iterator):
+    """Combine the values with the same key inside a partition."""
+    res = {}
+    for k, v in iterator:
+        if k in res:
+            res[k] = func(res[k], v)
+        else:
+            res[k] = v
+    return res.items()
+
+
+def _union_parts(rdds):
+    """Concatenate the partitions of the given RDDs."""
+    return [j for i in rdds for j in i._get_parts()]
+
+
+def _cartesian_parts(rdd1, rdd2):
+    """Form the partitions for the Cartesian product of two RDDs."""
+    parts2 = rdd2._get_parts()
+    return [
+        list(itertools.product(i, j))
+        for i in rdd1._get_parts() for j in parts2
+    ]
+
+
+def _repartition_parts(rdd, n_parts):
+    """Redistribute the entries of the RDD evenly."""
+    return _split(rdd.collect(), n_parts)
+
+
+def _hash_parts(rdd, n_parts):
+    """Shuffle the entries of an RDD of pairs by the hash of their keys."""
+    parts = rdd._get_parts()
+    n_parts = max(n_parts, 1)
+    res = [[] for _ in range(n_parts)]
+    for i in parts:
+        for j in i:
+            res[hash(j[0]) % n_parts].append(j)
+    return res
+
+
+def _sort_parts(rdd, keyfunc, ascending, n_parts):
+    """Sort the entries of the RDD."""
+    parts = rdd._get_parts()
+    return _split(sorted(
+        (j for i in parts for j in i), key=keyfunc, reverse=not ascending
+    ), n_parts)
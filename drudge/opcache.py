@@ -0,0 +1,306 @@
+"""Content-addressed cache for the results of tensor operations.
+
+The results of expensive tensor operations, like simplification and normal
+ordering, can be stored on disk, keyed by the digest of the terms of the input
+tensor, the arguments of the operation, and the configuration of the drudge.
+In this way, when a script is re-run after modification, only the operations
+whose inputs actually changed need to be computed again.
+
+The digest of a tensor is formed as the sum of the digests of its terms, so
+that it can be computed in parallel and is independent of the order and the
+partitioning of the terms.  The digests are based on a stable string form of
+the objects, which is independent of the hashing in the current process.
+
+"""
+
+import functools
+import hashlib
+import os
+import os.path
+import shutil
+import types
+from collections.abc import Mapping
+
+from sympy import Basic, srepr
+
+from .canonpy import Perm, Group
+from .term import Range, Vec, Term
+from .utils import BCastVar, SymbResolver
+
+# Digests of terms are summed modulo this.
+_DIGEST_MOD = 1 << 128
+
+
+class OpCache:
+    """Cache for results of tensor operations in a directory on disk.
+
+    Each result is saved as a tensor by :py:meth:`Tensor.save` into a
+    sub-directory named by the key for the operation.  When the total size of
+    the entries exceeds the maximum size, the least recently used entries are
+    evicted.  Normally, it is created and set for a drudge by the
+    :py:meth:`Drudge.set_op_cache` method.
+
+    Since the saved tensors are written and read by the workers, the directory
+    needs to be on a file system shared by the driver and the workers.
+    """
+
+    __slots__ = [
+        '_path',
+        '_max_size',
+        '_hits',
+        '_misses'
+    ]
+
+    def __init__(self, path, max_size):
+        """Initialize the cache with the given directory and maximum size."""
+
+        if not isinstance(max_size, int) or max_size < 0:
+            raise ValueError(
+                'Invalid maximum size for the operation cache', max_size,
+                'expecting non-negative integer'
+            )
+
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._max_size = max_size
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def path(self):
+        """The directory holding the cached results."""
+        return self._path
+
+    @property
+    def max_size(self):
+        """The maximum total size of the entries, in bytes."""
+        return self._max_size
+
+    @property
+    def hits(self):
+        """The number of results read from the cache."""
+        return self._hits
+
+    @property
+    def misses(self):
+        """The number of results absent from the cache."""
+        return self._misses
+
+    @property
+    def size(self):
+        """The current total size of the entries, in bytes."""
+        return sum(i for _, _, i in self._get_entries())
+
+    def get_key(self, *args):
+        """Get the key for an operation from all its inputs.
+
+        The inputs can be any objects with a stable form by
+        :py:func:`get_stable_form`.  When any of them has no stable form, None
+        is returned, and the result of the operation should not be cached.
+        """
+        try:
+            form = get_stable_form(args)
+        except _NoStableForm:
+            return None
+        return hashlib.sha256(form.encode('utf-8')).hexdigest()
+
+    def load(self, drudge, key):
+        """Load the result with the given key.
+
+        The partitions of the result are read and cached right away, so that
+        the result stays valid after the entry is evicted by later stores.
+        None is returned when the entry is absent or cannot be read, with any
+        corrupted entry removed.
+        """
+
+        entry = os.path.join(self._path, key)
+        try:
+            res = drudge.load(entry)
+        except (OSError, ValueError):
+            self._misses += 1
+            return None
+
+        try:
+            res.cache()
+            res.n_terms
+        except Exception:
+            # Errors from reading the partitions on the workers can be wrapped
+            # in any type by the Spark context.
+            res.terms.unpersist()
+            shutil.rmtree(entry, ignore_errors=True)
+            self._misses += 1
+            return None
+
+        # Mark the entry as recently used.
+        os.utime(entry)
+        self._hits += 1
+        return res
+
+    def store(self, key, tensor):
+        """Store the tensor as the result with the given key.
+
+        Entries are evicted afterward as needed.
+        """
+        tensor.save(os.path.join(self._path, key))
+        self.evict()
+        return
+
+    def evict(self):
+        """Evict the least recently used entries for the maximum size."""
+
+        entries = sorted(self._get_entries())
+        total = sum(i for _, _, i in entries)
+        for _, path, size in entries:
+            if total <= self._max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            continue
+        return
+
+    def clear(self):
+        """Remove all the entries in the cache."""
+        for _, path, _ in self._get_entries():
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        return
+
+    def _get_entries(self):
+        """Get the entries with their last use time and size."""
+
+        res = []
+        for i in os.listdir(self._path):
+            path = os.path.join(self._path, i)
+            if not os.path.isdir(path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(path, j))
+                for j in os.listdir(path)
+            )
+            res.append((os.path.getmtime(path), path, size))
+            continue
+
+        return res
+
+
+def get_term_digest(term: Term) -> int:
+    """Get the digest of a term as an integer."""
+    return int.from_bytes(hashlib.sha256(
+        get_stable_form(term).encode('utf-8')
+    ).digest()[:16], 'big')
+
+
+def add_digests(digest1, digest2):
+    """Combine the digests of two collections of terms."""
+    return (digest1 + digest2) % _DIGEST_MOD
+
+
+def get_stable_form(obj) -> str:
+    """Get a string form of an object stable across processes.
+
+    The form only depends on the value of the object, rather than its identity
+    or any hashing inside the process.  For mappings and sets, the entries are
+    sorted by their forms.  Classes are given by their qualified names.
+    Functions are given by their qualified names together with their code,
+    default arguments, and the contents of their closures, so that lambdas or
+    closures defined at the same place but capturing different values have
+    different forms.  Bound methods also contain the form of the object they
+    are bound to.
+
+    A TypeError is raised for objects without a stable form, like objects of
+    unknown types.
+    """
+
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        return repr(obj)
+    elif isinstance(obj, Basic):
+        return srepr(obj)
+    elif isinstance(obj, Term):
+        return 'Term({})'.format(get_stable_form(
+            (obj.sums, obj.amp, obj.vecs)
+        ))
+    elif isinstance(obj, Vec):
+        return 'Vec({})'.format(get_stable_form((obj.label, obj.indices)))
+    elif isinstance(obj, Range):
+        return 'Range({})'.format(get_stable_form(obj.args))
+    elif isinstance(obj, (Perm, Group)):
+        return '{}({})'.format(
+            type(obj).__name__, get_stable_form(obj.__getnewargs__())
+        )
+    elif isinstance(obj, BCastVar):
+        return get_stable_form(obj.ro)
+    elif isinstance(obj, SymbResolver):
+        return 'SymbResolver({})'.format(get_stable_form(
+            (obj._known, obj._strict)
+        ))
+    elif isinstance(obj, Mapping):
+        return '{{{}}}'.format(', '.join(sorted(
+            '{}: {}'.format(get_stable_form(k), get_stable_form(v))
+            for k, v in obj.items()
+        )))
+    elif isinstance(obj, (set, frozenset)):
+        return '{{{}}}'.format(', '.join(sorted(
+            get_stable_form(i) for i in obj
+        )))
+    elif isinstance(obj, (list, tuple)):
+        return '{}({})'.format(type(obj).__name__, ', '.join(
+            get_stable_form(i) for i in obj
+        ))
+    elif isinstance(obj, functools.partial):
+        return 'partial({})'.format(get_stable_form(
+            (obj.func, obj.args, obj.keywords)
+        ))
+    elif isinstance(obj, types.CodeType):
+        return 'code({})'.format(get_stable_form(
+            (obj.co_code, obj.co_names, obj.co_consts)
+        ))
+    elif isinstance(obj, types.FunctionType):
+        return 'function({})'.format(get_stable_form((
+            _get_qualname(obj), obj.__code__, obj.__defaults__,
+            obj.__kwdefaults__, _get_closure_contents(obj)
+        )))
+    elif isinstance(obj, types.MethodType):
+        return 'method({})'.format(get_stable_form(
+            (obj.__func__, obj.__self__)
+        ))
+    elif isinstance(obj, types.BuiltinFunctionType) and (
+            obj.__self__ is None or isinstance(obj.__self__, types.ModuleType)
+    ):
+        return _get_qualname(obj)
+    elif isinstance(obj, type):
+        return _get_qualname(obj)
+    else:
+        raise _NoStableForm(
+            'Object without stable form', obj, 'of type', type(obj)
+        )
+
+
+class _NoStableForm(TypeError):
+    """Errors for objects without stable forms."""
+    pass
+
+
+def _get_qualname(obj) -> str:
+    """Get the qualified name of a function or class."""
+    return '{}.{}'.format(obj.__module__, obj.__qualname__)
+
+
+def _get_closure_contents(func):
+    """Get the contents of the closure cells of a function.
+
+    References to the function itself, as from recursive closures, are
+    replaced by a marker.
+    """
+
+    if func.__closure__ is None:
+        return None
+
+    res = []
+    for i in func.__closure__:
+        try:
+            content = i.cell_contents
+        except ValueError:
+            raise _NoStableForm('Empty closure cell in function', func)
+        res.append(('self',) if content is func else content)
+        continue
+    return tuple(res)
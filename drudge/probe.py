@@ -0,0 +1,297 @@
+"""Randomized numeric evaluation of terms for probing equality of tensors.
+
+For the numeric probing, each range is given a small concrete size, and all the
+ranges are laid out consecutively in a global index space.  Each indexed base
+is then given a random array over the global index space, symmetrized according
+to the symmetries set in the drudge, and each free symbol is given a random
+value, or a random index for symbols of a range with a size.  A term is
+evaluated vectorized over all the values of its summation dummies by NumPy.
+Its vector part is evaluated into keys for the basis, with the values of the
+amplitude summed for each key.
+
+NumPy is only needed for the numeric probing, as the ``probe`` extra of the
+package.
+
+"""
+
+import hashlib
+import itertools
+import typing
+
+import numpy as np
+from sympy import (
+    Float, Function, Indexed, IndexedBase, Integer, KroneckerDelta, Symbol,
+    lambdify, srepr
+)
+
+from .canon import NEG, CONJ
+from .opcache import get_stable_form
+from .term import Range, Term, try_resolve_range
+
+
+class ProbeEnv:
+    """The environment for the numeric evaluation of terms.
+
+    It is pickled to the workers, where the random arrays for the indexed
+    bases are generated deterministically from the seed on demand, so that the
+    arrays do not need to be shipped.
+    """
+
+    __slots__ = [
+        '_offsets',
+        '_n_points',
+        '_values',
+        '_symms',
+        '_seed',
+        '_arrays'
+    ]
+
+    def __init__(self, sizes, free_vars, resolvers, symms, seed):
+        """Initialize the probing environment.
+
+        The values for the free variables are drawn here.
+        """
+
+        self._offsets = {}
+        self._n_points = 0
+        for range_, size in sorted(
+                sizes.items(), key=lambda x: get_stable_form(x[0])
+        ):
+            if not isinstance(range_, Range):
+                raise TypeError(
+                    'Invalid range for numeric probing', range_,
+                    'expecting drudge range'
+                )
+            if not isinstance(size, int) or size < 1:
+                raise ValueError(
+                    'Invalid size for range', range_, size,
+                    'expecting positive integer'
+                )
+            self._offsets[range_] = (self._n_points, size)
+            self._n_points += size
+            continue
+
+        rng = np.random.RandomState(seed)
+        self._values = {}
+        for i in sorted(free_vars, key=srepr):
+            range_ = try_resolve_range(i, {}, resolvers)
+            if range_ in self._offsets:
+                offset, size = self._offsets[range_]
+                self._values[i] = Integer(offset + rng.randint(size))
+            else:
+                self._values[i] = Float(rng.standard_normal())
+            continue
+
+        self._symms = symms
+        self._seed = seed
+        self._arrays = None
+
+    def __getstate__(self):
+        """Get the state for pickling, with the generated arrays dropped."""
+        return (
+            self._offsets, self._n_points, self._values, self._symms,
+            self._seed
+        )
+
+    def __setstate__(self, state):
+        """Set the state from unpickling."""
+        (
+            self._offsets, self._n_points, self._values, self._symms,
+            self._seed
+        ) = state
+        self._arrays = None
+
+    def eval_term(self, term: Term) -> typing.List[tuple]:
+        """Evaluate a term into its values for the keys for the basis."""
+
+        dumms = []
+        shape = []
+        for dumm, range_ in term.sums:
+            if range_ not in self._offsets:
+                raise ValueError(
+                    'Invalid range without size', range_,
+                    'expecting size given for numeric probing'
+                )
+            offset, size = self._offsets[range_]
+            dumms.append((dumm, offset, size))
+            shape.append(size)
+            continue
+
+        n_dumms = len(dumms)
+        shape = tuple(shape)
+        args = [Symbol('_d{}'.format(i)) for i in range(n_dumms)]
+        dumm_vals = [
+            np.arange(offset, offset + size).reshape(
+                [size if i == j else 1 for j in range(n_dumms)]
+            )
+            for i, (_, offset, size) in enumerate(dumms)
+        ]
+        subs = dict(self._values)
+        subs.update((v[0], args[i]) for i, v in enumerate(dumms))
+
+        amp = self._eval_expr(term.amp, args, dumm_vals, subs)
+        amp = np.broadcast_to(amp, shape)
+
+        keys = []
+        arrays = []
+        for vec in term.vecs:
+            indices = []
+            for index in vec.indices:
+                index = index.xreplace(subs)
+                if any(i in index.atoms(Symbol) for i in args):
+                    indices.append(len(arrays))
+                    arrays.append(np.broadcast_to(self._eval_expr(
+                        index, args, dumm_vals, subs
+                    ), shape).ravel())
+                else:
+                    indices.append(_get_const_key(index))
+                continue
+            keys.append((vec.label, tuple(indices)))
+            continue
+
+        if len(arrays) == 0:
+            return [(_form_key(keys, ()), amp.sum())]
+
+        points, inv = np.unique(
+            np.stack(arrays, axis=1), axis=0, return_inverse=True
+        )
+        inv = inv.ravel()
+        amp = amp.ravel()
+        sums = np.bincount(inv, weights=amp.real, minlength=len(points))
+        if np.iscomplexobj(amp):
+            sums = sums + 1j * np.bincount(
+                inv, weights=amp.imag, minlength=len(points)
+            )
+
+        return [
+            (_form_key(keys, point), value)
+            for point, value in zip(points.tolist(), sums)
+        ]
+
+    def _eval_expr(self, expr, args, dumm_vals, subs):
+        """Evaluate an expression vectorized over the dummies."""
+
+        bases = sorted({
+            (i.base, len(i.indices)) for i in expr.atoms(Indexed)
+        }, key=lambda x: srepr(x[0]))
+        base_args = [
+            IndexedBase('_b{}'.format(i)) for i in range(len(bases))
+        ]
+        # The bases are replaced before any of their labels can be reached.
+        subs = dict(subs)
+        subs.update((v[0], base_args[i]) for i, v in enumerate(bases))
+
+        expr = expr.xreplace(subs).replace(KroneckerDelta, _DELTA)
+        func = lambdify(
+            args + base_args, expr,
+            modules=[{_DELTA_NAME: _eval_delta}, 'numpy']
+        )
+        return func(*dumm_vals, *[self._get_array(*i) for i in bases])
+
+    def _get_array(self, base, rank):
+        """Get the random array for an indexed base."""
+
+        if self._arrays is None:
+            self._arrays = {}
+        key = (base, rank)
+        if key in self._arrays:
+            return self._arrays[key]
+
+        digest = hashlib.sha256('{} {} {}'.format(
+            self._seed, srepr(base), rank
+        ).encode('utf-8')).digest()
+        rng = np.random.RandomState(int.from_bytes(digest[:4], 'big'))
+        array = rng.standard_normal((self._n_points,) * rank)
+
+        group = self._get_symm(base, rank)
+        if group is not None:
+            array = _symmetrize(array, group)
+
+        self._arrays[key] = array
+        return array
+
+    def _get_symm(self, base, rank):
+        """Get the symmetry of an indexed base as in the canonicalization."""
+        if rank < 2:
+            return None
+        keys = [base, base.label]
+        for i in itertools.chain(((i, rank) for i in keys), keys):
+            if i in self._symms:
+                return self._symms[i]
+            continue
+        return None
+
+
+_DELTA_NAME = '_probe_delta'
+_DELTA = Function(_DELTA_NAME)
+
+
+def _eval_delta(i, j):
+    """Evaluate the Kronecker delta numerically."""
+    return np.equal(i, j).astype(float)
+
+
+def _get_const_key(index):
+    """Get the key for an index not depending on any summation dummy.
+
+    The key is wrapped inside a tuple, to be distinguished from the positions
+    of evaluated indices.
+    """
+    if index.is_Integer:
+        return (int(index),)
+    elif index.is_number:
+        return (complex(index),)
+    else:
+        return (srepr(index),)
+
+
+def _form_key(keys, point):
+    """Form the key for the basis from the values of the evaluated indices."""
+    return tuple(
+        (label, tuple(
+            point[i] if isinstance(i, int) else i[0] for i in indices
+        ))
+        for label, indices in keys
+    )
+
+
+def _symmetrize(array, group):
+    """Symmetrize the array by all the elements of the group.
+
+    The elements are generated from the permutations in the transversals of
+    the group.  Since each element and its inverse have the same accompanied
+    action, the direction of the permutations does not matter.
+    """
+
+    gens = [
+        (tuple(pre_imgs), acc)
+        for _, perms in group.__getnewargs__()[0]
+        for pre_imgs, acc in perms
+    ]
+    ident = (tuple(range(array.ndim)), 0)
+    elems = {ident}
+    frontier = [ident]
+    while len(frontier) > 0:
+        new_frontier = []
+        for perm, acc in frontier:
+            for gen_perm, gen_acc in gens:
+                prod = (tuple(perm[i] for i in gen_perm), acc ^ gen_acc)
+                if prod not in elems:
+                    elems.add(prod)
+                    new_frontier.append(prod)
+                continue
+            continue
+        frontier = new_frontier
+        continue
+
+    res = np.zeros(array.shape, dtype=array.dtype)
+    for perm, acc in elems:
+        curr = array.transpose(perm)
+        if acc & CONJ:
+            curr = curr.conj()
+        if acc & NEG:
+            curr = -curr
+        res = res + curr
+        continue
+
+    return res / len(elems)
@@ -0,0 +1,395 @@
+"""Per-stage profiling of tensor operations.
+
+When profiling is turned on for a drudge by :py:meth:`Drudge.profiling`, each
+stage of the simplification and the normal ordering of the terms is carried
+out eagerly, with the input and the output of the stage cached and counted.
+Along with the wall time in the driver, the CPU time spent by the workers on
+the stage is gathered by accumulators, and the size of the data to be shuffled
+is estimated from the pickled size of the terms entering shuffling stages.
+
+Optionally, the per-term work inside the stages can also be traced, with the
+slowest terms of each partition kept in a bounded heap and merged into an
+accumulator, so that the few pathological terms dominating an operation can be
+found.
+
+"""
+
+import collections
+import functools
+import heapq
+import pickle
+import time
+
+
+class StageRecord(collections.namedtuple('StageRecord', [
+    'name', 'level', 'wall_time', 'n_terms_in', 'n_terms_out', 'cpu_time',
+    'shuffle_bytes'
+])):
+    """Record of the profiling of a stage.
+
+    Attributes
+    ----------
+
+    name
+        The name of the stage.
+
+    level
+        The nesting level of the stage, zero for the outermost stages.  The
+        timing of a stage includes that of the stages nested inside.
+
+    wall_time
+        The wall time of the stage in the driver, in seconds.
+
+    n_terms_in
+        The number of input terms.
+
+    n_terms_out
+        The number of output terms.
+
+    cpu_time
+        The total CPU time spent by the workers on the output partitions of the
+        stage, in seconds.  For stages with shuffling, the work before the
+        shuffling is not included.  None when accumulators are not supported
+        by the Spark context.
+
+    shuffle_bytes
+        The estimated number of bytes shuffled, by the pickled size of the
+        input terms.  None for stages without shuffling, or when accumulators
+        are not supported.
+
+    """
+
+    __slots__ = ()
+
+
+class SlowTerm(collections.namedtuple('SlowTerm', [
+    'time', 'label', 'term'
+])):
+    """Record of a slow term in the per-term work.
+
+    Attributes
+    ----------
+
+    time
+        The CPU time spent on the term, in seconds.
+
+    label
+        The label of the per-term work, like ``canon``.
+
+    term
+        The input term of the work.
+
+    """
+
+    __slots__ = ()
+
+
+class Profile:
+    """Profile of the stages of tensor operations.
+
+    Normally, it is created by :py:meth:`Drudge.profiling`, with the records
+    added as the stages are carried out.
+    """
+
+    __slots__ = [
+        '_records',
+        '_level',
+        '_owned',
+        '_n_slowest',
+        '_slowest'
+    ]
+
+    def __init__(self, ctx=None, n_slowest_terms=0):
+        """Initialize an empty profile.
+
+        When a positive number of slowest terms is given, the slowest terms
+        in the per-term work are traced by an accumulator from the given
+        context.
+        """
+        self._records = []
+        self._level = 0
+        self._owned = []
+
+        if not isinstance(n_slowest_terms, int) or n_slowest_terms < 0:
+            raise ValueError(
+                'Invalid number of slowest terms', n_slowest_terms,
+                'expecting non-negative integer'
+            )
+        self._n_slowest = n_slowest_terms
+        self._slowest = None
+        if n_slowest_terms > 0:
+            try:
+                self._slowest = ctx.accumulator(
+                    _SlowTerms(n_slowest_terms), _SlowTermsParam()
+                )
+            except (AttributeError, NotImplementedError):
+                pass
+
+    @property
+    def records(self):
+        """The list of records of the stages, in the order of their start."""
+        return list(self._records)
+
+    @property
+    def slowest_terms(self):
+        """The slowest terms traced, from the slowest.
+
+        None is returned when the slowest terms are not traced, or not
+        supported by the Spark context.
+        """
+        if self._slowest is None:
+            return None
+        return list(self._slowest.value.entries)
+
+    def trace_terms(self, label, func, get_term=None, flat=False):
+        """Wrap a per-term function to have its slowest terms traced.
+
+        The result is a function to be mapped over the partitions of the input,
+        where the slowest terms of each partition are kept in a bounded heap,
+        and added to the accumulator only once for the partition.  When the
+        slowest terms are not traced, the function is simply applied on each
+        input.
+
+        For functions taking more than the term, like a term with extra
+        information in a tuple, the callable to get the term from the input
+        can be given, so that only the term is recorded.  When ``flat`` is
+        set, the function gives an iterable of outputs for each input, as in
+        flat maps.
+        """
+        if self._slowest is None:
+            return functools.partial(_apply_part, func, flat)
+        return functools.partial(
+            _trace_part, self._slowest, self._n_slowest, label, func,
+            get_term, flat
+        )
+
+    def run_stage(self, name, terms, comput, shuffle=False):
+        """Run a stage on the given terms with profiling.
+
+        Parameters
+        ----------
+
+        name
+            The name of the stage.
+
+        terms
+            The RDD of the input terms.
+
+        comput
+            The computation of the stage, to be called with the input terms to
+            give the RDD of the output terms.
+
+        shuffle
+            If the stage shuffles its input terms.
+
+        """
+
+        terms.cache()
+        n_terms_in = terms.count()
+
+        cpu_time = _get_accumulator(terms, 0.0)
+        shuffle_bytes = _get_accumulator(terms, 0) if shuffle else None
+        inp = terms
+        if shuffle_bytes is not None:
+            inp = terms.mapPartitions(functools.partial(
+                _measure_part, shuffle_bytes
+            ))
+
+        # The record is placed by the start of the stage, before any nested
+        # stages.
+        idx = len(self._records)
+        self._records.append(None)
+        self._level += 1
+        begin = time.perf_counter()
+        try:
+            res = comput(inp)
+            if cpu_time is not None:
+                res = res.mapPartitions(functools.partial(
+                    _time_part, cpu_time
+                ))
+            res.cache()
+            n_terms_out = res.count()
+        finally:
+            self._level -= 1
+        wall_time = time.perf_counter() - begin
+
+        self._records[idx] = StageRecord(
+            name=name, level=self._level, wall_time=wall_time,
+            n_terms_in=n_terms_in, n_terms_out=n_terms_out,
+            cpu_time=_get_value(cpu_time), shuffle_bytes=_get_value(
+                shuffle_bytes
+            )
+        )
+
+        # Intermediate results from the previous stages are no longer needed.
+        owned = [i for i in self._owned if i is not terms]
+        if len(owned) < len(self._owned):
+            terms.unpersist()
+        owned.append(res)
+        self._owned = owned
+
+        return res
+
+    def format_table(self):
+        """Format the records into a plain-text table."""
+
+        header = (
+            'Stage', 'Wall (s)', 'CPU (s)', 'Terms in', 'Terms out',
+            'Shuffle (B)'
+        )
+        rows = [header]
+        for i in self._records:
+            if i is None:
+                continue
+            rows.append((
+                '  ' * i.level + i.name,
+                '{:.3f}'.format(i.wall_time),
+                '-' if i.cpu_time is None else '{:.3f}'.format(i.cpu_time),
+                str(i.n_terms_in),
+                str(i.n_terms_out),
+                '-' if i.shuffle_bytes is None else str(i.shuffle_bytes)
+            ))
+            continue
+
+        widths = [max(len(i[j]) for i in rows) for j in range(len(header))]
+        lines = []
+        for row in rows:
+            lines.append('  '.join(
+                v.ljust(w) if j == 0 else v.rjust(w)
+                for j, (v, w) in enumerate(zip(row, widths))
+            ).rstrip())
+            continue
+
+        lines.insert(1, '-' * len(lines[0]))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        """Form the table of the records."""
+        return self.format_table()
+
+
+class _SlowTerms:
+    """The bounded collection of the slowest terms."""
+
+    __slots__ = [
+        'n_max',
+        'entries'
+    ]
+
+    def __init__(self, n_max, entries=()):
+        """Initialize the collection."""
+        self.n_max = n_max
+        self.entries = list(entries)
+
+    def add(self, entries):
+        """Add the given entries, keeping only the slowest ones."""
+        self.entries = heapq.nlargest(
+            self.n_max, self.entries + list(entries), key=lambda x: x.time
+        )
+        return
+
+
+class _SlowTermsParam:
+    """Accumulator parameter for the slowest terms.
+
+    The collections of the slowest terms from the partitions are added.
+    """
+
+    def zero(self, value):
+        """Get an empty collection."""
+        return _SlowTerms(value.n_max)
+
+    def addInPlace(self, value1, value2):
+        """Add the records into the collection."""
+        value1.add(value2.entries)
+        return value1
+
+
+def _apply_part(func, flat, inps):
+    """Apply the per-term function on the inputs in a partition."""
+    for inp in inps:
+        if flat:
+            yield from func(inp)
+        else:
+            yield func(inp)
+        continue
+
+
+def _trace_part(acc, n_max, label, func, get_term, flat, inps):
+    """Apply the per-term function on a partition, with the CPU time traced.
+
+    Only the slowest terms of the partition are kept in a min-heap, with the
+    index of the input breaking ties in time, and the accumulator is updated
+    once after the partition is finished.
+    """
+    heap = []
+    for idx, inp in enumerate(inps):
+        begin = time.process_time()
+        res = func(inp)
+        elapsed = time.process_time() - begin
+
+        entry = (elapsed, idx, inp)
+        if len(heap) < n_max:
+            heapq.heappush(heap, entry)
+        elif elapsed > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+        if flat:
+            yield from res
+        else:
+            yield res
+        continue
+
+    acc.add(_SlowTerms(n_max, [
+        SlowTerm(
+            time=elapsed, label=label,
+            term=inp if get_term is None else get_term(inp)
+        ) for elapsed, _, inp in heap
+    ]))
+
+
+def _get_accumulator(terms, zero):
+    """Get a new accumulator from the context of the terms.
+
+    None is returned when accumulators are not supported by the context.
+    """
+    try:
+        return terms.context.accumulator(zero)
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+def _get_value(acc):
+    """Get the value of an accumulator, which can be absent."""
+    return None if acc is None else acc.value
+
+
+def _measure_part(acc, terms):
+    """Count the pickled size of the terms in a partition into the accumulator.
+    """
+    size = 0
+    for i in terms:
+        size += len(pickle.dumps(i, pickle.HIGHEST_PROTOCOL))
+        yield i
+        continue
+    acc.add(size)
+
+
+def _time_part(acc, terms):
+    """Count the CPU time for pulling all terms in a partition.
+
+    The time spent in the consumers of the terms is excluded.
+    """
+    elapsed = 0.0
+    terms = iter(terms)
+    while True:
+        begin = time.process_time()
+        try:
+            term = next(terms)
+        except StopIteration:
+            break
+        finally:
+            elapsed += time.process_time() - begin
+        yield term
+        continue
+    acc.add(elapsed)
@@ -0,0 +1,197 @@
+"""Compact serialization of batches of terms for Spark.
+
+With the default pickle serialization, each term shipped between Spark stages
+has its ranges, indexed bases, and vector labels pickled all over again, since
+equal objects from different terms are generally not the same Python object.
+For the typical terms in drudge, this redundancy dominates the volume of data
+serialized, especially during shuffles.
+
+The serializer here interns these objects into a table for each batch of
+terms, by their equality.  The table is pickled once in front of the batch,
+while the terms in the batch are pickled with the interned objects encoded as
+integer references into the table.  Vectors are not interned as a whole, since
+vectors with the same label mostly differ in their indices.  Rather, vectors
+are pickled by their label and indices, with only the label interned.  Plain
+symbols are not interned, since they are already unique objects by the cache
+of SymPy, and thus only pickled once for each batch by the memo of pickle.
+
+"""
+
+import copyreg
+import io
+import pickle
+
+from pyspark.serializers import FramedSerializer
+from sympy import Dummy, IndexedBase
+
+from .term import Range, Vec
+
+# Types of objects to be interned into the symbol table for the batch.
+_INTERNED_TYPES = (Dummy, IndexedBase, Range)
+
+
+class TermSerializer(FramedSerializer):
+    """Serializer for batches of terms with a per-batch symbol table.
+
+    Dummy symbols, indexed bases, ranges, and labels of vectors in the batch
+    are interned by their equality into a table, which is pickled only once for
+    the whole batch.  Any other picklable objects can still be serialized by
+    it, just without any saving.  To be used for all the data in Spark, it can
+    be given as the serializer for the Spark context, like::
+
+        ctx = SparkContext(conf=conf, serializer=TermSerializer())
+
+    Parameters
+    ----------
+
+    protocol
+        The pickle protocol to use.
+
+    measure
+        If the size of the default pickle serialization of each batch is also
+        to be measured, so that the number of bytes saved can be reported.
+        This roughly doubles the cost of serialization, so it should only be
+        turned on for diagnostics.
+
+    Note that the statistics are only recorded for the serialization carried
+    out in the current process.  For the serializer of a Spark context, this
+    is the data sent from the driver, like the terms parallelized from local
+    lists and the broadcast variables.  The serialization on the workers,
+    including the shuffles, is not counted, since each worker process gets
+    its own copy of the serializer.
+
+    """
+
+    def __init__(self, protocol=pickle.HIGHEST_PROTOCOL, measure=False):
+        """Initialize the serializer."""
+        super().__init__()
+        self._protocol = protocol
+        self._measure = measure
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the statistics of the serialization."""
+        self._n_batches = 0
+        self._n_bytes = 0
+        self._n_plain_bytes = 0
+
+    def dumps(self, obj):
+        """Serialize the given object, normally a batch of terms."""
+
+        table = []
+        body = io.BytesIO()
+        _InterningPickler(body, self._protocol, table).dump(obj)
+        res = pickle.dumps(table, self._protocol) + body.getvalue()
+
+        self._n_batches += 1
+        self._n_bytes += len(res)
+        if self._measure:
+            self._n_plain_bytes += len(pickle.dumps(obj, self._protocol))
+        return res
+
+    def loads(self, obj):
+        """Deserialize the given bytes into the original object."""
+        stream = io.BytesIO(obj)
+        table = pickle.load(stream)
+        return _InterningUnpickler(stream, table).load()
+
+    @property
+    def n_batches(self):
+        """The number of batches serialized in the current process."""
+        return self._n_batches
+
+    @property
+    def n_bytes(self):
+        """The total number of bytes serialized in the current process."""
+        return self._n_bytes
+
+    @property
+    def bytes_saved(self):
+        """The number of bytes saved relative to the default pickling.
+
+        Only the serialization in the current process is counted, which is
+        only the data sent from the driver for the serializer of a Spark
+        context.  None is returned when the serializer is not measuring.
+        """
+        if not self._measure:
+            return None
+        return self._n_plain_bytes - self._n_bytes
+
+    def __eq__(self, other):
+        """Compare the serializer by its serialization format."""
+        return (
+            isinstance(other, TermSerializer) and
+            self._protocol == other._protocol
+        )
+
+    def __hash__(self):
+        """Hash the serializer by its serialization format."""
+        return hash((type(self), self._protocol))
+
+    def __repr__(self):
+        """Form a representation of the serializer."""
+        return 'TermSerializer(protocol={}, measure={})'.format(
+            self._protocol, self._measure
+        )
+
+
+class _InterningPickler(pickle.Pickler):
+    """Pickler encoding the interned objects as references into a table."""
+
+    def __init__(self, file, protocol, table):
+        """Initialize the pickler with the table to fill."""
+        super().__init__(file, protocol)
+        self._table = table
+        self._index = {}
+        self.dispatch_table = _DISPATCH_TABLE
+
+    def persistent_id(self, obj):
+        """Get the index of the object in the table if it is interned."""
+
+        if isinstance(obj, _VecLabel):
+            key = (_VecLabel, obj.label)
+            obj = obj.label
+        elif isinstance(obj, _INTERNED_TYPES):
+            key = (type(obj), obj)
+        else:
+            return None
+
+        idx = self._index.get(key)
+        if idx is None:
+            idx = len(self._table)
+            self._table.append(obj)
+            self._index[key] = idx
+        return idx
+
+
+class _InterningUnpickler(pickle.Unpickler):
+    """Unpickler resolving the references into the table of objects."""
+
+    def __init__(self, file, table):
+        """Initialize the unpickler with the table of interned objects."""
+        super().__init__(file)
+        self._table = table
+
+    def persistent_load(self, pid):
+        """Get the interned object from its index."""
+        return self._table[pid]
+
+
+class _VecLabel:
+    """Wrapper for the label of a vector to be interned."""
+
+    __slots__ = ['label']
+
+    def __init__(self, label):
+        """Initialize the wrapper."""
+        self.label = label
+
+
+def _reduce_vec(vec: Vec):
+    """Reduce a vector for pickling, with its label to be interned."""
+    return Vec, (_VecLabel(vec.label), vec.indices)
+
+
+# Reductions for the interning pickler, where only vectors are special.
+_DISPATCH_TABLE = dict(copyreg.dispatch_table)
+_DISPATCH_TABLE[Vec] = _reduce_vec
@@ -17,7 +17,7 @@ from sympy import (
 )
 from sympy.core.sympify import CantSympify
 
-from .canon import canon_factors
+from .canon import canon_factors, canon_factors_batch
 from .utils import (
     ensure_symb, ensure_expr, sympy_key, is_higher, NonsympifiableFunc, prod_
 )
@@ -964,6 +964,21 @@ class Term(ATerms):
         if symms is None:
             symms = {}
 
+        factors, factors_info, coeff = self._get_canon_factors(
+            symms, vec_colour
+        )
+        return self._rebuild_canoned(
+            factors_info, coeff, canon_factors(self._sums, factors, symms)
+        )
+
+    def _get_canon_factors(self, symms, vec_colour):
+        """Get the factors of the term for canonicalization.
+
+        The factors are given in the format for :py:func:`canon_factors`,
+        along with the information for the reconstruction of the term and the
+        coefficient from the amplitude.
+        """
+
         # Factors to canonicalize.
         factors = []
 
@@ -973,8 +988,6 @@ class Term(ATerms):
         # any indexed quantity, the expression with (the only) indexed replaced
         # by the placeholder for factors with indexed.
         factors_info = []
-        vec_factor = 1
-        unindexed_factor = 2
 
         #
         # Get the factors in the amplitude.
@@ -1047,7 +1060,7 @@ class Term(ATerms):
                 factors.append((
                     wrapper_base[i], (_COMMUTATIVE,)
                 ))
-                factors_info.append(unindexed_factor)
+                factors_info.append(_UNINDEXED_FACTOR)
 
             continue
 
@@ -1062,29 +1075,26 @@ class Term(ATerms):
             factors.append((
                 v, (_NON_COMMUTATIVE, colour)
             ))
-            factors_info.append(vec_factor)
+            factors_info.append(_VEC_FACTOR)
             continue
 
-        #
-        # Invoke the core simplification.
-        #
+        return factors, factors_info, coeff
 
-        res_sums, canoned_factors, canon_coeff = canon_factors(
-            self._sums, factors, symms
-        )
+    @staticmethod
+    def _rebuild_canoned(factors_info, coeff, canon_res):
+        """Rebuild the term from the result of canonicalizing its factors."""
 
-        #
-        # Reconstruct the result
-        #
+        treated_placeholder = _TREATED_PLACEHOLDER
+        res_sums, canoned_factors, canon_coeff = canon_res
 
         res_amp = coeff * canon_coeff
         res_vecs = []
         for i, j in zip(canoned_factors, factors_info):
 
-            if j == vec_factor:
+            if j == _VEC_FACTOR:
                 # When we have a vector.
                 res_vecs.append(i)
-            elif j == unindexed_factor:
+            elif j == _UNINDEXED_FACTOR:
                 res_amp *= i.indices[0]
             else:
                 res_amp *= j.xreplace({treated_placeholder: i})
@@ -1130,6 +1140,37 @@ class Term(ATerms):
             raise TypeError('Invalid base to test presence', base)
 
 
+def canon_terms(terms, symms=None, vec_colour=None, n_threads=1):
+    """Canonicalize multiple terms.
+
+    The results are the same as the ``canon`` method of each of the terms,
+    with the same arguments.  But the Eldags of all the terms are
+    canonicalized together by :py:func:`canon_factors_batch`, with the global
+    interpreter lock released during the native canonicalization.
+    """
+
+    if symms is None:
+        symms = {}
+
+    terms = list(terms)
+    infos = []
+    problems = []
+    for term in terms:
+        factors, factors_info, coeff = term._get_canon_factors(
+            symms, vec_colour
+        )
+        infos.append((factors_info, coeff))
+        problems.append((term.sums, factors, symms))
+        continue
+
+    return [
+        Term._rebuild_canoned(factors_info, coeff, canon_res)
+        for (factors_info, coeff), canon_res in zip(
+            infos, canon_factors_batch(problems, n_threads=n_threads)
+        )
+    ]
+
+
 _WRAPPER_BASE = IndexedBase(
     'internalWrapper', shape=('internalShape',)
 )
@@ -1140,6 +1181,11 @@ _TREATED_PLACEHOLDER = Symbol('internalTreatedPlaceholder')
 _COMMUTATIVE = 1
 _NON_COMMUTATIVE = 0
 
+# Placeholders in the information for reconstructing canonicalized terms.
+
+_VEC_FACTOR = 1
+_UNINDEXED_FACTOR = 2
+
 
 #
 # Substitution by tensor definition
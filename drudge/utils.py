@@ -1,8 +1,13 @@
 """Small utilities."""
 
+import collections
+import csv
 import functools
+import json
 import operator
+import os.path
 import string
+import sys
 import time
 from collections.abc import Sequence
 
@@ -14,6 +19,12 @@ from sympy import (
 from sympy.core.assumptions import ManagedProperties
 from sympy.core.sympify import CantSympify
 
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
 
 #
 # SymPy utilities
@@ -284,48 +295,234 @@ class BCastVar:
         return self._bcast
 
 
-def nest_bind(rdd: RDD, func, full_balance=True):
+def nest_bind(rdd: RDD, func, full_balance=True, frontier_sizes=None):
     """Nest the flat map of the given function.
 
     When an entry no longer need processing, None can be returned by the call
     back function.
 
+    With full balance, the entries are processed step by step, where the
+    frontier of entries still needing processing is rebalanced among the
+    partitions when it is skewed.  When a list is given for the frontier sizes,
+    the number of entries in the frontier before each step is appended to it.
+
     """
 
     if full_balance:
-        return _nest_bind_full_balance(rdd, func)
+        return _nest_bind_full_balance(rdd, func, frontier_sizes)
     else:
         return _nest_bind_no_balance(rdd, func)
 
 
-def _nest_bind_full_balance(rdd: RDD, func):
+# Frontiers with no more entries than this are finished locally.
+_NEST_BIND_LOCAL_SIZE = 64
+
+# Frontiers with the largest partition within this factor of the mean are
+# considered balanced.
+_NEST_BIND_BALANCE = 1.5
+
+# Frontiers staying balanced for this number of consecutive steps are finished
+# locally.
+_NEST_BIND_BALANCED_STEPS = 2
+
+# Finished entries are consolidated, with their lineage truncated, after this
+# number of steps.
+_NEST_BIND_CONSOLIDATE = 4
+
+
+def _nest_bind_full_balance(rdd: RDD, func, frontier_sizes=None):
     """Nest the flat map of the given function with full load balancing.
+
+    Each step costs a single job, which materializes the cached result of the
+    step, with the sizes of the partitions of the new frontier gathered by an
+    accumulator along the way.  The frontier is rebalanced when skewed.  When
+    it is small, or it stays balanced for a few steps, the rest of the work is
+    finished locally inside each partition as without load balancing.  The
+    finished entries are periodically consolidated into a single cached RDD
+    with truncated lineage, so that the caches of earlier steps can be
+    released.
     """
 
     ctx = rdd.context
 
-    def wrapped(obj):
-        """Wrapped function for nest bind."""
-        vals = func(obj)
-        if vals is None:
-            return [(False, obj)]
+    curr = rdd
+    sizes = None  # Unknown for the input.
+    n_balanced = 0  # Number of consecutive balanced frontiers.
+
+    done = None  # Consolidated finished entries.
+    pending = []  # Finished entries not consolidated yet.
+    steps = []  # Cached steps not released yet.
+
+    while True:
+        if sizes is not None:
+            n_entries = sum(sizes)
+            if frontier_sizes is not None:
+                frontier_sizes.append(n_entries)
+            if n_entries == 0:
+                break
+
+            balanced = _is_balanced(sizes)
+            n_balanced = n_balanced + 1 if balanced else 0
+            if n_entries <= _NEST_BIND_LOCAL_SIZE or (
+                    n_balanced >= _NEST_BIND_BALANCED_STEPS
+            ):
+                pending.append(_nest_bind_no_balance(curr, func))
+                break
+            if not balanced:
+                curr = curr.repartition(len(sizes))
+
+        acc = _get_part_sizes_acc(ctx)
+        step_res = curr.mapPartitionsWithIndex(functools.partial(
+            _nest_bind_step, func, acc
+        ))
+        consolidate = (len(steps) + 1) % _NEST_BIND_CONSOLIDATE == 0
+        if consolidate:
+            _truncate_lineage(step_res)
+        else:
+            step_res.cache()
+        steps.append(step_res)
+
+        pending.append(step_res.filter(lambda x: not x[0]).map(
+            operator.itemgetter(1)
+        ))
+        curr = step_res.filter(lambda x: x[0]).map(operator.itemgetter(1))
+
+        if acc is None:
+            # Without accumulators, the sizes need their own job.
+            if sizes is None and frontier_sizes is not None:
+                frontier_sizes.append(rdd.count())
+            sizes = _get_part_sizes(curr)
         else:
-            return [(True, i) for i in vals]
+            step_res.foreach(_ignore)
+            n_parts = step_res.getNumPartitions()
+            if sizes is None and frontier_sizes is not None:
+                frontier_sizes.append(sum(
+                    i for i, _ in acc.value.values()
+                ))
+            sizes = [acc.value.get(i, (0, 0))[1] for i in range(n_parts)]
+
+        if consolidate:
+            done = _consolidate_rdds(ctx, done, pending)
+            pending = []
+            # Only the last step is still needed, for the frontier.
+            for i in steps[:-1]:
+                i.unpersist()
+                continue
+            steps = steps[-1:]
+
+        continue
+
+    if done is not None:
+        pending.insert(0, done)
+    if len(pending) == 0:
+        return curr
+    return ctx.union(pending)
+
+
+def _nest_bind_step(func, sizes, idx, entries):
+    """Carry out a step of balanced nest bind on a partition.
+
+    The results are tagged by if they are in the new frontier.  The numbers of
+    input entries and frontier entries of the partition are added to the
+    accumulator of the sizes when it is given.
+    """
 
-    curr = rdd
-    curr.cache()
     res = []
-    while curr.count() > 0:
-        step_res = curr.flatMap(wrapped)
-        step_res.cache()
-        new_entries = step_res.filter(lambda x: not x[0]).map(lambda x: x[1])
-        new_entries.cache()
-        res.append(new_entries)
-        curr = step_res.filter(lambda x: x[0]).map(lambda x: x[1])
-        curr.cache()
+    n_entries = 0
+    n_frontier = 0
+    for obj in entries:
+        n_entries += 1
+        vals = func(obj)
+        if vals is None:
+            res.append((False, obj))
+        else:
+            for i in vals:
+                res.append((True, i))
+                n_frontier += 1
+                continue
         continue
 
-    return ctx.union(res)
+    if sizes is not None:
+        sizes.add({idx: (n_entries, n_frontier)})
+    return res
+
+
+class _PartSizesParam:
+    """Accumulator parameter for the sizes of partitions.
+
+    The sizes are mappings from the index of the partition to its sizes.  Sizes
+    added later for a partition replace the earlier ones, so that the sizes
+    are not counted twice for re-executed tasks.
+    """
+
+    def zero(self, value):
+        """Get an empty mapping."""
+        return {}
+
+    def addInPlace(self, value1, value2):
+        """Add the sizes into the mapping."""
+        value1.update(value2)
+        return value1
+
+
+def _get_part_sizes_acc(ctx):
+    """Get a new accumulator for the sizes of partitions.
+
+    None is returned when accumulators are not supported by the context.
+    """
+    try:
+        return ctx.accumulator({}, _PartSizesParam())
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+def _ignore(_):
+    """Ignore the given entry."""
+    return
+
+
+def _get_part_sizes(rdd: RDD):
+    """Get the number of entries in each partition of the RDD."""
+    return rdd.mapPartitions(_count_entries).collect()
+
+
+def _count_entries(iterator):
+    """Count the entries in an iterator, as a singleton list."""
+    return [sum(1 for _ in iterator)]
+
+
+def _is_balanced(sizes):
+    """Test if the entries are balanced among the partitions."""
+    n_entries = sum(sizes)
+    return max(sizes) <= _NEST_BIND_BALANCE * n_entries / len(sizes)
+
+
+def _truncate_lineage(rdd: RDD):
+    """Mark the RDD to be persisted with its lineage truncated.
+
+    The truncation is done by local checkpointing when available, otherwise
+    the RDD is just cached.
+    """
+    if hasattr(rdd, 'localCheckpoint'):
+        rdd.localCheckpoint()
+    else:
+        rdd.cache()
+    return rdd
+
+
+def _consolidate_rdds(ctx, prev, rdds):
+    """Consolidate the RDDs into a single materialized RDD.
+
+    The previous consolidated RDD is released after the new one is
+    materialized.
+    """
+
+    res = ctx.union(rdds if prev is None else [prev] + list(rdds))
+    _truncate_lineage(res)
+    res.count()
+    if prev is not None:
+        prev.unpersist()
+    return res
 
 
 def _nest_bind_no_balance(rdd: RDD, func):
@@ -420,6 +617,42 @@ def prod_(obj):
         return functools.reduce(operator.mul, i, init)
 
 
+class StopwatchRecord(collections.namedtuple('StopwatchRecord', [
+    'label', 'wall_time', 'n_terms', 'n_parts', 'skew', 'peak_rss'
+])):
+    """Structured record of a timestamp from the stopwatch.
+
+    Attributes
+    ----------
+
+    label
+        The label for the step, ``Total`` for the total time.
+
+    wall_time
+        The wall time elapsed for the step, in seconds.
+
+    n_terms
+        The number of terms in the tensor given for the step, None when no
+        tensor is given.
+
+    n_parts
+        The number of partitions of the terms in the tensor, None when not
+        available.
+
+    skew
+        The ratio of the size of the largest partition of the terms to the
+        average, which is one for perfectly balanced terms.  None when not
+        available or when there are no terms.
+
+    peak_rss
+        The peak resident set size of the driver process, in bytes, None when
+        it is not available on the platform.
+
+    """
+
+    __slots__ = ()
+
+
 class Stopwatch:
     """Utility class for printing timing information.
 
@@ -427,6 +660,10 @@ class Stopwatch:
     getting and formatting the elapsed wall time between consecutive steps.
     Note that the timing here might not be accurate to one second.
 
+    Besides printing, the timestamps are also kept as structured records
+    (:py:class:`StopwatchRecord`), which can be written into JSON or CSV files
+    for tracking the performance of jobs over time.
+
     """
 
     def __init__(self, print_cb=print):
@@ -441,6 +678,7 @@ class Stopwatch:
 
         """
         self._print = print_cb
+        self._records = []
         self.tick(total=True)
 
     def tick(self, total=False):
@@ -474,36 +712,102 @@ class Stopwatch:
             When a tensor is given, it will be cached, counted its number of
             terms.  This method has this parameter since if no reduction is
             performed on the tensor, it might remain unevaluated inside Spark
-            and give misleading timing information.
+            and give misleading timing information.  The distribution of its
+            terms among the partitions is also recorded, which is not timed as
+            part of any step.
 
         """
 
         if tensor is not None:
             tensor.cache()
-            n_terms = '{} terms, '.format(tensor.n_terms)
+            n_terms = tensor.n_terms
+            n_terms_str = '{} terms, '.format(n_terms)
         else:
-            n_terms = ''
+            n_terms = None
+            n_terms_str = ''
 
         now = time.time()
         elapse = now - self._prev
-        self._prev = now
 
+        n_parts = None
+        skew = None
+        # Only tensors with distributed terms have partitions.
+        terms = getattr(tensor, 'terms', None)
+        if terms is not None:
+            sizes = _get_part_sizes(terms)
+            n_parts = len(sizes)
+            if n_terms > 0:
+                skew = max(sizes) * n_parts / n_terms
+        self._prev = time.time()
+
+        self._records.append(StopwatchRecord(
+            label=label, wall_time=elapse, n_terms=n_terms, n_parts=n_parts,
+            skew=skew, peak_rss=_get_peak_rss()
+        ))
         self._print(
-            '{} done, {}wall time: {:.2f} s'.format(label, n_terms, elapse)
+            '{} done, {}wall time: {:.2f} s'.format(label, n_terms_str, elapse)
         )
 
-    def tock_total(self):
+    def tock_total(self, filename=None):
         """Make a timestamp for the total time.
 
         The total time will be the time elapsed since the **total** time was
-        last reset.
+        last reset.  When a file name is given, all the records are written
+        into the file by :py:meth:`write_records` afterward.
         """
 
         now = time.time()
+        total = now - self._begin
+        self._records.append(StopwatchRecord(
+            label='Total', wall_time=total, n_terms=None, n_parts=None,
+            skew=None, peak_rss=_get_peak_rss()
+        ))
         self._print(
-            'Total wall time: {:.2f} s'.format(now - self._begin)
+            'Total wall time: {:.2f} s'.format(total)
         )
 
+        if filename is not None:
+            self.write_records(filename)
+
+    @property
+    def records(self):
+        """The list of records of the timestamps made."""
+        return list(self._records)
+
+    def write_records(self, filename):
+        """Write the records into a file.
+
+        The format is given by the extension of the file name, ``.json`` for a
+        JSON list of objects, and ``.csv`` for a CSV table with a header.
+        """
+
+        ext = os.path.splitext(filename)[1].lower()
+        fields = StopwatchRecord._fields
+        if ext == '.json':
+            with open(filename, 'w') as fp:
+                json.dump([
+                    dict(zip(fields, i)) for i in self._records
+                ], fp, indent=2)
+        elif ext == '.csv':
+            with open(filename, 'w', newline='') as fp:
+                writer = csv.writer(fp)
+                writer.writerow(fields)
+                writer.writerows(self._records)
+        else:
+            raise ValueError(
+                'Invalid extension', ext, 'in', filename,
+                'expecting .json or .csv'
+            )
+
+
+def _get_peak_rss():
+    """Get the peak resident set size of the current process in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # The size is given in kilobytes on Linux, but in bytes on macOS.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
 
 class CallByIndex:
     """Wrapper over callables such that they can be called by indexing.
@@ -5,15 +5,20 @@ as well as function helpful for its subclasses.
 """
 
 import abc
+import collections
 import functools
+import itertools
+import logging
 import typing
 
 from pyspark import RDD
-from sympy import Expr
+from sympy import Expr, Indexed, IndexedBase, Symbol
 
 from .drudge import Drudge
 from .term import Term, Vec, simplify_deltas_in_expr, compose_simplified_delta
-from .wickcore import compose_wick
+from .wickcore import count_wick, iter_wick
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class WickDrudge(Drudge, abc.ABC):
@@ -26,9 +31,15 @@ class WickDrudge(Drudge, abc.ABC):
 
     Normally, subclasses need to override the properties :py:attr:`phase`,
     :py:attr:`contractor`, and :py:attr:`comparator` with domain-specific
-    knowledge.
+    knowledge.  When the results of the contractor and the comparator depend
+    only on the vectors, never on the rest of the term like the amplitude,
+    subclasses can set :py:attr:`wick_cacheable` to enable the caching of the
+    Wick expansion by :py:attr:`wick_cache_size`.
     """
 
+    # If the contractor and the comparator depend only on the vectors.
+    wick_cacheable = False
+
     def __init__(self, *args, wick_parallel=0, **kwargs):
         """Initialize the Wick drudge.
 
@@ -36,6 +47,7 @@ class WickDrudge(Drudge, abc.ABC):
         """
         super().__init__(*args, **kwargs)
         self._wick_parallel = wick_parallel
+        self._wick_cache_size = 1024
 
     @property
     def wick_parallel(self):
@@ -48,15 +60,46 @@ class WickDrudge(Drudge, abc.ABC):
 
         Valid values are ``0``, for normal problems, ``1``, for harder problems,
         and ``2``, for really hard expressions containing just a few terms.
+        Or ``'auto'`` can be given, where the number of Wick schemes of each
+        term is counted, and each term is expanded according to its cost.
+        Light terms are expanded in place, terms much heavier than the average
+        are flattened and rebalanced, and the few giant terms are split across
+        the cluster.  The decision is logged on the ``drudge.wick`` logger.
 
         """
 
-        if level not in {0, 1, 2}:
+        if level not in {0, 1, 2, 'auto'}:
             raise ValueError(
                 'Invalid parallel level for Wick expansion', level
             )
         self._wick_parallel = level
 
+    @property
+    def wick_cache_size(self):
+        """The maximum number of operator strings with cached Wick expansion.
+
+        During normal ordering, terms with the same canonicalized vector part
+        share their contractions and contraction schemes, which are cached in
+        each Spark task.  None disables the caching.  The caching is only done
+        for drudges declaring by :py:attr:`wick_cacheable` that their
+        contractor and comparator depend only on the vectors, like the drudges
+        for Fock spaces.  And it is only done with the contractor and
+        comparator of the drudge, never for those given to the normal
+        ordering, like the contractor for :py:meth:`FockDrudge.eval_vev`.
+        """
+        return self._wick_cache_size
+
+    @wick_cache_size.setter
+    def wick_cache_size(self, value):
+        """Set the maximum number of cached operator strings."""
+        if isinstance(value, int) or value is None:
+            self._wick_cache_size = value
+        else:
+            raise TypeError(
+                'Invalid size for Wick cache', value,
+                'expecting integer or None'
+            )
+
     @property
     @abc.abstractmethod
     def contractor(self) -> typing.Callable[[Vec, Vec, Term], Expr]:
@@ -92,21 +135,54 @@ class WickDrudge(Drudge, abc.ABC):
         """
         pass
 
+    @property
+    def contr_mask(self):
+        """Get the evaluator of the masks of possible contractions.
+
+        When it is not None, it is going to be called with a term and the
+        resolvers before the Wick expansion of the term, to give a mask where
+        ``mask[i][j]`` is false when the contraction of the i-th vector with
+        the j-th vector by :py:attr:`contractor` is known to be zero, so that
+        the contractor is never called for the pair.  It is only used with the
+        default contractor.  By default, no mask is used.
+        """
+        return None
+
     def normal_order(self, terms: RDD, **kwargs):
         """Normal order the terms according to generalized Wick theorem.
 
         The actual expansion is based on the information given in the subclasses
-        by the abstract properties.
+        by the abstract properties.  When the comparator is explicitly given as
+        None, only the fully-contracted terms are kept.  Then by giving some
+        indexed bases as ``connected``, each factor with these bases in the
+        amplitude of a term is taken as a vertex, and only the contractions
+        connecting all the vertices of the term are included.  The vectors
+        sharing summation dummies with the vertices are the lines to be
+        contracted for them.
 
         """
+        # Given contractors and comparators might depend on more than the
+        # shape of the operator strings.
+        builtin = 'contractor' not in kwargs and kwargs.get(
+            'comparator'
+        ) is None
         comparator = kwargs.pop('comparator', self.comparator)
+        contr_mask = self.contr_mask if 'contractor' not in kwargs else None
         contractor = kwargs.pop('contractor', self.contractor)
+        connected = kwargs.pop('connected', None)
         if len(kwargs) != 0:
             raise ValueError(
                 'Invalid arguments to Wick normal order', kwargs
             )
 
-        phase = self.phase
+        if connected is not None:
+            if comparator is not None:
+                raise ValueError(
+                    'Invalid comparator for connected contractions',
+                    comparator, 'expecting None for full contractions'
+                )
+            connected = _get_connected_bases(connected)
+
         symms = self.symms
         resolvers = self.resolvers
 
@@ -114,57 +190,299 @@ class WickDrudge(Drudge, abc.ABC):
         terms_to_proc = terms.filter(lambda x: len(x.vecs) > 1)
         keep_top = 0 if comparator is None else 1
         terms_to_keep = terms.filter(lambda x: len(x.vecs) <= keep_top)
+        if connected is not None:
+            terms_to_keep = terms_to_keep.filter(
+                lambda x: _get_contr_groups(x, connected) is not None
+            )
         terms_to_proc.cache()
         if terms_to_proc.count() == 0:
             return terms_to_keep
 
+        cache = self._get_wick_cache(builtin)
+
         # Triples: term, contractions, schemes.
-        wick_terms = terms_to_proc.map(lambda x: _prepare_wick(
-            x, comparator, contractor, symms.value, resolvers.value
-        ))
+        prepare = functools.partial(
+            self._map_traced, label='prepare_wick',
+            func=lambda x: _prepare_wick(
+                x, comparator, contractor, symms.value, resolvers.value, cache,
+                contr_mask, connected
+            )
+        )
+        wick_terms = self._run_stage('wick_prepare', terms_to_proc, prepare)
+        normal_ordered = self._expand_wick(wick_terms)
 
-        if self._wick_parallel == 0:
+        return terms_to_keep.union(normal_ordered)
 
-            normal_ordered = wick_terms.flatMap(lambda x: [
-                _form_term_from_wick(x[0], x[1], phase, resolvers.value, i)
-                for i in x[2]
-            ])
+    def _contr_all_of_prod(self, operands, contractor=None, connected=None):
+        """Fully contract the products of the terms of some operands.
 
-        elif self._wick_parallel == 1:
+        The operands are given as tensors, whose products are taken in the
+        given order.  Each of them should already be normal-ordered with
+        respect to the vacuum of the contractor, so that only the contractions
+        between vectors from different operands are attempted.  When the
+        contractor is not given, the default contractor of the drudge is used.
+        The connected bases are the same as in :py:meth:`normal_order`.
+        """
 
-            flattened = wick_terms.flatMap(
-                lambda x: [(x[0], x[1], i) for i in x[2]]
+        builtin = contractor is None
+        contr_mask = self.contr_mask if builtin else None
+        contractor = self.contractor if builtin else contractor
+        if connected is not None:
+            connected = _get_connected_bases(connected)
+
+        symms = self.symms
+        resolvers = self.resolvers
+        dumms = self.dumms
+
+        free_vars = set.union(*[i.free_vars for i in operands])
+
+        # Pairs of product terms and the numbers of vectors from the operands.
+        # Small operands are joined by broadcasting, like in the products of
+        # tensors.
+        threshold = self.bcast_join_threshold
+        prods = None
+        prods_local = None
+        for operand in operands:
+            terms = operand.terms
+            local = None
+            if threshold is not None:
+                local = operand._get_terms_within(threshold)
+            if prods is None:
+                prods = terms.map(lambda x: (x, (len(x.vecs),)))
+                if local is not None:
+                    prods_local = [(i, (len(i.vecs),)) for i in local]
+            else:
+                prods = self._join_rdds(
+                    prods, terms, prods_local, local
+                ).map(lambda x: (
+                    x[0][0].mul_term(
+                        x[1], dumms=dumms.value, excl=free_vars
+                    ), x[0][1] + (len(x[1].vecs),)
+                ))
+                prods_local = None
+            continue
+
+        prods.cache()
+        to_proc = prods.filter(lambda x: len(x[0].vecs) > 1)
+        to_keep = prods.keys().filter(lambda x: len(x.vecs) == 0)
+        if connected is not None:
+            to_keep = to_keep.filter(
+                lambda x: _get_contr_groups(x, connected) is not None
             )
-            if self._num_partitions is not None:
-                flattened = flattened.repartition(self._num_partitions)
-
-            normal_ordered = flattened.map(lambda x: _form_term_from_wick(
-                x[0], x[1], phase, resolvers.value, x[2]
-            ))
-
-        elif self._wick_parallel == 2:
-
-            # This level of parallelism is reserved for really hard problems.
-            expanded = []
-            for term, contrs, schemes in wick_terms.collect():
-                # To work around a probable Spark bug.  Problem occurs when we
-                # have closures inside a loop to be distributed out.
-                form_term = functools.partial(
-                    _form_term_from_wick_bcast, term, contrs, phase, resolvers
-                )
+        to_proc.cache()
+        if to_proc.count() == 0:
+            return to_keep
+
+        cache = self._get_wick_cache(builtin)
+
+        # Only the product term is recorded for the tracing, without the
+        # numbers of vectors from the operands.
+        prepare = functools.partial(
+            self._map_traced, label='prepare_wick',
+            func=lambda x: _prepare_wick(
+                x[0], None, contractor, symms.value, resolvers.value, cache,
+                contr_mask, connected, x[1]
+            ), get_term=lambda x: x[0]
+        )
+        wick_terms = self._run_stage('wick_prepare', to_proc, prepare)
+        contred = self._expand_wick(wick_terms)
 
-                curr = self._ctx.parallelize(schemes).map(form_term)
-                expanded.append(curr)
-                continue
+        return to_keep.union(contred)
 
-            normal_ordered = self._ctx.union(expanded)
+    def _get_wick_cache(self, builtin):
+        """Get the cache for the Wick expansion of operator strings.
 
+        The cache is only used with the contractor and comparator of the
+        drudge itself, when the drudge declares that the contractions and
+        schemes by them depend only on the shape of the operator strings.  None
+        is returned for given contractors or comparators, which are called with
+        the whole term.
+        """
+        size = self._wick_cache_size
+        if size is None or not builtin or not self.wick_cacheable:
+            return None
+        return _WickCache(size)
+
+    def _expand_wick(self, wick_terms: RDD):
+        """Expand the Wick terms by the parallel level of the drudge."""
+
+        level = self._wick_parallel
+        if level == 0:
+            expand = self._expand_wick_in_place
+        elif level == 1:
+            expand = self._expand_wick_flattened
+        elif level == 2:
+            expand = self._expand_wick_split
+        elif level == 'auto':
+            expand = self._expand_wick_auto
         else:
             raise ValueError(
-                'Invalid Wick expansion parallel level', self._wick_parallel
+                'Invalid Wick expansion parallel level', level
             )
+        return self._run_stage('wick_expand', wick_terms, expand)
+
+    def _normal_order_again(self, terms: RDD, **kwargs):
+        """Normal order again the terms not proven to be normal-ordered.
+
+        The substitutions from the contractions in Wick expansion can break the
+        normal order of the resulted terms after their re-canonicalization.
+        Here the terms whose canonicalized form is already normal-ordered are
+        finished directly, with only the rest going through another pass of
+        Wick expansion.  The arguments are the same as :py:meth:`normal_order`.
+
+        The numbers of the terms checked and of the terms taking the second
+        pass are recorded by the stages ``check_normal_order`` and
+        ``second_wick_pass`` when profiling is turned on, and logged when
+        debug logging is enabled.  Otherwise, they are not counted.  The
+        result is cached and materialized, so that the cache of the checked
+        terms shared by the two passes can be released.
+        """
 
-        return terms_to_keep.union(normal_ordered)
+        comparator = kwargs.get('comparator', self.comparator)
+        if comparator is None:
+            # All vectors are already contracted.
+            return terms
+
+        symms = self.symms
+        resolvers = self.resolvers
+        phase = self.phase
+
+        checked = self._run_stage(
+            'check_normal_order', terms, lambda x: x.map(
+                lambda y: _check_normal_order(
+                    y, comparator, symms.value, phase, resolvers.value
+                )
+            )
+        )
+        checked.cache()
+        done = checked.filter(lambda x: x[0]).values()
+        pending = checked.filter(lambda x: not x[0]).values()
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                'Another pass of Wick expansion for %d out of %d terms',
+                pending.count(), checked.count()
+            )
+
+        redone = self._run_stage(
+            'second_wick_pass', pending,
+            functools.partial(WickDrudge.normal_order, self, **kwargs)
+        )
+        res = done.union(redone)
+        res.cache()
+        res.count()
+        checked.unpersist()
+        return res
+
+    def _expand_wick_in_place(self, wick_terms: RDD):
+        """Expand the Wick terms where they are."""
+
+        phase = self.phase
+        resolvers = self.resolvers
+
+        return wick_terms.flatMap(lambda x: (
+            _form_term_from_wick(x[0], x[1], phase, resolvers.value, i)
+            for i in x[2]
+        ))
+
+    def _expand_wick_flattened(self, wick_terms: RDD):
+        """Expand the Wick terms with the schemes flattened and rebalanced."""
+
+        phase = self.phase
+        resolvers = self.resolvers
+
+        flattened = wick_terms.flatMap(
+            lambda x: ((x[0], x[1], i) for i in x[2])
+        )
+        if self._num_partitions is not None:
+            flattened = flattened.repartition(self._num_partitions)
+
+        return flattened.map(lambda x: _form_term_from_wick(
+            x[0], x[1], phase, resolvers.value, x[2]
+        ))
+
+    def _expand_wick_split(self, wick_terms: RDD):
+        """Expand the Wick terms with the schemes of each term distributed.
+
+        Only the indices of the batches of the schemes of each term are
+        distributed, with the schemes in the batches enumerated by the
+        workers.  So the possibly streamed schemes of the terms are never
+        gathered in the driver.
+        """
+
+        # This level of parallelism is reserved for really hard problems.
+        phase = self.phase
+        resolvers = self.resolvers
+
+        ctx = wick_terms.context
+        n_parts = self._num_partitions
+        if n_parts is None:
+            n_parts = ctx.defaultParallelism
+        expanded = []
+        for term, contrs, schemes in wick_terms.collect():
+            # To work around a probable Spark bug.  Problem occurs when we
+            # have closures inside a loop to be distributed out.
+            form_term = functools.partial(
+                _form_term_from_wick_bcast, term, contrs, phase, resolvers
+            )
+
+            batch_size = max(-(-len(schemes) // n_parts), 1)
+            n_batches = -(-len(schemes) // batch_size)
+            curr = ctx.parallelize(range(n_batches), n_parts).mapPartitions(
+                functools.partial(_get_wick_batches, schemes, batch_size)
+            ).map(form_term)
+            expanded.append(curr)
+            continue
+
+        return ctx.union(expanded)
+
+    def _expand_wick_auto(self, wick_terms: RDD):
+        """Expand the Wick terms according to their number of schemes.
+
+        The Wick terms are cached for the counting of their schemes and the
+        expansion of each class of them.  The expanded terms are cached and
+        materialized, so that the cache of the Wick terms can be released.
+        """
+
+        wick_terms.cache()
+        counts = wick_terms.map(lambda x: len(x[2])).collect()
+
+        n_parts = self._num_partitions
+        if n_parts is None:
+            n_parts = wick_terms.context.defaultParallelism
+        medium_limit, giant_limit = _get_wick_cost_limits(counts, n_parts)
+
+        light = [i for i in counts if i <= medium_limit]
+        medium = [i for i in counts if medium_limit < i <= giant_limit]
+        giant = [i for i in counts if i > giant_limit]
+        _LOGGER.info(
+            'Automatic Wick expansion of %d schemes from %d terms: '
+            '%d light terms with %d schemes expanded in place, '
+            '%d medium terms with %d schemes flattened, '
+            '%d giant terms with %d schemes split',
+            sum(counts), len(counts), len(light), sum(light),
+            len(medium), sum(medium), len(giant), sum(giant)
+        )
+
+        expanded = []
+        if len(light) > 0:
+            expanded.append(self._expand_wick_in_place(wick_terms.filter(
+                lambda x: len(x[2]) <= medium_limit
+            )))
+        if len(medium) > 0:
+            expanded.append(self._expand_wick_flattened(wick_terms.filter(
+                lambda x: medium_limit < len(x[2]) <= giant_limit
+            )))
+        if len(giant) > 0:
+            expanded.append(self._expand_wick_split(wick_terms.filter(
+                lambda x: len(x[2]) > giant_limit
+            )))
+
+        res = wick_terms.context.union(expanded)
+        res.cache()
+        res.count()
+        wick_terms.unpersist()
+        return res
 
 
 #
@@ -172,36 +490,334 @@ class WickDrudge(Drudge, abc.ABC):
 #
 
 
-def _prepare_wick(term, comparator, contractor, symms, resolvers):
+# Terms with no more schemes than this are never moved for Wick expansion.
+_WICK_AUTO_LIGHT = 64
+
+# Terms with no more schemes than this are never split across the cluster.
+_WICK_AUTO_GIANT = 4096
+
+
+def _get_wick_cost_limits(counts, n_parts):
+    """Get the limits of the number of schemes for automatic Wick expansion.
+
+    Terms with more schemes than the first limit are considered to be medium,
+    which is a few times the average, so that they need to be rebalanced.
+    Terms having more than the second limit are giant, where a single term
+    takes a larger share of the work than a partition.
+    """
+
+    total = sum(counts)
+    medium_limit = max(_WICK_AUTO_LIGHT, 4 * total // max(len(counts), 1))
+    giant_limit = max(_WICK_AUTO_GIANT, total // max(n_parts, 1))
+    return medium_limit, max(medium_limit, giant_limit)
+
+
+def _prepare_wick(term, comparator, contractor, symms, resolvers, cache=None,
+                  contr_mask=None, connected=None, segments=None):
     """Prepare a term for Wick expansion.
 
     The possibly pro-processed term, all the contractions, and all contraction
-    schemes will be returned for the term.
+    schemes will be returned for the term.  When a cache is given, the
+    contractions and schemes are reused for terms with the same shape.  When
+    an evaluator of contraction masks is given, the contractor is only called
+    for the pairs of vectors not masked.  When the bases of the vertices to be
+    connected are given, only the schemes connecting all the vertices are
+    generated.  When the numbers of vectors in consecutive normal-ordered
+    segments of the term are given, the vectors in the same segment are never
+    contracted.
     """
 
     symms = {} if symms is None else symms
     contr_all = comparator is None
 
+    if not contr_all:
+        term = term.canon4normal(symms)
+
+    groups = None
+    if connected is not None:
+        groups = _get_contr_groups(term, connected)
+        if groups is None:
+            # No scheme can connect all the vertices.
+            return term, [], []
+
+    if cache is not None:
+        key = (
+            _get_wick_shape(term), None if groups is None else tuple(groups),
+            segments
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return (term,) + cached
+
+    mask = None if contr_mask is None else contr_mask(term, resolvers)
+    if segments is not None:
+        mask = _mask_segments(mask, segments)
+
     if contr_all:
-        contrs = _get_all_contrs(term, contractor, resolvers=resolvers)
+        contrs = _get_all_contrs(
+            term, contractor, resolvers=resolvers, mask=mask
+        )
         vec_order = None
     else:
-        term = term.canon4normal(symms)
         vec_order, contrs = _sort_vecs(
-            term, comparator, contractor, resolvers=resolvers
+            term, comparator, contractor, resolvers=resolvers, mask=mask
         )
 
-    # schemes = _compute_wick_schemes(vec_order, contrs)
-    schemes = compose_wick(vec_order, contrs)
+    schemes = _get_wick_schemes(vec_order, contrs, groups)
+
+    if cache is not None:
+        cache.put(key, (contrs, schemes))
 
     return term, contrs, schemes
 
 
-def _sort_vecs(term, comparator, contractor, resolvers):
+def _check_normal_order(term, comparator, symms, phase, resolvers):
+    """Check if a term is proven to be normal-ordered.
+
+    A pair of the result and the term is returned.  For proven terms, the term
+    is given in the form from another pass of Wick expansion, where only the
+    trivial scheme without any contraction is possible.
+    """
+
+    if len(term.vecs) < 2:
+        return True, term
+
+    canon_term = term.canon4normal(symms)
+    vecs = canon_term.vecs
+    n_vecs = len(vecs)
+    if all(
+            comparator(vecs[i], vecs[i + 1], canon_term)
+            for i in range(n_vecs - 1)
+    ):
+        return True, _form_term_from_wick(
+            canon_term, None, phase, resolvers, (list(range(n_vecs)), 0)
+        )
+    else:
+        return False, term
+
+
+# Terms with more Wick schemes than this have their schemes streamed.
+_WICK_STREAM_THRESHOLD = 4096
+
+
+def _get_wick_schemes(vec_order, contrs, groups=None):
+    """Get the Wick expansion schemes.
+
+    The schemes are enumerated up to one beyond the streaming threshold.  When
+    there are no more of them, which is the common case, the enumerated
+    schemes are returned in a list.  Otherwise, the schemes are counted, and a
+    lazy sequence is returned to generate the schemes in batches during the
+    iteration, so that they never need to be all in memory.  The groups of the
+    vectors to be connected are forwarded to the core module.
+    """
+
+    first = next(iter_wick(
+        vec_order, contrs, batch_size=_WICK_STREAM_THRESHOLD + 1,
+        groups=groups
+    ), [])
+    if len(first) <= _WICK_STREAM_THRESHOLD:
+        return first
+
+    n_schemes = count_wick(vec_order, contrs, groups)
+    return _WickSchemes(vec_order, contrs, n_schemes, groups)
+
+
+class _WickSchemes:
+    """Lazy sequence of Wick expansion schemes.
+
+    The schemes are generated in batches by the core module on each iteration.
+    """
+
+    __slots__ = [
+        '_vec_order',
+        '_contrs',
+        '_n_schemes',
+        '_groups'
+    ]
+
+    def __init__(self, vec_order, contrs, n_schemes, groups=None):
+        """Initialize the lazy sequence."""
+        self._vec_order = vec_order
+        self._contrs = contrs
+        self._n_schemes = n_schemes
+        self._groups = groups
+
+    def __len__(self):
+        """Get the number of schemes."""
+        return self._n_schemes
+
+    def __iter__(self):
+        """Iterate over the schemes."""
+        for batch in iter_wick(
+                self._vec_order, self._contrs, groups=self._groups
+        ):
+            yield from batch
+            continue
+
+    def __getstate__(self):
+        """Get the state for serialization."""
+        return self._vec_order, self._contrs, self._n_schemes, self._groups
+
+    def __setstate__(self, state):
+        """Set the state from serialization."""
+        (
+            self._vec_order, self._contrs, self._n_schemes, self._groups
+        ) = state
+
+
+def _get_connected_bases(connected):
+    """Get the set of the bases of the vertices to be connected."""
+
+    connected = frozenset(connected)
+    for i in connected:
+        if not isinstance(i, IndexedBase):
+            raise TypeError(
+                'Invalid base for connected contractions', i,
+                'expecting indexed base'
+            )
+        continue
+    return connected
+
+
+def _mask_segments(mask, segments):
+    """Mask out the contractions inside the given segments of vectors.
+
+    The numbers of vectors in the segments are given, with the given mask for
+    all vectors, possibly None, refined.
+    """
+
+    seg_idxes = [i for i, v in enumerate(segments) for _ in range(v)]
+    return [
+        [
+            i != j and (mask is None or mask[k][l])
+            for l, j in enumerate(seg_idxes)
+        ]
+        for k, i in enumerate(seg_idxes)
+    ]
+
+
+def _get_contr_groups(term: Term, connected):
+    """Get the groups of the vectors in a term for connected contractions.
+
+    Each factor in the amplitude with its indexed base among the given ones is
+    a vertex, with the vertices sharing summation dummies put into the same
+    group.  The index of the group for each vector is returned, or None for
+    vectors not sharing summation dummies with any vertex.  When there are
+    multiple groups and some of them has no vector, None is returned, since no
+    contraction can connect the groups.
+    """
+
+    dumms = term.dumms
+
+    vertices = []
+    for factor in term.amp.atoms(Indexed):
+        if factor.base not in connected:
+            continue
+        symbs = {
+            j for i in factor.indices for j in i.atoms(Symbol) if j in dumms
+        }
+        rest = []
+        for i in vertices:
+            if i.isdisjoint(symbs):
+                rest.append(i)
+            else:
+                symbs |= i
+            continue
+        rest.append(symbs)
+        vertices = rest
+        continue
+
+    groups = []
+    for vec in term.vecs:
+        symbs = {
+            j for i in vec.indices for j in i.atoms(Symbol) if j in dumms
+        }
+        groups.append(next((
+            i for i, v in enumerate(vertices) if not v.isdisjoint(symbs)
+        ), None))
+        continue
+
+    if len(vertices) > 1 and len(set(groups) - {None}) < len(vertices):
+        return None
+    return groups
+
+
+def _get_wick_shape(term: Term):
+    """Get the shape of the vector part of a term for Wick expansion.
+
+    The shape contains the vectors and the summations over their indices.  The
+    terms are assumed to be already canonicalized with the dummies reset, so
+    that operator strings differing only by dummy names give the same shape.
+    For built-in algebras, the contractions and the normal order depend only
+    on the shape.
+    """
+
+    symbs = set()
+    for vec in term.vecs:
+        for i in vec.indices:
+            symbs |= i.atoms(Symbol)
+            continue
+        continue
+
+    return term.vecs, frozenset(
+        (dumm, range_) for dumm, range_ in term.sums if dumm in symbs
+    )
+
+
+class _WickCache:
+    """Least-recently-used cache for the Wick expansion of operator strings.
+
+    The contractions and schemes for each shape are cached.  Cached entries are
+    discarded on serialization, so that each Spark task gets a fresh cache.
+    """
+
+    __slots__ = [
+        '_size',
+        '_entries',
+        'hits',
+        'misses'
+    ]
+
+    def __init__(self, size):
+        """Initialize the cache."""
+        self._size = size
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get the cached value for the given shape, None if absent."""
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+        else:
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Put a value into the cache."""
+        entries = self._entries
+        entries[key] = value
+        if len(entries) > self._size:
+            entries.popitem(last=False)
+        return
+
+    def __getstate__(self):
+        """Get the state for serialization, with the entries dropped."""
+        return self._size
+
+    def __setstate__(self, state):
+        """Set the state from serialization."""
+        self.__init__(state)
+
+
+def _sort_vecs(term, comparator, contractor, resolvers, mask=None):
     """Sort the vectors and get the contraction values.
 
     Here insertion sort is used to sort the vectors into the normal order
-    required by the comparator.
+    required by the comparator.  Pairs masked out are not contracted.
     """
 
     vecs = term.vecs
@@ -227,9 +843,13 @@ def _sort_vecs(term, comparator, contractor, resolvers):
             prev_vec = vecs[prev_i]
             vec_order[prev], vec_order[pivot] = pivot_i, prev_i
 
-            contr_amp, contr_substs = simplify_deltas_in_expr(
-                sums_dict, contractor(prev_vec, pivot_vec, term), resolvers
-            )
+            if mask is not None and not mask[prev_i][pivot_i]:
+                contr_amp = 0
+            else:
+                contr_amp, contr_substs = simplify_deltas_in_expr(
+                    sums_dict, contractor(prev_vec, pivot_vec, term),
+                    resolvers
+                )
             if contr_amp != 0:
                 contrs[prev_i][pivot_i] = (
                     contr_amp, tuple(contr_substs.items())
@@ -241,12 +861,12 @@ def _sort_vecs(term, comparator, contractor, resolvers):
     return vec_order, contrs
 
 
-def _get_all_contrs(term, contractor, resolvers):
+def _get_all_contrs(term, contractor, resolvers, mask=None):
     """Generate all possible contractions.
 
     This function is going to be called when we do not actually need to normal
     order the vectors and only need the results where all the vectors are
-    contracted.
+    contracted.  Pairs masked out are skipped.
     """
 
     vecs = term.vecs
@@ -257,6 +877,8 @@ def _get_all_contrs(term, contractor, resolvers):
     for i in range(n_vecs):
         curr_contrs = {}
         for j in range(i, n_vecs):
+            if mask is not None and not mask[i][j]:
+                continue
             vec_prev = vecs[i]
             vec_lat = vecs[j]
             contr_amp, contr_substs = simplify_deltas_in_expr(
@@ -271,72 +893,6 @@ def _get_all_contrs(term, contractor, resolvers):
     return contrs
 
 
-def _compute_wick_schemes(vec_order, contrs):
-    """Compute all the Wick expansion schemes.
-
-    The vector order should be a sequence giving indices of vectors.  When it is
-    None, it means that all vectors needs to be contracted.  The contractions
-    should be a sequence of hash maps giving the amplitude and substitution of
-    each contraction.
-
-    The expansion result is a list of pairs, with the first field holding the
-    permutation of the given vectors for the contraction term, and the second
-    being the number of vectors contracted. Adjacent pairs in the first section
-    are are contracted, and the second section contains the remaining vectors
-    ordered as in the given vector order.
-    """
-
-    schemes = []
-    avail = [True for _ in contrs]
-    _add_wick(schemes, avail, 0, [], vec_order, contrs)
-    return schemes
-
-
-def _add_wick(schemes, avail, pivot, contred, vec_order, contrs):
-    """Add Wick expansion schemes recursively."""
-
-    n_vecs = len(avail)
-    contr_all = vec_order is None
-
-    # Find the actual pivot, which has to be available.
-    try:
-        # Last vector can never be pivot.
-        pivot = next(i for i in range(pivot, n_vecs - 1) if avail[i])
-    except StopIteration:
-        # When everything is already decided, add the current term.
-        if not contr_all or all(not i for i in avail):
-            vec_perm = list(contred)
-            if not contr_all:
-                vec_perm.extend(i for i in vec_order if avail[i])
-            schemes.append((
-                vec_perm, len(contred)
-            ))
-        return
-
-    pivot_contrs = contrs[pivot]
-    if contr_all and len(pivot_contrs) == 0:
-        return
-
-    if not contr_all:
-        _add_wick(schemes, avail, pivot + 1, contred, vec_order, contrs)
-
-    avail[pivot] = False
-    for vec_idx in range(pivot + 1, n_vecs):
-        if avail[vec_idx] and vec_idx in pivot_contrs:
-            avail[vec_idx] = False
-            contred.extend([pivot, vec_idx])
-            _add_wick(
-                schemes, avail, pivot + 1, contred, vec_order, contrs
-            )
-            avail[vec_idx] = True
-            contred.pop()
-            contred.pop()
-        continue
-
-    avail[pivot] = True
-    return
-
-
 def _form_term_from_wick(term, contrs, phase, resolvers, wick_scheme):
     """Generate a full Term from a Wick expansion scheme.
     """
@@ -362,6 +918,20 @@ def _form_term_from_wick(term, contrs, phase, resolvers, wick_scheme):
     )
 
 
+def _get_wick_batches(schemes, batch_size, idxes):
+    """Get the Wick schemes in the batches with the given indices.
+
+    The indices are assumed to be contiguous, like in a partition of a
+    parallelized range, so that the schemes can be enumerated in one pass.
+    """
+    idxes = list(idxes)
+    if len(idxes) == 0:
+        return iter(())
+    return itertools.islice(
+        schemes, idxes[0] * batch_size, (idxes[-1] + 1) * batch_size
+    )
+
+
 def _form_term_from_wick_bcast(term, contrs, phase, resolvers, wick_scheme):
     """Form term from Wick scheme with broadcast resolvers.
 
@@ -7,6 +7,7 @@
 #include <algorithm>
 #include <cassert>
 #include <cstddef>
+#include <map>
 #include <vector>
 
 #include <Python.h>
@@ -24,166 +25,376 @@ using Vecs = std::vector<size_t>;
 
 using Contrs = std::vector<Vecs>;
 
+/** Marker for vectors not in any group.
+ */
+
+static const size_t NO_GROUP = static_cast<size_t>(-1);
+
 //
 // Internal functions
 // ==================
 //
 
-/** Add Wick schemes recursively.
+/** Enumerator of Wick schemes.
  *
- * This is the core recursive function.  Zero will be returned on success.
+ * This is a non-recursive translation of the recursive Python function, with
+ * the decision tree kept in an explicit stack, so that the enumeration can be
+ * suspended after each scheme is found.  The schemes come in exactly the same
+ * order as the recursive version.
+ *
+ * Optionally, the vectors can be put into groups when all vectors are to be
+ * contracted, so that only the schemes connecting all the groups by their
+ * contractions are enumerated.  The groups linked by the contractions so far
+ * are tracked by a disjoint-set forest, and branches where some group can no
+ * longer be linked to the others are pruned.
  */
 
-static int add_wick(PyObject* schemes, std::vector<bool>& avail, size_t pivot,
-    Vecs& contred, const Vecs& vec_order, const Contrs& contrs)
-{
-    size_t n_vecs = avail.size();
-    bool contr_all = vec_order.empty();
-
-    // Find the actual pivot, which has to be available.
-    //
-    // pivot = next(i for i in range(pivot, n_vecs - 1) if avail[i])
-    for (; pivot < n_vecs && !avail[pivot]; ++pivot) {
+class Wick_enum {
+public:
+    /** Initializes the enumerator.
+     *
+     * An empty vector order indicates that all vectors need to be contracted.
+     * The groups of the vectors, when given, should have one entry for each
+     * vector, with NO_GROUP for vectors not in any group.
+     */
+
+    Wick_enum(Vecs vec_order, Contrs contrs, Vecs groups = {})
+        : vec_order_(std::move(vec_order))
+        , contrs_(std::move(contrs))
+        , avail_(contrs_.size(), true)
+        , contred_{}
+        , stack_{}
+        , groups_(std::move(groups))
+        , parent_{}
+        , sizes_{}
+        , contr_all_(vec_order_.empty())
+        , started_(false)
+    {
+        // The group indices are made contiguous, so that only groups with
+        // vectors are present.
+        std::map<size_t, size_t> dense{};
+        for (auto& i : groups_) {
+            if (i == NO_GROUP) {
+                continue;
+            }
+            auto entry = dense.emplace(i, parent_.size());
+            if (entry.second) {
+                parent_.push_back(parent_.size());
+            }
+            i = entry.first->second;
+        }
+        sizes_.assign(parent_.size(), 1);
     }
 
-    if (pivot == n_vecs) {
-        // When everything is decided.
+    /** Advances to the next scheme.
+     *
+     * False is returned when all schemes have been enumerated.
+     */
+
+    bool next()
+    {
+        if (!started_) {
+            started_ = true;
+            if (call(0)) {
+                return true;
+            }
+        }
 
-        if (!contr_all || std::none_of(avail.begin(), avail.end(),
-                              [](bool i) { return i; })) {
+        while (!stack_.empty()) {
+            Frame& frame = stack_.back();
+            size_t pivot = frame.pivot;
 
-            PyObject* scheme = PyTuple_New(2);
-            if (scheme == NULL) {
-                return 1;
+            if (!frame.contr_started) {
+                frame.contr_started = true;
+                if (!contr_all_) {
+                    // The branch with the pivot not contracted comes first.
+                    if (call(pivot + 1)) {
+                        return true;
+                    }
+                    continue;
+                }
             }
 
-            PyObject* perm = PyList_New(n_vecs);
-            if (perm == NULL) {
-                Py_DECREF(scheme);
-                return 1;
+            if (!frame.pivot_taken) {
+                frame.pivot_taken = true;
+                avail_[pivot] = false;
+                contred_.push_back(pivot);
             }
-            PyTuple_SET_ITEM(scheme, 0, perm); // Ownership of perm is stolen.
 
-            size_t n_contred = contred.size();
-            PyObject* n_contred_py = PyLong_FromSize_t(n_contred);
-            if (n_contred_py == NULL) {
-                Py_DECREF(scheme);
-                return 1;
-            }
-            PyTuple_SET_ITEM(scheme, 1, n_contred_py);
-
-            size_t i = 0; // Next index to write vector to.
-            for (; i < n_contred; ++i) {
-                PyObject* curr_vec = PyLong_FromSize_t(contred[i]);
-                if (curr_vec == NULL) {
-                    Py_DECREF(scheme);
-                    return 1;
+            if (frame.curr_vec != n_vecs()) {
+                avail_[frame.curr_vec] = true;
+                contred_.pop_back();
+                frame.curr_vec = n_vecs();
+                if (frame.merged != NO_GROUP) {
+                    split_group(frame.merged);
+                    frame.merged = NO_GROUP;
                 }
-                PyList_SET_ITEM(perm, i, curr_vec);
             }
 
-            // This loop will be can skipped when all vectors are contracted.
-            if (!contr_all) {
-                for (auto j = vec_order.begin(); j != vec_order.end(); ++j) {
-                    size_t vec_idx = *j;
-                    if (avail[vec_idx]) {
-                        PyObject* curr_vec = PyLong_FromSize_t(vec_idx);
-                        if (curr_vec == NULL) {
-                            Py_DECREF(scheme);
-                            return 1;
-                        }
-                        PyList_SET_ITEM(perm, i++, curr_vec);
-                    }
-                };
+            const auto& pivot_contrs = contrs_[pivot];
+            for (; frame.next_contr < pivot_contrs.size()
+                 && !avail_[pivot_contrs[frame.next_contr]];
+                 ++frame.next_contr) {
             }
 
-            assert(i == n_vecs);
-
-            auto stat = PyList_Append(schemes, scheme);
-            if (stat != 0) {
-                return 1;
+            if (frame.next_contr == pivot_contrs.size()) {
+                avail_[pivot] = true;
+                contred_.pop_back();
+                stack_.pop_back();
+                continue;
             }
 
-            Py_DECREF(scheme);
+            size_t vec_idx = pivot_contrs[frame.next_contr++];
+            avail_[vec_idx] = false;
+            contred_.push_back(vec_idx);
+            frame.curr_vec = vec_idx;
+            frame.merged = merge_groups(pivot, vec_idx);
+            if (call(pivot + 1)) {
+                return true;
+            }
         }
 
-        return 0;
+        return false;
     }
 
-    const auto& pivot_contrs = contrs[pivot];
-    if (contr_all && pivot_contrs.empty()) {
-        return 0;
+    /** Gets the number of vectors.
+     */
+
+    size_t n_vecs() const { return avail_.size(); }
+
+    /** Gets the vectors contracted in the current scheme.
+     */
+
+    const Vecs& contred() const { return contred_; }
+
+    /** Writes the permutation of vectors for the current scheme.
+     *
+     * The contracted vectors come first, then the uncontracted vectors in the
+     * given vector order.
+     */
+
+    template <typename F> void write_perm(F write) const
+    {
+        for (auto i : contred_) {
+            write(i);
+        }
+        if (!contr_all_) {
+            for (auto i : vec_order_) {
+                if (avail_[i]) {
+                    write(i);
+                }
+            }
+        }
     }
 
-    if (!contr_all) {
-        add_wick(schemes, avail, pivot + 1, contred, vec_order, contrs);
+private:
+    /** A node in the decision tree.
+     */
+
+    struct Frame {
+        size_t pivot;
+        size_t next_contr;
+        size_t curr_vec;
+        bool contr_started;
+        bool pivot_taken;
+        size_t merged; // Root group merged by the current contraction.
+    };
+
+    /** Enters the decision for the given pivot.
+     *
+     * True is returned when a scheme is reached directly.
+     */
+
+    bool call(size_t pivot)
+    {
+        size_t n_vecs = avail_.size();
+
+        if (!can_connect()) {
+            return false;
+        }
+
+        // Find the actual pivot, which has to be available.
+        for (; pivot < n_vecs && !avail_[pivot]; ++pivot) {
+        }
+
+        if (pivot == n_vecs) {
+            // When everything is decided.
+            return !contr_all_
+                || std::none_of(
+                       avail_.begin(), avail_.end(), [](bool i) { return i; });
+        }
+
+        if (contr_all_ && contrs_[pivot].empty()) {
+            return false;
+        }
+
+        stack_.push_back({ pivot, 0, n_vecs, false, false, NO_GROUP });
+        return false;
     }
 
-    avail[pivot] = false;
-    contred.push_back(pivot);
-    std::for_each(pivot_contrs.begin(), pivot_contrs.end(), [&](auto vec_idx) {
-        if (avail[vec_idx]) {
-            avail[vec_idx] = false;
-            contred.push_back(vec_idx);
+    /** Finds the root of the set containing a group.
+     *
+     * No path compression is done, so that merges can be undone.
+     */
 
-            add_wick(schemes, avail, pivot + 1, contred, vec_order, contrs);
+    size_t find_group(size_t group) const
+    {
+        while (parent_[group] != group) {
+            group = parent_[group];
+        }
+        return group;
+    }
 
-            avail[vec_idx] = true;
-            contred.pop_back();
+    /** Merges the groups of two contracted vectors.
+     *
+     * The root group attached to the other is returned, NO_GROUP when nothing
+     * is merged.
+     */
+
+    size_t merge_groups(size_t vec1, size_t vec2)
+    {
+        if (groups_.empty() || groups_[vec1] == NO_GROUP
+            || groups_[vec2] == NO_GROUP) {
+            return NO_GROUP;
         }
-    });
-    avail[pivot] = true;
-    contred.pop_back();
 
-    return 0;
-}
+        size_t root1 = find_group(groups_[vec1]);
+        size_t root2 = find_group(groups_[vec2]);
+        if (root1 == root2) {
+            return NO_GROUP;
+        }
 
-//
-// Public functions
-// ================
-//
+        if (sizes_[root1] < sizes_[root2]) {
+            std::swap(root1, root2);
+        }
+        parent_[root2] = root1;
+        sizes_[root1] += sizes_[root2];
+        return root2;
+    }
 
-/** Docstring for the wickcore module.
- */
+    /** Undoes the last merge attaching the given root group.
+     */
 
-static const char* compose_wick_docstring
-    = R"__doc__(Compose all Wick expansion schemes.
+    void split_group(size_t root)
+    {
+        sizes_[parent_[root]] -= sizes_[root];
+        parent_[root] = root;
+    }
 
-All Wick expansion schemes from the given vector order and contractions will be
-returned.  This function has exactly the same interface and semantics as the
-corresponding Python function.
+    /** Tests if all the groups can still be connected.
+     *
+     * When there are still disconnected groups, each of them needs to have
+     * some vector available for further contractions.
+     */
+
+    bool can_connect() const
+    {
+        size_t n_groups = parent_.size();
+        size_t n_roots = 0;
+        for (size_t i = 0; i < n_groups; ++i) {
+            if (parent_[i] == i) {
+                ++n_roots;
+            }
+        }
+        if (n_roots < 2) {
+            return true;
+        }
 
-)__doc__";
+        std::vector<bool> has_avail(n_groups, false);
+        for (size_t i = 0; i < groups_.size(); ++i) {
+            if (avail_[i] && groups_[i] != NO_GROUP) {
+                has_avail[find_group(groups_[i])] = true;
+            }
+        }
 
-/** Generate all Wick composition schemes.
+        for (size_t i = 0; i < n_groups; ++i) {
+            if (parent_[i] == i && !has_avail[i]) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    Vecs vec_order_;
+    Contrs contrs_;
+    std::vector<bool> avail_;
+    Vecs contred_;
+    std::vector<Frame> stack_;
+    Vecs groups_;
+    Vecs parent_;
+    Vecs sizes_;
+    bool contr_all_;
+    bool started_;
+};
+
+/** Builds the Python object for the current scheme of an enumerator.
+ *
+ * The scheme is a pair of the list of vector indices and the number of
+ * contracted vectors.  NULL is returned on failure.
  */
 
-static PyObject* compose_wick_func(
-    PyObject* self, PyObject* args, PyObject* keywds)
+static PyObject* build_scheme(const Wick_enum& wick_enum)
 {
+    size_t n_vecs = wick_enum.n_vecs();
 
-    //
-    // Parse input arguments.
-    //
+    PyObject* scheme = PyTuple_New(2);
+    if (scheme == NULL) {
+        return NULL;
+    }
 
-    PyObject* vec_order_arg;
-    PyObject* contrs_arg;
+    PyObject* perm = PyList_New(n_vecs);
+    if (perm == NULL) {
+        Py_DECREF(scheme);
+        return NULL;
+    }
+    PyTuple_SET_ITEM(scheme, 0, perm); // Ownership of perm is stolen.
 
-    static char* kwlist[] = { "vec_order", "contrs", NULL };
+    PyObject* n_contred_py = PyLong_FromSize_t(wick_enum.contred().size());
+    if (n_contred_py == NULL) {
+        Py_DECREF(scheme);
+        return NULL;
+    }
+    PyTuple_SET_ITEM(scheme, 1, n_contred_py);
 
-    auto arg_stat = PyArg_ParseTupleAndKeywords(
-        args, keywds, "OO", kwlist, &vec_order_arg, &contrs_arg);
-    if (!arg_stat) {
+    size_t i = 0; // Next index to write vector to.
+    bool failed = false;
+    wick_enum.write_perm([&](size_t vec_idx) {
+        if (failed) {
+            return;
+        }
+        PyObject* curr_vec = PyLong_FromSize_t(vec_idx);
+        if (curr_vec == NULL) {
+            failed = true;
+            return;
+        }
+        PyList_SET_ITEM(perm, i++, curr_vec);
+    });
+
+    if (failed) {
+        Py_DECREF(scheme);
         return NULL;
     }
 
+    assert(i == n_vecs);
+    return scheme;
+}
+
+/** Reads the vector order, contractions, and groups from the Python arguments.
+ *
+ * The groups are optional, with both NULL and None for no groups.  Zero will
+ * be returned on success, with the Python exception set otherwise.
+ */
+
+static int read_wick_args(PyObject* vec_order_arg, PyObject* contrs_arg,
+    PyObject* groups_arg, Vecs& vec_order, Contrs& contrs, Vecs& groups)
+{
     // Check contraction first, since it always has the correct number of
     // vectors.
 
     if (PySequence_Check(contrs_arg) != 1) {
         PyErr_SetString(
             PyExc_TypeError, "Invalid contractions, expecting sequence");
-        return NULL;
+        return 1;
     }
     size_t n_vecs = PySequence_Size(contrs_arg);
 
@@ -194,57 +405,68 @@ static PyObject* compose_wick_func(
         if (PySequence_Size(vec_order_arg) != static_cast<Py_ssize_t>(n_vecs)) {
             PyErr_SetString(PyExc_ValueError,
                 "Invalid vector order and contractions, inconsistent size");
-            return NULL;
+            return 1;
         }
     } else {
         PyErr_SetString(PyExc_TypeError,
             "Invalid vector order, expecting None or sequence");
-        return NULL;
+        return 1;
     }
 
     if (n_vecs < 2) {
         PyErr_SetString(PyExc_ValueError,
             "Invalid vectors, need at least two vectors to contract");
-        return NULL;
+        return 1;
     }
 
     //
     // Translate input parameters
     //
 
-    Vecs vec_order{};
+    vec_order.clear();
 
     if (!contr_all) {
         vec_order.reserve(n_vecs);
         for (size_t i = 0; i < n_vecs; ++i) {
             PyObject* entry = PySequence_GetItem(vec_order_arg, i);
+            if (entry == NULL) {
+                return 1;
+            }
             if (!PyLong_Check(entry)) {
                 PyErr_SetString(PyExc_TypeError,
                     "Invalid vector order entry, expecting integer");
                 Py_DECREF(entry);
-                return NULL;
+                return 1;
             }
 
             size_t vec_idx = PyLong_AsSize_t(entry);
             Py_DECREF(entry);
             if (PyErr_Occurred()) {
-                return NULL;
+                return 1;
+            }
+            if (vec_idx >= n_vecs) {
+                PyErr_SetString(PyExc_ValueError,
+                    "Invalid vector order entry, index out of range");
+                return 1;
             }
 
             vec_order.push_back(vec_idx);
         }
     }
 
-    Contrs contrs(n_vecs);
+    contrs.assign(n_vecs, Vecs{});
 
     for (size_t i = 0; i < n_vecs; ++i) {
         PyObject* entry = PySequence_GetItem(contrs_arg, i);
+        if (entry == NULL) {
+            return 1;
+        }
         if (!PyDict_Check(entry)) {
             // We only support dictionary, rather than general mapping.
             PyErr_SetString(
                 PyExc_TypeError, "Invalid contraction, expecting dict");
             Py_DECREF(entry);
-            return NULL;
+            return 1;
         }
 
         PyObject* key;
@@ -255,12 +477,20 @@ static PyObject* compose_wick_func(
             if (!PyLong_Check(key)) {
                 PyErr_SetString(PyExc_TypeError,
                     "Invalid key in contraction, expecting integer");
-                return NULL;
+                Py_DECREF(entry);
+                return 1;
             }
 
             size_t vec_idx = PyLong_AsSize_t(key);
             if (PyErr_Occurred()) {
-                return NULL;
+                Py_DECREF(entry);
+                return 1;
+            }
+            if (vec_idx >= n_vecs) {
+                PyErr_SetString(PyExc_ValueError,
+                    "Invalid key in contraction, index out of range");
+                Py_DECREF(entry);
+                return 1;
             }
 
             contrs[i].push_back(vec_idx);
@@ -269,13 +499,108 @@ static PyObject* compose_wick_func(
         Py_DECREF(entry);
     }
 
+    groups.clear();
+    if (groups_arg == NULL || groups_arg == Py_None) {
+        return 0;
+    }
+
+    if (!contr_all) {
+        PyErr_SetString(PyExc_ValueError,
+            "Invalid groups, only supported when all vectors are contracted");
+        return 1;
+    }
+    if (PySequence_Check(groups_arg) != 1
+        || PySequence_Size(groups_arg) != static_cast<Py_ssize_t>(n_vecs)) {
+        PyErr_SetString(PyExc_TypeError,
+            "Invalid groups, expecting sequence with entry for each vector");
+        return 1;
+    }
+
+    groups.reserve(n_vecs);
+    for (size_t i = 0; i < n_vecs; ++i) {
+        PyObject* entry = PySequence_GetItem(groups_arg, i);
+        if (entry == NULL) {
+            return 1;
+        }
+
+        if (entry == Py_None) {
+            groups.push_back(NO_GROUP);
+            Py_DECREF(entry);
+            continue;
+        }
+        if (!PyLong_Check(entry)) {
+            PyErr_SetString(PyExc_TypeError,
+                "Invalid group entry, expecting integer or None");
+            Py_DECREF(entry);
+            return 1;
+        }
+
+        size_t group = PyLong_AsSize_t(entry);
+        Py_DECREF(entry);
+        if (PyErr_Occurred()) {
+            return 1;
+        }
+
+        groups.push_back(group);
+    }
+
+    return 0;
+}
+
+//
+// Public functions
+// ================
+//
+
+/** Docstring for the wickcore module.
+ */
+
+static const char* compose_wick_docstring
+    = R"__doc__(Compose all Wick expansion schemes.
+
+All Wick expansion schemes from the given vector order and contractions will be
+returned.  This function has exactly the same interface and semantics as the
+corresponding Python function.
+
+When all vectors are to be contracted, the vectors can optionally be put into
+groups by a sequence giving the integral group index for each vector, or None
+for vectors not in any group.  Then only the schemes whose contractions connect
+all the groups are returned, with the other schemes pruned during the
+enumeration rather than filtered afterward.
+
+)__doc__";
+
+/** Generate all Wick composition schemes.
+ */
+
+static PyObject* compose_wick_func(
+    PyObject* self, PyObject* args, PyObject* keywds)
+{
+
     //
-    // Decision tree status
+    // Parse input arguments.
     //
 
-    std::vector<bool> avail(n_vecs, true);
+    PyObject* vec_order_arg;
+    PyObject* contrs_arg;
+    PyObject* groups_arg = NULL;
+
+    static char* kwlist[] = { "vec_order", "contrs", "groups", NULL };
 
-    Vecs contred{};
+    auto arg_stat = PyArg_ParseTupleAndKeywords(args, keywds, "OO|O", kwlist,
+        &vec_order_arg, &contrs_arg, &groups_arg);
+    if (!arg_stat) {
+        return NULL;
+    }
+
+    Vecs vec_order{};
+    Contrs contrs{};
+    Vecs groups{};
+    if (read_wick_args(vec_order_arg, contrs_arg, groups_arg, vec_order,
+            contrs, groups)
+        != 0) {
+        return NULL;
+    }
 
     //
     // Prepare the output
@@ -287,15 +612,241 @@ static PyObject* compose_wick_func(
     }
 
     //
-    // Run the core recursion.
+    // Run the enumeration.
     //
-    auto stat = add_wick(schemes, avail, 0, contred, vec_order, contrs);
 
-    if (stat == 0) {
-        return schemes;
-    } else {
+    Wick_enum wick_enum(
+        std::move(vec_order), std::move(contrs), std::move(groups));
+    while (wick_enum.next()) {
+        PyObject* scheme = build_scheme(wick_enum);
+        if (scheme == NULL) {
+            Py_DECREF(schemes);
+            return NULL;
+        }
+
+        auto stat = PyList_Append(schemes, scheme);
+        Py_DECREF(scheme);
+        if (stat != 0) {
+            Py_DECREF(schemes);
+            return NULL;
+        }
+    }
+
+    return schemes;
+}
+
+/** Docstring for the Wick scheme counting function.
+ */
+
+static const char* count_wick_docstring = R"__doc__(Count Wick expansion schemes.
+
+The number of Wick expansion schemes from the given vector order and
+contractions will be returned, without any of the schemes being built.  The
+arguments, including the optional groups, are the same as those of
+`compose_wick`.
+
+)__doc__";
+
+/** Count all Wick composition schemes.
+ */
+
+static PyObject* count_wick_func(
+    PyObject* self, PyObject* args, PyObject* keywds)
+{
+    PyObject* vec_order_arg;
+    PyObject* contrs_arg;
+    PyObject* groups_arg = NULL;
+
+    static char* kwlist[] = { "vec_order", "contrs", "groups", NULL };
+
+    auto arg_stat = PyArg_ParseTupleAndKeywords(args, keywds, "OO|O", kwlist,
+        &vec_order_arg, &contrs_arg, &groups_arg);
+    if (!arg_stat) {
+        return NULL;
+    }
+
+    Vecs vec_order{};
+    Contrs contrs{};
+    Vecs groups{};
+    if (read_wick_args(vec_order_arg, contrs_arg, groups_arg, vec_order,
+            contrs, groups)
+        != 0) {
+        return NULL;
+    }
+
+    size_t n_schemes = 0;
+    Wick_enum wick_enum(
+        std::move(vec_order), std::move(contrs), std::move(groups));
+    while (wick_enum.next()) {
+        ++n_schemes;
+    }
+
+    return PyLong_FromSize_t(n_schemes);
+}
+
+//
+// Wick scheme iterator
+// --------------------
+//
+
+/** Object type for iterators over batches of Wick schemes.
+ */
+
+// clang-format off
+typedef struct {
+    PyObject_HEAD
+    Wick_enum* wick_enum;
+    size_t batch_size;
+} Wick_iter_object;
+// clang-format on
+
+/** Deallocates a Wick scheme iterator.
+ */
+
+static void wick_iter_dealloc(Wick_iter_object* self)
+{
+    delete self->wick_enum;
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+/** Gets the next batch of Wick schemes.
+ */
+
+static PyObject* wick_iter_next(Wick_iter_object* self)
+{
+    Wick_enum* wick_enum = self->wick_enum;
+    if (wick_enum == NULL) {
+        return NULL;
+    }
+
+    PyObject* batch = PyList_New(0);
+    if (batch == NULL) {
+        return NULL;
+    }
+
+    while (static_cast<size_t>(PyList_GET_SIZE(batch)) < self->batch_size
+        && wick_enum->next()) {
+        PyObject* scheme = build_scheme(*wick_enum);
+        if (scheme == NULL) {
+            Py_DECREF(batch);
+            return NULL;
+        }
+
+        auto stat = PyList_Append(batch, scheme);
+        Py_DECREF(scheme);
+        if (stat != 0) {
+            Py_DECREF(batch);
+            return NULL;
+        }
+    }
+
+    if (static_cast<size_t>(PyList_GET_SIZE(batch)) < self->batch_size) {
+        // The enumeration is exhausted, release the resources early.
+        delete wick_enum;
+        self->wick_enum = NULL;
+
+        if (PyList_GET_SIZE(batch) == 0) {
+            Py_DECREF(batch);
+            return NULL;
+        }
+    }
+
+    return batch;
+}
+
+/** Type definition for Wick scheme iterators.
+ */
+
+// clang-format off
+static PyTypeObject wick_iter_type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "drudge.wickcore.WickIter",
+    sizeof(Wick_iter_object),
+    0,
+    (destructor)wick_iter_dealloc,              /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_reserved */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash  */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    0,                                          /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                         /* tp_flags */
+    "Iterator over batches of Wick schemes.",   /* tp_doc */
+    0,                                          /* tp_traverse */
+    0,                                          /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    PyObject_SelfIter,                          /* tp_iter */
+    (iternextfunc)wick_iter_next,               /* tp_iternext */
+};
+// clang-format on
+
+/** Docstring for the Wick scheme iteration function.
+ */
+
+static const char* iter_wick_docstring = R"__doc__(Iterate over Wick schemes.
+
+An iterator over the Wick expansion schemes from the given vector order and
+contractions will be returned.  The schemes are yielded in lists of at most the
+given batch size, in the same format and order as from `compose_wick`.  The
+schemes are generated only when the batch is requested, so that the memory
+usage is bounded by the batch size.  The optional groups are the same as for
+`compose_wick`.
+
+)__doc__";
+
+/** Iterate over all Wick composition schemes in batches.
+ */
+
+static PyObject* iter_wick_func(
+    PyObject* self, PyObject* args, PyObject* keywds)
+{
+    PyObject* vec_order_arg;
+    PyObject* contrs_arg;
+    Py_ssize_t batch_size = 1024;
+    PyObject* groups_arg = NULL;
+
+    static char* kwlist[]
+        = { "vec_order", "contrs", "batch_size", "groups", NULL };
+
+    auto arg_stat = PyArg_ParseTupleAndKeywords(args, keywds, "OO|nO", kwlist,
+        &vec_order_arg, &contrs_arg, &batch_size, &groups_arg);
+    if (!arg_stat) {
+        return NULL;
+    }
+
+    if (batch_size < 1) {
+        PyErr_SetString(
+            PyExc_ValueError, "Invalid batch size, expecting positive integer");
+        return NULL;
+    }
+
+    Vecs vec_order{};
+    Contrs contrs{};
+    Vecs groups{};
+    if (read_wick_args(vec_order_arg, contrs_arg, groups_arg, vec_order,
+            contrs, groups)
+        != 0) {
+        return NULL;
+    }
+
+    Wick_iter_object* iter = PyObject_New(Wick_iter_object, &wick_iter_type);
+    if (iter == NULL) {
         return NULL;
     }
+    iter->wick_enum = new Wick_enum(
+        std::move(vec_order), std::move(contrs), std::move(groups));
+    iter->batch_size = batch_size;
+
+    return (PyObject*)iter;
 }
 
 //
@@ -309,7 +860,7 @@ static PyObject* compose_wick_func(
 static const char* wickcore_docstring = R"__doc__(Core Wick expansion utilities.
 
 This module contains core functions to get all possible compositions of Wick
-contractions.
+contractions, either all at once, counted, or in batches.
 
 )__doc__";
 
@@ -319,14 +870,23 @@ contractions.
 static PyMethodDef wickcore_methods[]
     = { { "compose_wick", (PyCFunction)compose_wick_func,
             METH_VARARGS | METH_KEYWORDS, compose_wick_docstring },
+        { "count_wick", (PyCFunction)count_wick_func,
+            METH_VARARGS | METH_KEYWORDS, count_wick_docstring },
+        { "iter_wick", (PyCFunction)iter_wick_func,
+            METH_VARARGS | METH_KEYWORDS, iter_wick_docstring },
         { NULL, NULL, 0, NULL } };
 
 /** Executes the initialization of the wickcore module.
  *
- * Nothing much is done here, kept for future extensibility.
+ * The type for the iterators over Wick schemes is readied here.
  */
 
-static int wickcore_exec(PyObject* m) { return 0; }
+static int wickcore_exec(PyObject* m)
+{
+    if (PyType_Ready(&wick_iter_type) < 0)
+        return -1;
+    return 0;
+}
 
 /** Slots for for wickcore module definition.
  */
@@ -28,7 +28,8 @@ canonpy = Extension(
     'drudge.canonpy',
     ['drudge/canonpy.cpp'],
     include_dirs=INCLUDE_DIRS,
-    extra_compile_args=COMPILE_FLAGS
+    extra_compile_args=COMPILE_FLAGS + ['-pthread'],
+    extra_link_args=['-pthread']
 )
 
 wickcore = Extension(
@@ -52,6 +53,9 @@ setup(
     ext_modules=[canonpy, wickcore],
     package_data={'drudge': ['templates/*']},
     install_requires=['sympy', 'ipython', 'Jinja2', 'pyspark'],
+    extras_require={
+        'probe': ['numpy']
+    },
     entry_points={
         'console_scripts': [
             'drudge = drudge.drs:main'
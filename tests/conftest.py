@@ -13,6 +13,9 @@ def spark_ctx():
         from dummy_spark import SparkConf, SparkContext
         conf = SparkConf()
         ctx = SparkContext(master='', conf=conf)
+    elif 'LOCAL_SPARK' in os.environ:
+        from drudge import LocalContext
+        ctx = LocalContext(2)
     else:
         from pyspark import SparkConf, SparkContext
         conf = SparkConf().setMaster('local[2]').setAppName('drudge-unittest')
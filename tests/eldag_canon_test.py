@@ -1,7 +1,11 @@
 """Tests for the canonicalization facility for Eldags."""
 
+import array
+
+import pytest
+
 from drudge import Perm, Group
-from drudge.canonpy import canon_eldag
+from drudge.canonpy import canon_eldag, canon_eldags
 
 
 def test_eldag_can_be_canonicalized():
@@ -59,3 +63,48 @@ def test_eldag_can_be_canonicalized():
         continue
 
     return
+
+
+def test_eldags_can_be_canonicalized_in_batch():
+    """Test the batched Eldag canonicalization facility.
+
+    The Eldags from the previous test are canonicalized together, with the
+    integral arrays given in different forms.
+    """
+
+    transp = Perm([1, 0], 1)
+    symms = [None, Group([transp]), None, None]
+    colours = [0, 1, 1, 1]
+    ia = [0, 2, 4, 4, 4]
+
+    eldags = []
+    expected = []
+    for edges in [[2, 3, 2, 3], [3, 2, 2, 3]]:
+        expected.append(canon_eldag(edges, ia, symms, colours))
+        eldags.append((edges, ia, symms, colours))
+        eldags.append((
+            array.array('q', edges), array.array('i', ia), iter(symms),
+            memoryview(array.array('B', colours))
+        ))
+        continue
+
+    for n_threads in [1, 2, 0]:
+        res = canon_eldags(eldags, n_threads=n_threads)
+        assert len(res) == len(eldags)
+        for i, v in enumerate(res):
+            node_order, perms = v
+            expected_order, expected_perms = expected[i // 2]
+            assert node_order == expected_order
+            assert [None if j is None else (list(j), j.acc) for j in perms] == [
+                None if j is None else (list(j), j.acc) for j in expected_perms
+            ]
+            continue
+        continue
+
+    assert canon_eldags([]) == []
+    with pytest.raises(ValueError):
+        canon_eldags([([], [0, 0], [], [])])
+    with pytest.raises(ValueError):
+        canon_eldags([(array.array('i', [-1]), ia, symms, colours)])
+    with pytest.raises(TypeError):
+        canon_eldags([(array.array('d', [1.0]), ia, symms, colours)])
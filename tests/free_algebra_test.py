@@ -1,6 +1,7 @@
 """Tests for the basic tensor facilities using free algebra."""
 
 import io
+import logging
 import os
 import os.path
 import pickle
@@ -13,6 +14,7 @@ from sympy import (
 )
 
 from drudge import Drudge, Range, Vec, Term, Perm, NEG, CONJ, TensorDef
+from drudge.drudge import _canon_partition
 
 
 @pytest.fixture(scope='module')
@@ -403,6 +405,23 @@ def test_tensor_can_be_simplified_amp(free_alg):
     assert simpl == expected
 
 
+def test_simplification_reports_fused_stages(free_alg, caplog):
+    """Test the report of the fused stages in the master simplification."""
+
+    dr = free_alg
+    p = dr.names
+    i = p.i
+    x = IndexedBase('x')
+
+    caplog.set_level(logging.DEBUG, logger='drudge.drudge')
+    res = dr.einst(x[i] * p.v[i] * 2 - x[i] * p.v[i]).simplify()
+    assert res == dr.einst(x[i] * p.v[i])
+    assert any(
+        'fused' in i.getMessage() and 'serializations' in i.getMessage()
+        for i in caplog.records
+    )
+
+
 def test_simplify_delta_of_two_ranges(free_alg):
     """Test simplification of delta of two disjoint ranges."""
 
@@ -428,7 +447,7 @@ def test_simplify_delta_of_unsolvable_functions(free_alg):
     assert tensor.simplify() == tensor
 
 
-def test_tensor_can_be_canonicalized(free_alg):
+def test_tensor_can_be_canonicalized(free_alg, monkeypatch):
     """Test tensor canonicalization in simplification.
 
     The master simplification function is tested, the core simplification is at
@@ -482,6 +501,26 @@ def test_tensor_can_be_canonicalized(free_alg):
     res = tensor.simplify()
     assert res == 0
 
+    # Terms canonicalized by partitions are the same as canonicalized singly.
+    expected = {
+        i.canon(symms=dr.symms.value, vec_colour=dr.vec_colour)
+        for i in tensor.local_terms
+    }
+    assert set(tensor.canon().local_terms) == expected
+
+    # Partitions canonicalized in chunks by multiple threads.
+    monkeypatch.setattr('drudge.drudge._CANON_CHUNK_SIZE', 1)
+    assert set(_canon_partition(
+        iter(tensor.local_terms), dr.symms, dr.vec_colour, 2
+    )) == expected
+    try:
+        dr.canon_threads = 2
+        assert set(tensor.canon().local_terms) == expected
+    finally:
+        dr.canon_threads = 1
+    with pytest.raises(ValueError):
+        dr.canon_threads = 0
+
 
 class SymmFunc(Function):
     """A symmetric function."""
@@ -1280,6 +1319,111 @@ def test_drudge_has_default_properties(free_alg):
     assert isinstance(free_alg.num_partitions, int)
     assert free_alg.full_simplify
     assert not free_alg.simple_merge
+    assert free_alg.local_threshold is None
+    assert isinstance(free_alg.local_max_vecs, int)
+    assert isinstance(free_alg.bcast_join_threshold, int)
+
+
+def test_small_tensors_evaluated_in_driver(free_alg):
+    """Test the consistency of in-driver evaluation of small tensors."""
+
+    dr = free_alg
+    p = dr.names
+    i, j = p.R_dumms[:2]
+    x = IndexedBase('x')
+    y = IndexedBase('y')
+    v = p.v
+
+    orig = dr.einst(x[i] * v[i] + x[j] * v[j] + y[i, j] * v[i] * v[j])
+    x_def = dr.define(x[i], dr.einst(y[i, j] * x[j]))
+
+    def compute():
+        """Compute the results to compare."""
+        return [
+            orig.simplify(), orig.normal_order(), orig.merge(),
+            orig.subst(x[i], x_def.rhs).simplify()
+        ]
+
+    spark_res = compute()
+    assert orig._get_small_terms() is None
+
+    try:
+        dr.local_threshold = 32
+        local_res = compute()
+
+        # Tensors of unknown size are never probed.
+        doubled = orig * 2
+        assert doubled._get_small_terms() is None
+        assert not doubled.terms.is_cached
+        assert doubled.n_terms == 3
+        assert len(doubled._get_small_terms()) == 3
+    finally:
+        dr.local_threshold = None
+
+    assert local_res[0].n_terms == 2
+    for i, j in zip(local_res, spark_res):
+        assert i == j
+        assert i._local_terms is not None
+        assert i.local_terms == i.terms.collect()
+        continue
+
+    with pytest.raises(TypeError):
+        dr.local_threshold = 1.5
+
+
+def test_products_of_tensors_by_broadcast_join(free_alg, caplog):
+    """Test products and commutators of tensors joined by broadcasting."""
+
+    dr = free_alg
+    p = dr.names
+    i, j = p.R_dumms[:2]
+    x = IndexedBase('x')
+    y = IndexedBase('y')
+    v = p.v
+
+    small = dr.sum(v[0] + 2 * v[1])
+    big = dr.einst(x[i] * v[i] + y[i, j] * v[i] * v[j])
+
+    def compute():
+        """Compute the products to compare."""
+        return [
+            (big * small).simplify(), (small * big).simplify(),
+            (big | small).simplify(), (small | big).simplify()
+        ]
+
+    threshold = dr.bcast_join_threshold
+    try:
+        with caplog.at_level(logging.DEBUG, logger='drudge.drudge'):
+            bcast_res = compute()
+        dr.bcast_join_threshold = None
+        cartesian_res = compute()
+    finally:
+        dr.bcast_join_threshold = threshold
+
+    assert any('broadcasting' in i.getMessage() for i in caplog.records)
+    for i, j in zip(bcast_res, cartesian_res):
+        assert i == j
+        continue
+
+    assert bcast_res[0] == dr.einst(
+        x[i] * v[i] * v[0] + 2 * x[i] * v[i] * v[1]
+        + y[i, j] * v[i] * v[j] * v[0] + 2 * y[i, j] * v[i] * v[j] * v[1]
+    ).simplify()
+
+    # The second operand is counted when neither size is known.
+    lazy_small = small * 2
+    lazy_big = big * 2
+    assert not lazy_small._is_size_known()
+    assert not lazy_big._is_size_known()
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG, logger='drudge.drudge'):
+        res = (lazy_big * lazy_small).simplify()
+    assert any('broadcasting' in i.getMessage() for i in caplog.records)
+    assert lazy_small._is_size_known()
+    assert res == (bcast_res[0] * 4).simplify()
+
+    with pytest.raises(TypeError):
+        dr.bcast_join_threshold = 1.5
 
 
 def test_tensor_can_be_added_summation(free_alg):
@@ -1344,6 +1488,200 @@ def test_memoise(free_alg, tmpdir):
         assert len(log.getvalue().splitlines()) == 2
 
 
+def test_tensor_fingerprints(free_alg):
+    """Test the order-independent fingerprints of tensors."""
+
+    dr = free_alg
+    p = dr.names
+    i, j = p.R_dumms[:2]
+    x = IndexedBase('x')
+    v = p.v
+
+    tensor = dr.einst(x[i] * v[i] + x[i, j] * v[i] * v[j])
+    reordered = dr.einst(x[i, j] * v[i] * v[j] + x[i] * v[i])
+    reordered.repartition(3)
+    other = dr.einst(x[i] * v[i] + x[j, i] * v[i] * v[j])
+
+    fingerprint = tensor.fingerprint()
+    assert isinstance(fingerprint, str)
+    assert reordered.fingerprint() == fingerprint
+    assert tensor.fingerprint_equals(reordered)
+    assert tensor.fingerprint_equals(fingerprint)
+    assert not tensor.fingerprint_equals(other)
+
+    # Terms are compared as multisets.
+    assert not tensor.fingerprint_equals(tensor + tensor)
+    assert dr.sum(0).fingerprint() == dr.create_tensor([]).fingerprint()
+
+    with pytest.raises(TypeError):
+        tensor.fingerprint_equals(0)
+
+
+def test_numeric_probing_of_tensors(free_alg):
+    """Test the randomized numeric probing of the equality of tensors."""
+
+    pytest.importorskip('numpy')
+
+    dr = free_alg
+    p = dr.names
+    i, j, k = p.R_dumms[:3]
+    m = p.m
+    x = IndexedBase('x')
+    v = p.v
+    sizes = {p.R: 3, p.S: 2}
+
+    # The antisymmetry of m needs to be respected.
+    tensor = dr.einst(m[i, j] * x[j] * v[i])
+    assert tensor.numeric_probe(dr.einst(-m[j, i] * x[j] * v[i]), sizes)
+    assert not tensor.numeric_probe(dr.einst(m[j, i] * x[j] * v[i]), sizes)
+    assert not tensor.numeric_probe(dr.einst(m[i, j] * x[j] * v[j]), sizes)
+
+    # Free indices and deltas.
+    assert dr.sum((j, p.R), KroneckerDelta(i, j) * x[j] * v[k]).numeric_probe(
+        x[i] * v[k], sizes, seed=1
+    )
+    assert dr.einst(m[i, j] * x[i] * x[j]).numeric_probe(0, sizes)
+    assert not dr.einst(m[i, j] * x[i]).numeric_probe(0, sizes)
+
+
+def test_tensors_saved_and_loaded_in_parallel(free_alg, tmpdir):
+    """Test the partitioned saving and loading of tensors."""
+
+    dr = free_alg
+    p = dr.names
+    i, j = p.R_dumms[:2]
+    x = IndexedBase('x')
+    v = p.v
+
+    tensor = dr.einst(x[i, j] * v[i] * v[j] + x[i, i] * v[i] + p.m[j] * v[j])
+    tensor.repartition(3)
+    path = os.path.join(str(tmpdir), 'tensor')
+
+    tensor.save(path)
+    assert os.path.isfile(os.path.join(path, 'manifest.pickle'))
+    res = dr.load(path)
+    assert res == tensor
+    assert res.free_vars == tensor.free_vars
+
+    # Saved tensors are overwritten.
+    tensor.save(path)
+    assert dr.load(path) == tensor
+
+    with pytest.raises(OSError):
+        dr.load(os.path.join(str(tmpdir), 'absent'))
+
+    n_calls = [0]
+
+    def get_tensor():
+        n_calls[0] += 1
+        return tensor
+
+    filename = os.path.join(str(tmpdir), 'memoized')
+    assert dr.memoize(get_tensor, filename, parallel=True) == tensor
+    assert dr.memoize(get_tensor, filename, parallel=True) == tensor
+    assert n_calls[0] == 1
+
+    with pytest.raises(TypeError):
+        dr.memoize(lambda: 0, os.path.join(str(tmpdir), 'num'), parallel=True)
+
+
+def test_op_cache_reuses_results_for_same_inputs(free_alg, tmpdir):
+    """Test the content-addressed cache of results of tensor operations."""
+
+    dr = free_alg
+    p = dr.names
+    i, j = p.R_dumms[:2]
+    x = IndexedBase('x')
+    y = IndexedBase('y')
+    v = p.v
+
+    tensor = dr.einst(x[i] * v[i] + x[j] * v[j])
+    x_def = dr.define(x[i], dr.einst(y[i, j] * x[j]))
+    expected = [tensor.simplify(), tensor.subst(x[i], x_def.rhs)]
+
+    path = str(tmpdir.join('op_cache'))
+    dr.set_op_cache(path)
+    try:
+        cache = dr.op_cache
+        for _ in range(2):
+            # The reordered terms have the same digest.
+            reordered = dr.einst(x[j] * v[j] + x[i] * v[i])
+            assert reordered.simplify() == expected[0]
+            assert reordered.subst(x[i], x_def.rhs) == expected[1]
+            continue
+        assert cache.misses == 2
+        assert cache.hits == 2
+        assert cache.size > 0
+
+        # Changed configuration gives different keys.
+        dr.full_simplify = False
+        tensor.simplify()
+        dr.full_simplify = True
+        assert cache.misses == 3
+
+        # Results read are not affected by later changes to the entries, while
+        # corrupted entries are recomputed.
+        res = tensor.simplify()
+        assert cache.hits == 3
+        for i in os.listdir(path):
+            entry = os.path.join(path, i)
+            for j in os.listdir(entry):
+                if j.startswith('part-'):
+                    with open(os.path.join(entry, j), 'wb') as fp:
+                        fp.write(b'corrupted')
+                continue
+            continue
+        assert res == expected[0]
+        assert tensor.simplify() == expected[0]
+        assert cache.hits == 3
+        assert cache.misses == 4
+
+        # Size-based eviction.
+        dr.set_op_cache(path, max_size=0)
+        assert tensor.normal_order() == tensor.normal_order()
+        assert dr.op_cache.size == 0
+        assert dr.op_cache.misses == 2
+    finally:
+        dr.set_op_cache(None)
+
+    assert dr.op_cache is None
+    with pytest.raises(ValueError):
+        dr.set_op_cache(path, max_size=-1)
+
+
+def test_op_cache_keys_closures_and_skips_unstable_inputs(spark_ctx, tmpdir):
+    """Test the keys of the operation cache for functions and odd objects."""
+
+    dr = Drudge(spark_ctx)
+    r = Range('R')
+    i = Symbol('i')
+    dr.set_dumms(r, [i])
+    dr.add_resolver_for_dumms()
+    x = IndexedBase('x')
+    tensor = dr.sum((i, r), x[i] * Vec('v')[i])
+
+    def get_adder(val):
+        return lambda expr: expr + val
+
+    class Resolver:
+        def __call__(self, expr):
+            return None
+
+    path = str(tmpdir.join('op_cache'))
+    dr.set_op_cache(path)
+    cache = dr.op_cache
+    assert cache.get_key(get_adder(1)) == cache.get_key(get_adder(1))
+    assert cache.get_key(get_adder(1)) != cache.get_key(get_adder(2))
+    assert cache.get_key(Resolver()) is None
+
+    # Configuration without stable form disables the cache.
+    dr.add_resolver(Resolver())
+    tensor.simplify()
+    assert cache.misses == 0
+    assert cache.hits == 0
+    assert cache.size == 0
+
+
 TEST_SIMPLE_DRS = """
 x[i] <<= 1 / 2 * sum((i, R), m[i] * v[i])
 y = sum_(range(10))
@@ -1351,6 +1689,48 @@ n = n_terms(x)
 """
 
 
+def test_profiling_of_simplification(free_alg):
+    """Test the per-stage profiling of tensor simplification."""
+
+    dr = free_alg
+    p = dr.names
+    i, j = p.R_dumms[:2]
+    x = IndexedBase('x')
+    v = p.v
+
+    tensor = dr.einst(x[i] * v[i] + x[j] * v[j])
+    expected = tensor.simplify()
+
+    with dr.profiling(n_slowest_terms=3) as prof:
+        res = tensor.simplify()
+    assert res == expected
+
+    slowest = prof.slowest_terms
+    assert 0 < len(slowest) <= 3
+    assert all(isinstance(i.term, Term) for i in slowest)
+    assert {i.label for i in slowest} <= {r.name for r in prof.records}
+    times = [i.time for i in slowest]
+    assert times == sorted(times, reverse=True)
+
+    records = prof.records
+    names = [r.name for r in records]
+    assert 'normal_order' in names
+    assert 'canon' in names
+    assert names[-1] == 'expand'
+    merge = records[names.index('merge')]
+    assert merge.n_terms_in == 2
+    assert merge.n_terms_out == 1
+    for prev, curr in zip(records, records[1:]):
+        assert curr.level == 0
+        assert curr.n_terms_in == prev.n_terms_out
+        assert curr.wall_time >= 0
+        continue
+
+    table = prof.format_table()
+    assert 'merge' in table
+    assert str(prof) == table
+
+
 def test_simple_drs(free_alg):
     """Test a simple drudge script."""
     dr = free_alg
@@ -5,9 +5,11 @@ also tested here.
 """
 
 import pytest
-from sympy import IndexedBase, conjugate, Symbol, symbols, I, exp, pi, sqrt
+from sympy import (
+    IndexedBase, conjugate, Symbol, symbols, I, exp, pi, sqrt, Integer
+)
 
-from drudge import GenMBDrudge, CR, AN, Range
+from drudge import GenMBDrudge, CR, AN, Range, Term
 
 
 @pytest.fixture(scope='module')
@@ -53,7 +55,7 @@ def test_einstein_summation(genmb):
     assert tensor == dr.sum((a, l), (b, l), summand)
 
 
-@pytest.mark.parametrize('par_level', [0, 1, 2])
+@pytest.mark.parametrize('par_level', [0, 1, 2, 'auto'])
 @pytest.mark.parametrize('full_simplify', [True, False])
 @pytest.mark.parametrize('simple_merge', [True, False])
 def test_genmb_simplify_simple_expressions(
@@ -102,6 +104,113 @@ def test_genmb_simplify_simple_expressions(
     assert res == expected
 
 
+@pytest.mark.parametrize('par_level', [0, 'auto'])
+def test_genmb_normal_order_in_driver(genmb, par_level):
+    """Test the Wick expansion of small tensors evaluated in the driver."""
+
+    dr = genmb
+    p = dr.names
+    c_ = p.c_
+    c_dag = p.c_dag
+    a, b, c, d = p.L_dumms[:4]
+    t = IndexedBase('t')
+    u = IndexedBase('u')
+
+    inp = dr.einst(
+        t[a, b] * u[c, d] * c_dag[a] * c_[b] * c_dag[c] * c_[d]
+        + t[a, b] * c_[a] * c_dag[b]
+    )
+
+    def compute():
+        """Compute the results to compare."""
+        return [inp.normal_order(), inp.simplify()]
+
+    dr.wick_parallel = par_level
+    try:
+        spark_res = compute()
+        dr.local_threshold = 32
+        local_res = compute()
+    finally:
+        dr.local_threshold = None
+        dr.wick_parallel = 0
+
+    for i, j in zip(local_res, spark_res):
+        assert i._local_terms is not None
+        assert j._local_terms is None
+        assert i == j
+        continue
+    assert local_res[1].n_terms == 4
+
+
+def test_genmb_caches_wick_only_when_declared(spark_ctx, genmb):
+    """Test the Wick expansion is only cached for declared drudges."""
+
+    assert genmb.wick_cacheable
+    assert genmb._get_wick_cache(True) is not None
+    assert genmb._get_wick_cache(False) is None
+
+    class AmpDepDrudge(GenMBDrudge):
+        """Drudge with contractor depending on the amplitude."""
+        wick_cacheable = False
+
+    dr = AmpDepDrudge(spark_ctx)
+    assert dr.wick_cache_size is not None
+    assert dr._get_wick_cache(True) is None
+
+
+def test_genmb_profiles_wick_stages(genmb):
+    """Test the profiling of the stages of the Wick expansion."""
+
+    dr = genmb
+    p = dr.names
+    c_ = p.c_
+    c_dag = p.c_dag
+    a, b = p.L_dumms[:2]
+
+    tensor = dr.einst(c_[a] * c_dag[b])
+    with dr.profiling() as prof:
+        res = tensor.simplify()
+    assert res == tensor.simplify()
+
+    records = prof.records
+    names = [i.name for i in records]
+    assert 'wick_prepare' in names
+    assert 'wick_expand' in names
+    normal_order = records[names.index('normal_order')]
+    assert normal_order.level == 0
+    assert all(
+        i.level == 1 for i in records if i.name.startswith('wick_')
+    )
+    assert normal_order.n_terms_out == 2
+
+    # Both terms from the first pass are already normal-ordered.
+    check = records[names.index('check_normal_order')]
+    assert check.level == 1
+    assert check.n_terms_in == 2
+    second_pass = records[names.index('second_wick_pass')]
+    assert second_pass.level == 1
+    assert second_pass.n_terms_in == 0
+
+
+def test_genmb_traces_product_terms_for_vev(genmb):
+    """Test the tracing of the slowest terms in the product contraction."""
+
+    dr = genmb
+    p = dr.names
+    a, b = p.L_dumms[:2]
+
+    ops = [dr.sum(p.c_[a]), dr.sum(p.c_dag[b])]
+    expected = (ops[0] * ops[1]).eval_phys_vev().simplify()
+    with dr.profiling(n_slowest_terms=8) as prof:
+        res = dr.eval_vev_of_product(*ops).simplify()
+    assert res == expected
+
+    prepare = [i for i in prof.slowest_terms if i.label == 'prepare_wick']
+    assert len(prepare) == 1
+    assert isinstance(prepare[0].term, Term)
+    assert prepare[0].term == (ops[0] * ops[1]).local_terms[0]
+
+
 def test_genmb_simplifies_nilpotent_operators(genmb):
     """Test simplification of tensors vanishing by nilpotency."""
 
@@ -170,6 +279,42 @@ def test_genmb_derives_spin_orbit_hartree_fock(genmb):
     assert res == expected
 
 
+def test_genmb_vev_by_contractor_depending_on_amplitude(genmb):
+    """Test VEV by a contractor depending on more than the operators.
+
+    The two terms share the same operator string, so the contractions should
+    not be reused between them from the cache of Wick expansion.
+    """
+
+    dr = genmb
+    p = genmb.names
+    c_ = p.c_
+    c_dag = p.c_dag
+    a, b = p.L_dumms[:2]
+    x = IndexedBase('x')
+    y = IndexedBase('y')
+
+    def contractor(op1, op2, term):
+        """Contract the operators with the first indexed base."""
+        if op1.indices[0] == AN and op2.indices[0] == CR:
+            return Integer(1 if term.amp.has(x) else 2)
+        return 0
+
+    tensor = dr.sum(
+        (a, p.L), (b, p.L), x[a, b] * c_[a] * c_dag[b]
+    ) + dr.sum(
+        (a, p.L), (b, p.L), y[a, b] * c_[a] * c_dag[b]
+    )
+    assert tensor.n_terms == 2
+    # In the same partition, where the Wick cache is shared.
+    tensor.repartition(1)
+    res = tensor.eval_vev(contractor).simplify()
+    expected = dr.sum(
+        (a, p.L), (b, p.L), x[a, b] + 2 * y[a, b]
+    ).simplify()
+    assert res == expected
+
+
 def test_fock_drudge_prints_operators(genmb):
     """Test the LaTeX printing by Fock drudge.
 
@@ -0,0 +1,143 @@
+"""Tests for the local execution backend."""
+
+import pytest
+from sympy import IndexedBase, symbols
+
+from drudge import Drudge, LocalContext, Profile, Range, Vec
+
+
+@pytest.fixture(scope='module', params=[0, 2])
+def local_ctx(request):
+    """Local contexts with serial and parallel execution."""
+    ctx = LocalContext(request.param)
+    yield ctx
+    ctx.stop()
+
+
+def test_local_rdd_operations(local_ctx):
+    """Test the basic RDD operations of the local context."""
+
+    ctx = local_ctx
+    nums = ctx.parallelize(range(10))
+    n_parts = nums.getNumPartitions()
+    assert n_parts == ctx.defaultParallelism
+
+    res = nums.map(lambda x: x * 2).filter(lambda x: x % 3 != 0).flatMap(
+        lambda x: [x, x]
+    )
+    assert res.collect() == [2, 2, 4, 4, 8, 8, 10, 10, 14, 14, 16, 16]
+    assert res.count() == 12
+
+    pairs = nums.map(lambda x: (x % 3, x))
+    assert sorted(pairs.reduceByKey(lambda x, y: x + y).collect()) == [
+        (0, 18), (1, 12), (2, 15)
+    ]
+    assert dict(pairs.countByKey()) == {0: 4, 1: 3, 2: 3}
+
+    assert sorted(nums.cartesian(ctx.parallelize('ab')).collect()) == sorted(
+        (i, j) for i in range(10) for j in 'ab'
+    )
+    assert nums.union(nums).count() == 20
+    assert nums.repartition(3).getNumPartitions() == 3
+    assert sorted(nums.repartition(3).collect()) == list(range(10))
+
+    # The numbers of partitions are known without evaluation.
+    def fail(_):
+        """Fail on any evaluation."""
+        raise AssertionError('Evaluated')
+
+    failing = ctx.parallelize(range(10), 3).map(fail)
+    assert failing.union(nums).getNumPartitions() == 3 + n_parts
+    assert failing.cartesian(nums).getNumPartitions() == 3 * n_parts
+    assert failing.repartition(5).getNumPartitions() == 5
+    assert failing.reduceByKey(fail).getNumPartitions() == 3
+    assert failing.reduceByKey(fail, 4).getNumPartitions() == 4
+    assert failing.sortBy(fail).getNumPartitions() == 3
+
+    assert nums.reduce(lambda x, y: x + y) == 45
+    assert nums.aggregate(
+        set(), lambda x, y: x | {y}, lambda x, y: x | y
+    ) == set(range(10))
+    assert nums.sortBy(lambda x: -x).take(3) == [9, 8, 7]
+
+    bcast = ctx.broadcast({1: 'one'})
+    assert nums.map(lambda x: bcast.value.get(x)).collect().count('one') == 1
+
+    cached = nums.map(lambda x: x + 1).cache()
+    assert cached.count() == 10
+    assert cached.collect() == list(range(1, 11))
+
+
+def test_local_context_runs_drudge(local_ctx):
+    """Test the simplification of a simple tensor on local contexts."""
+
+    dr = Drudge(local_ctx)
+    r = Range('R')
+    a, b = dr.set_dumms(r, symbols('a b c d'))[:2]
+    dr.add_default_resolver(r)
+
+    x = IndexedBase('x')
+    v = Vec('v')
+    tensor = dr.einst(x[a] * v[a] + x[b] * v[b])
+    res = tensor.simplify()
+    assert res.n_terms == 1
+    assert res == dr.einst(2 * x[a] * v[a])
+
+
+def test_local_accumulators(local_ctx):
+    """Test the accumulators of the local context."""
+
+    ctx = local_ctx
+    acc = ctx.accumulator(0)
+    nums = ctx.parallelize(range(10), 3)
+
+    def add(x):
+        acc.add(x)
+        return x
+
+    assert nums.map(add).count() == 10
+    assert acc.value == 45
+
+    acc += 5
+    assert acc.value == 50
+
+    # Stage profiling gathers the CPU time by accumulators.
+    dr = Drudge(ctx)
+    r = Range('R')
+    a = dr.set_dumms(r, symbols('a b c d'))[0]
+    dr.add_default_resolver(r)
+    tensor = dr.einst(IndexedBase('x')[a] * Vec('v')[a])
+    with dr.profiling(n_slowest_terms=1) as prof:
+        tensor.simplify()
+    assert all(i.cpu_time is not None for i in prof.records)
+    assert len(prof.slowest_terms) == 1
+
+
+def test_slowest_terms_traced_by_partitions(local_ctx):
+    """Test the tracing of the slowest terms partition by partition."""
+
+    ctx = local_ctx
+    nums = ctx.parallelize(range(10), 3)
+
+    def double(x):
+        """Double the number, with much more work for seven."""
+        if x == 7:
+            sum(range(2000000))
+        return [x, x] if x % 2 == 0 else [x]
+
+    prof = Profile(ctx, n_slowest_terms=2)
+    traced = nums.mapPartitions(prof.trace_terms('double', double, flat=True))
+    assert sorted(traced.collect()) == sorted(
+        j for i in range(10) for j in double(i)
+    )
+    slowest = prof.slowest_terms
+    assert len(slowest) == 2
+    assert slowest[0].term == 7
+    assert slowest[0].label == 'double'
+    assert slowest[0].time >= slowest[1].time
+
+    untraced = Profile(ctx)
+    assert untraced.slowest_terms is None
+    assert nums.mapPartitions(untraced.trace_terms(
+        'double', double
+    )).collect() == [double(i) for i in range(10)]
@@ -1,5 +1,7 @@
 """Tests on the particle-hole model."""
 
+import logging
+
 import pytest
 from sympy import Rational, IndexedBase
 
@@ -13,7 +15,7 @@ def parthole(spark_ctx):
     return dr
 
 
-@pytest.mark.parametrize('par_level', [0, 1, 2])
+@pytest.mark.parametrize('par_level', [0, 1, 2, 'auto'])
 @pytest.mark.parametrize('full_simplify', [True, False])
 @pytest.mark.parametrize('simple_merge', [True, False])
 def test_simple_parthole_normal_order(
@@ -236,3 +238,145 @@ def test_einstein_sum_for_both_particles_and_holes(parthole):
     assert res == dr.sum(
         (p.p, ranges), (p.q, ranges), summand
     ).simplify()
+
+
+def test_wick_cache_gives_same_results(parthole):
+    """Test the caching of Wick expansion of operator strings."""
+
+    dr = parthole
+    ham = dr.orig_ham
+
+    size = dr.wick_cache_size
+    try:
+        cached = ham.simplify()
+        dr.wick_cache_size = None
+        uncached = ham.simplify()
+    finally:
+        dr.wick_cache_size = size
+
+    assert cached == uncached
+    assert cached == dr.full_ham
+
+
+def test_contr_mask_for_parthole_drudge(parthole):
+    """Test the masking of the contractions vanishing by the ranges."""
+
+    dr = parthole
+    p = dr.names
+    c_dag = p.c_dag
+    c_ = p.c_
+    i, j, a, b = p.i, p.j, p.a, p.b
+    x = IndexedBase('x')
+
+    term = dr.einst(
+        x[i, j, a, b] * c_dag[i] * c_[j] * c_dag[a] * c_[b]
+    ).local_terms[0]
+    mask = dr.contr_mask(term, dr.resolvers.value)
+    vecs = term.vecs
+
+    # Only the hole-hole and the particle-particle pairs with annihilation in
+    # front in terms of the quasi-particles can be contracted.
+    possible = {
+        (vecs.index(c_dag[i]), vecs.index(c_[j])),
+        (vecs.index(c_[b]), vecs.index(c_dag[a]))
+    }
+    assert {
+        (k, l)
+        for k in range(len(vecs)) for l in range(len(vecs)) if mask[k][l]
+    } == possible
+
+    # Here the swapped operators cannot be contracted.
+    tensor = dr.einst(x[i, a] * c_[a] * c_[i])
+    assert tensor.simplify() == dr.einst(-x[i, a] * c_[i] * c_[a]).simplify()
+    assert tensor.eval_fermi_vev().simplify() == 0
+
+
+def test_connected_fermi_vev(parthole):
+    """Test the evaluation of expectation values with connected vertices."""
+
+    dr = parthole
+    p = dr.names
+    c_dag = p.c_dag
+    c_ = p.c_
+    a, i = p.a, p.i
+    f = dr.fock
+    t = IndexedBase('t')
+    orb = (dr.part_range, dr.hole_range)
+
+    ham = dr.sum((p.p, orb), (p.q, orb), f[p.p, p.q] * c_dag[p.p] * c_[p.q])
+    corr = dr.einst(t[a, i] * c_dag[a] * c_[i])
+    tensor = dr.sum(c_dag[p.j] * c_[p.b]) * ham * corr
+
+    full = tensor.eval_fermi_vev().simplify()
+    connected = tensor.eval_fermi_vev(connected=[f, t]).simplify()
+
+    # The disconnected diagram with the Fock matrix closed on itself.
+    disconnected = dr.sum((i, dr.hole_range), f[i, i] * t[p.b, p.j])
+    assert (full - connected - disconnected).simplify() == 0
+    assert connected.n_terms == 2
+
+
+def test_vev_of_product_of_normal_ordered_tensors(parthole, caplog):
+    """Test expectation values with only contractions across the operands."""
+
+    dr = parthole
+    p = dr.names
+    c_dag = p.c_dag
+    c_ = p.c_
+    a, i = p.a, p.i
+    t = IndexedBase('t')
+
+    h_bar = (dr.ham + (dr.ham | dr.einst(
+        t[a, i] * c_dag[a] * c_[i]
+    )).simplify()).simplify()
+    proj = dr.sum(c_dag[p.j] * c_[p.b])
+
+    expected = (proj * h_bar).eval_fermi_vev().simplify()
+    with caplog.at_level(logging.DEBUG, logger='drudge.drudge'):
+        res = dr.eval_vev_of_product(proj, h_bar).simplify()
+    assert (res - expected).simplify() == 0
+    assert any('broadcasting' in i.getMessage() for i in caplog.records)
+
+    threshold = dr.bcast_join_threshold
+    try:
+        dr.bcast_join_threshold = None
+        cartesian_res = dr.eval_vev_of_product(proj, h_bar).simplify()
+    finally:
+        dr.bcast_join_threshold = threshold
+    assert (cartesian_res - res).simplify() == 0
+    assert (proj.eval_vev_of_product(h_bar) - res).simplify() == 0
+    assert (
+        dr.eval_vev_of_product(h_bar) - h_bar.eval_fermi_vev()
+    ).simplify() == 0
+
+
+def test_projected_bch_of_parthole_ham(parthole):
+    """Test the similarity transform truncated by the projection ranks."""
+
+    dr = parthole
+    p = dr.names
+    c_dag = p.c_dag
+    c_ = p.c_
+    a, i = p.a, p.i
+    t = IndexedBase('t')
+
+    cluster = dr.einst(t[a, i] * c_dag[a] * c_[i])
+    curr = dr.ham
+    full = dr.ham
+    for order in range(2):
+        curr = (curr | cluster).simplify() * Rational(1, order + 1)
+        full += curr
+        continue
+
+    res = dr.eval_bch(dr.ham, cluster, [0, 1], order=2)
+    assert res.n_terms < full.simplify().n_terms
+
+    proj = dr.sum(c_dag[p.j] * c_[p.b])
+    for lhs in [1, proj]:
+        assert (
+            (lhs * res).eval_fermi_vev() - (lhs * full).eval_fermi_vev()
+        ).simplify() == 0
+        continue
+
+    with pytest.raises(ValueError):
+        dr.eval_bch(dr.ham, cluster.dagger(), [1])
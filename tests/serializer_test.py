@@ -0,0 +1,43 @@
+"""Tests for the compact serializer for batches of terms."""
+
+import pickle
+
+from sympy import symbols, IndexedBase
+
+from drudge import Range, Vec, TermSerializer
+from drudge.term import sum_term
+
+
+def test_term_batches_are_serialized_compactly():
+    """Test the round trip and the saving of the term serializer."""
+
+    i, j, n = symbols('i j n')
+    l = Range('L', 0, n)
+    a = IndexedBase('a')
+    v = Vec('v')
+
+    # Equal but distinct objects in each term, as after unpickling.
+    batch = [
+        pickle.loads(pickle.dumps(sum_term(
+            [(i, l), (j, l)], k * a[i, j] * v[i] * v[j]
+        )[0]))
+        for k in range(1, 50)
+    ]
+    assert batch[0].sums[0][1] is not batch[1].sums[0][1]
+
+    serializer = TermSerializer(measure=True)
+    dumped = serializer.dumps(batch)
+    loaded = serializer.loads(dumped)
+
+    assert loaded == batch
+    assert loaded[0].sums[0][1] is loaded[1].sums[0][1]
+    assert loaded[0].vecs[0].label is loaded[1].vecs[1].label
+    assert serializer.n_batches == 1
+    assert serializer.n_bytes == len(dumped)
+    assert serializer.bytes_saved > 0
+
+    # Generic objects can also be serialized.
+    assert serializer.loads(serializer.dumps([1, 'a', None])) == [1, 'a', None]
+
+    assert TermSerializer().bytes_saved is None
+    assert pickle.loads(pickle.dumps(serializer)) == serializer
@@ -7,8 +7,11 @@ import types
 import pytest
 from sympy import sympify, IndexedBase, KroneckerDelta, conjugate, Integer
 
-from drudge import Range, Vec, Term, Perm, Group, IDENT, NEG, CONJ
-from drudge.term import sum_term
+from drudge import (
+    Range, Vec, Term, Perm, Group, IDENT, NEG, CONJ, canon_cache_info,
+    clear_canon_cache, set_canon_cache_size
+)
+from drudge.term import sum_term, canon_terms
 
 
 @pytest.fixture
@@ -226,3 +229,66 @@ def test_canonicalization_of_matrix_product(mprod):
     new_sums = (sums[0], sums[2], sums[1])
     expected = prod.map(lambda x: x, sums=new_sums)
     assert res == expected
+
+
+def test_batched_canonicalization_matches_single(mprod):
+    """Test the canonicalization of multiple terms in a batch."""
+
+    prod, p = mprod
+    i, j, k = p.i, p.j, p.k
+    x = IndexedBase('x')
+    v = Vec('v')
+    symms = {x: Group([Perm([1, 0], NEG)])}
+
+    terms = [
+        prod,
+        prod.subst({i: j, j: k, k: i}),
+        sum_term([(j, p.l), (i, p.l)], x[j, i] * v[i] * v[j])[0],
+        sum_term([], v[i])[0],
+        Term((), Integer(2), ())
+    ]
+    vec_colour = lambda idx, vec, term: -idx
+
+    for kwargs in [{}, {'symms': symms, 'vec_colour': vec_colour}]:
+        expected = [i.canon(**kwargs) for i in terms]
+        assert canon_terms(terms, **kwargs) == expected
+        assert canon_terms(terms, n_threads=2, **kwargs) == expected
+        continue
+
+    assert canon_terms([]) == []
+
+
+def test_canonicalization_is_cached(mprod):
+    """Test the caching of canonicalization results for renamed terms."""
+
+    prod, p = mprod
+    i, j, k = p.i, p.j, p.k
+    expected = prod.canon()
+
+    clear_canon_cache()
+    prod.canon()
+    info = canon_cache_info()
+    assert info.misses == 1
+    assert info.hits == 0
+
+    # The same term with dummies renamed should be served from the cache.
+    renamed = prod.subst({i: j, j: k, k: i})
+    res = renamed.canon()
+    info = canon_cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+    assert info.hit_rate == 0.5
+    assert res.reset_dumms({p.l: [i, j, k]})[0] == expected.reset_dumms(
+        {p.l: [i, j, k]}
+    )[0]
+
+    # The cache can be disabled.
+    try:
+        set_canon_cache_size(None)
+        assert prod.canon() == expected
+        assert canon_cache_info().size == 0
+    finally:
+        set_canon_cache_size(4096)
+
+    with pytest.raises(ValueError):
+        set_canon_cache_size(-1)
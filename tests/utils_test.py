@@ -1,17 +1,22 @@
 """Tests for user utility functions."""
 
+import csv
 import functools
+import json
 import time
 import types
 from unittest.mock import MagicMock
 
+import pytest
 from sympy import IndexedBase, symbols, Symbol
 
 from drudge import (
-    Vec, sum_, prod_, Stopwatch, ScalarLatexPrinter, InvariantIndexable, Range
+    Drudge, Vec, sum_, prod_, Stopwatch, ScalarLatexPrinter,
+    InvariantIndexable, Range
 )
+from drudge import utils
 from drudge.term import parse_terms, try_resolve_range
-from drudge.utils import extract_alnum, SymbResolver
+from drudge.utils import extract_alnum, nest_bind, SymbResolver
 
 
 def test_sum_prod_utility():
@@ -57,6 +62,55 @@ def test_stopwatch():
     assert float(res.split()[-2]) - 1.0 < 0.1
 
 
+def test_stopwatch_records(spark_ctx, tmpdir, monkeypatch):
+    """Test the structured records from the stopwatch."""
+
+    dr = Drudge(spark_ctx)
+    r = Range('R')
+    a, b = symbols('a b')
+    x = IndexedBase('x')
+    tensor = dr.sum((a, r), x[a]) + dr.sum((b, r), x[b] ** 2)
+
+    # The sizing of the partitions is not timed for any step.
+    get_part_sizes = utils._get_part_sizes
+
+    def get_part_sizes_slowly(rdd):
+        """Get the sizes of the partitions slowly."""
+        time.sleep(1)
+        return get_part_sizes(rdd)
+
+    monkeypatch.setattr(utils, '_get_part_sizes', get_part_sizes_slowly)
+
+    stamper = Stopwatch(lambda _: None)
+    stamper.tock('Tensor', tensor)
+    stamper.tock('Nothing')
+    json_file = str(tmpdir.join('records.json'))
+    stamper.tock_total(json_file)
+
+    records = stamper.records
+    assert [i.label for i in records] == ['Tensor', 'Nothing', 'Total']
+    assert records[0].n_terms == 2
+    assert records[0].n_parts >= 1
+    assert records[0].skew >= 1
+    assert records[1].n_terms is None
+    assert records[0].wall_time < 1
+    assert records[1].wall_time < 1
+    assert records[2].wall_time >= 1
+
+    with open(json_file) as fp:
+        assert json.load(fp) == [i._asdict() for i in records]
+
+    csv_file = str(tmpdir.join('records.csv'))
+    stamper.write_records(csv_file)
+    with open(csv_file, newline='') as fp:
+        rows = list(csv.DictReader(fp))
+    assert [i['label'] for i in rows] == ['Tensor', 'Nothing', 'Total']
+    assert int(rows[0]['n_terms']) == 2
+
+    with pytest.raises(ValueError):
+        stamper.write_records(str(tmpdir.join('records.txt')))
+
+
 def test_invariant_indexable():
     """Test the utility for invariant indexables."""
 
@@ -100,3 +154,27 @@ def test_symb_resolvers():
     assert normal(a) == r
     assert normal(b) is None
     assert normal(a + 1) == r
+
+
+def test_nest_bind_gives_same_result_with_and_without_balancing(spark_ctx):
+    """Test the balanced and unbalanced nested bind for splitting numbers."""
+
+    def split(x):
+        """Split the number into two halves until it reaches one."""
+        if x <= 1:
+            return None
+        return [x // 2, x - x // 2]
+
+    data = [1000] + list(range(1, 50))
+    sizes = []
+    balanced = nest_bind(
+        spark_ctx.parallelize(data, 2), split, frontier_sizes=sizes
+    )
+    unbalanced = nest_bind(
+        spark_ctx.parallelize(data, 2), split, full_balance=False
+    )
+
+    assert balanced.count() == sum(data)
+    assert sorted(balanced.collect()) == sorted(unbalanced.collect())
+    assert sizes[0] == len(data)
+    assert all(i > 0 for i in sizes)
@@ -0,0 +1,175 @@
+"""Tests for the core Wick expansion utilities."""
+
+import pytest
+
+from drudge import wick
+from drudge.wickcore import compose_wick, count_wick, iter_wick
+
+
+def _compute_wick_schemes(vec_order, contrs):
+    """Compute all the Wick expansion schemes by reference recursion.
+
+    The vector order should be a sequence giving indices of vectors.  When it is
+    None, it means that all vectors needs to be contracted.  The contractions
+    should be a sequence of hash maps giving the amplitude and substitution of
+    each contraction.
+
+    The expansion result is a list of pairs, with the first field holding the
+    permutation of the given vectors for the contraction term, and the second
+    being the number of vectors contracted. Adjacent pairs in the first section
+    are are contracted, and the second section contains the remaining vectors
+    ordered as in the given vector order.
+    """
+
+    schemes = []
+    avail = [True for _ in contrs]
+    _add_wick(schemes, avail, 0, [], vec_order, contrs)
+    return schemes
+
+
+def _add_wick(schemes, avail, pivot, contred, vec_order, contrs):
+    """Add Wick expansion schemes recursively."""
+
+    n_vecs = len(avail)
+    contr_all = vec_order is None
+
+    # Find the actual pivot, which has to be available.
+    try:
+        # Last vector can never be pivot.
+        pivot = next(i for i in range(pivot, n_vecs - 1) if avail[i])
+    except StopIteration:
+        # When everything is already decided, add the current term.
+        if not contr_all or all(not i for i in avail):
+            vec_perm = list(contred)
+            if not contr_all:
+                vec_perm.extend(i for i in vec_order if avail[i])
+            schemes.append((
+                vec_perm, len(contred)
+            ))
+        return
+
+    pivot_contrs = contrs[pivot]
+    if contr_all and len(pivot_contrs) == 0:
+        return
+
+    if not contr_all:
+        _add_wick(schemes, avail, pivot + 1, contred, vec_order, contrs)
+
+    avail[pivot] = False
+    for vec_idx in range(pivot + 1, n_vecs):
+        if avail[vec_idx] and vec_idx in pivot_contrs:
+            avail[vec_idx] = False
+            contred.extend([pivot, vec_idx])
+            _add_wick(
+                schemes, avail, pivot + 1, contred, vec_order, contrs
+            )
+            avail[vec_idx] = True
+            contred.pop()
+            contred.pop()
+        continue
+
+    avail[pivot] = True
+    return
+
+
+@pytest.mark.parametrize('vec_order', [[1, 0, 3, 2], None])
+def test_wick_schemes_can_be_counted_and_iterated(vec_order):
+    """Test the different ways to get Wick schemes on a simple string.
+
+    Here we have four vectors, where each vector can be contracted with all
+    the vectors after it.
+    """
+
+    contrs = [{j: None for j in range(i + 1, 4)} for i in range(4)]
+
+    schemes = compose_wick(vec_order, contrs)
+    assert schemes == _compute_wick_schemes(vec_order, contrs)
+
+    n_schemes = count_wick(vec_order, contrs)
+    assert n_schemes == len(schemes)
+    assert n_schemes == (10 if vec_order is not None else 3)
+
+    for batch_size in [1, 2, n_schemes, n_schemes + 1]:
+        batches = list(iter_wick(vec_order, contrs, batch_size=batch_size))
+        assert all(0 < len(i) <= batch_size for i in batches)
+        assert [j for i in batches for j in i] == schemes
+        continue
+
+    with pytest.raises(ValueError):
+        iter_wick(vec_order, contrs, batch_size=0)
+
+
+def test_wick_schemes_can_be_restricted_to_connected_groups():
+    """Test the enumeration of the schemes connecting all groups of vectors.
+
+    Here we have six vectors in three groups, with the last vector not in any
+    group.  Each connected scheme needs to have some contraction across each
+    pair of the groups not linked by other groups.
+    """
+
+    contrs = [{j: None for j in range(i + 1, 6)} for i in range(6)]
+    groups = [0, 0, 1, 1, 2, None]
+
+    def is_connected(scheme):
+        """Test if the contractions in the scheme connect all groups."""
+        perm, n_contred = scheme
+        linked = {0}
+        pairs = [
+            {groups[perm[i]], groups[perm[i + 1]]}
+            for i in range(0, n_contred, 2)
+        ]
+        for _ in pairs:
+            for i in pairs:
+                if None not in i and not linked.isdisjoint(i):
+                    linked |= i
+                continue
+            continue
+        return linked == {0, 1, 2}
+
+    schemes = compose_wick(None, contrs)
+    expected = [i for i in schemes if is_connected(i)]
+    assert 0 < len(expected) < len(schemes)
+
+    assert compose_wick(None, contrs, groups) == expected
+    assert count_wick(None, contrs, groups=groups) == len(expected)
+    batches = list(iter_wick(None, contrs, batch_size=2, groups=groups))
+    assert [j for i in batches for j in i] == expected
+
+    with pytest.raises(ValueError):
+        compose_wick(list(range(6)), contrs, groups)
+
+
+def test_wick_schemes_are_streamed_beyond_threshold(monkeypatch):
+    """Test the switching to lazy sequence of schemes for many schemes."""
+
+    vec_order = [1, 0, 3, 2]
+    contrs = [{j: None for j in range(i + 1, 4)} for i in range(4)]
+    expected = compose_wick(vec_order, contrs)
+
+    schemes = wick._get_wick_schemes(vec_order, contrs)
+    assert isinstance(schemes, list)
+    assert schemes == expected
+
+    monkeypatch.setattr(wick, '_WICK_STREAM_THRESHOLD', len(expected) - 1)
+    schemes = wick._get_wick_schemes(vec_order, contrs)
+    assert isinstance(schemes, wick._WickSchemes)
+    assert len(schemes) == len(expected)
+    assert list(schemes) == expected
+
+
+def test_wick_schemes_can_be_taken_by_batches():
+    """Test the getting of the batches of schemes for distributed expansion."""
+
+    vec_order = [1, 0, 3, 2]
+    contrs = [{j: None for j in range(i + 1, 4)} for i in range(4)]
+    expected = compose_wick(vec_order, contrs)
+    schemes = wick._WickSchemes(vec_order, contrs, len(expected))
+
+    batch_size = 3
+    n_batches = -(-len(expected) // batch_size)
+    for idxes in [range(n_batches), range(1, 3), range(n_batches - 1, 1000)]:
+        assert list(wick._get_wick_batches(
+            schemes, batch_size, iter(idxes)
+        )) == expected[idxes[0] * batch_size:(idxes[-1] + 1) * batch_size]
+        continue
+    assert list(wick._get_wick_batches(schemes, batch_size, [])) == []